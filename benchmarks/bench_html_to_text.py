@@ -0,0 +1,118 @@
+"""
+Benchmark the single-parse html_to_text against the old two-pass
+extract_body_content -> clean_body_content pipeline, checking that both
+give the same text.
+
+The saved pages in data/raw_data are already cleaned text, so by default each
+one is wrapped back into a realistic HTML page (with scripts, styles and
+navigation noise) and repeated until it reaches --size bytes. HTML files can
+also be passed explicitly.
+
+Usage:
+    python benchmarks/bench_html_to_text.py [--size 500000] [--repeat 3] [files...]
+"""
+import argparse
+import glob
+import html
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from scrape import html_to_text
+
+# Tags the old pipeline removed (it left <template> to BeautifulSoup, which skips its text)
+LEGACY_EXCLUDED_TAGS = ("script", "style", "nav", "header", "footer", "iframe", "noscript")
+
+NOISE = (
+    "<script>window.dataLayer = window.dataLayer || []; function gtag(){dataLayer.push(arguments);}</script>"
+    "<style>.nav a { color: #333; padding: 4px 8px; }</style>"
+    "<nav><ul><li><a href='/'>Home</a></li><li><a href='/about'>About</a></li></ul></nav>"
+)
+
+
+def legacy_clean(html_content):
+    """The original double-parse cleaning pipeline (returns "" for pages without <body>)."""
+    soup = BeautifulSoup(html_content, "html.parser")
+    body_content = str(soup.body) if soup.body else ""
+    if not body_content:
+        return ""
+    soup = BeautifulSoup(body_content, "html.parser")
+    for element in soup(list(LEGACY_EXCLUDED_TAGS)):
+        element.decompose()
+    cleaned_content = soup.get_text(separator="\n")
+    return "\n".join(line.strip() for line in cleaned_content.splitlines() if line.strip())
+
+
+def text_to_html(text, size):
+    """Wrap saved text back into an HTML page of roughly ``size`` bytes."""
+    block = NOISE + "".join(f"<div class='row'><p>{html.escape(line)}</p></div>\n" for line in text.splitlines())
+    repeats = max(1, size // max(1, len(block)))
+    return f"<html><head><title>bench</title>{NOISE}</head><body><header>Site</header>{block * repeats}<footer>Footer</footer></body></html>"
+
+
+def outputs_match(page):
+    """
+    Whether html_to_text gives the old pipeline's text. Pages without a
+    <body> are the one intended difference: they now give their text, not "".
+    """
+    legacy = legacy_clean(page)
+    if not legacy and BeautifulSoup(page, "html.parser").body is None:
+        return True
+    return legacy == html_to_text(page)
+
+
+def best_of(func, arg, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(arg)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="HTML files to benchmark (default: synthesized from data/raw_data)")
+    parser.add_argument("--size", type=int, default=500_000, help="Target size of synthesized pages in bytes")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per page; the best time is reported")
+    args = parser.parse_args()
+
+    pages = []
+    if args.files:
+        for path in args.files:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                pages.append((path, f.read()))
+    else:
+        for path in sorted(glob.glob("data/raw_data/raw_data_*.txt")):
+            with open(path, "r", encoding="utf-8") as f:
+                pages.append((path, text_to_html(f.read(), args.size)))
+
+    if not pages:
+        print("No pages found; run from the repository root or pass HTML files.")
+        return
+
+    total_old = total_new = 0.0
+    mismatched = []
+    print(f"{'page':50} {'size':>10} {'legacy':>9} {'lxml':>9} {'speedup':>8}  same")
+    for path, page in pages:
+        legacy = best_of(legacy_clean, page, args.repeat)
+        single = best_of(html_to_text, page, args.repeat)
+        total_old += legacy
+        total_new += single
+        same = outputs_match(page)
+        if not same:
+            mismatched.append(path)
+        print(f"{os.path.basename(path):50} {len(page):>10} {legacy:>8.3f}s {single:>8.3f}s "
+              f"{legacy / single:>7.1f}x  {'yes' if same else 'NO'}")
+    print(f"{'total':50} {'':>10} {total_old:>8.3f}s {total_new:>8.3f}s {total_old / total_new:>7.1f}x")
+    if mismatched:
+        print(f"\nOutput differs from the old pipeline for: {', '.join(mismatched)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Measure module import time with ``python -X importtime`` so startup
+regressions (e.g. an SDK imported at module scope again) are caught.
+
+Each module is imported in a fresh interpreter. The cumulative import time
+of the module itself is reported, along with its slowest dependencies.
+Exits with status 1 if any module exceeds --max-ms.
+
+Usage:
+    python benchmarks/bench_import_time.py [--max-ms 1500] [--top 5] [modules...]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = ["parse", "model", "scrape", "pipeline"]
+
+# Provider SDKs that must not be imported just by importing our modules
+LAZY_IMPORTS = ("langchain_ollama", "langchain_core", "openai", "cohere", "groq")
+
+
+def import_times(module):
+    """
+    Import a module in a fresh interpreter and parse the -X importtime report.
+    Returns:
+        tuple: (cumulative microseconds for the module,
+                {direct dependency: cumulative microseconds},
+                set of every module imported on its behalf)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+
+    # Format: "import time: self [us] | cumulative | imported package", where the
+    # package name is indented by nesting depth and children are listed before parents
+    children = {}
+    subtree = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        if depth == 0:
+            if name == module:
+                return int(cumulative), children, subtree
+            children, subtree = {}, set()
+            continue
+        subtree.add(name.split(".")[0])
+        if depth == 1:
+            children[name] = int(cumulative)
+    raise RuntimeError(f"no import time reported for {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="Modules to import")
+    parser.add_argument("--max-ms", type=float, default=1500, help="Fail if a module takes longer than this")
+    parser.add_argument("--top", type=int, default=5, help="Number of slowest dependencies to show")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        try:
+            total_us, dependencies, subtree = import_times(module)
+        except RuntimeError as e:
+            print(f"{module}: {e}")
+            failed = True
+            continue
+
+        total_ms = total_us / 1000
+        eager = [name for name in LAZY_IMPORTS if name in subtree]
+        status = "OK" if total_ms <= args.max_ms and not eager else "FAIL"
+        failed = failed or status == "FAIL"
+        print(f"{module:12} {total_ms:9.1f} ms  {status}")
+        if eager:
+            print(f"    eagerly imports: {', '.join(eager)}")
+
+        slowest = sorted(dependencies.items(), key=lambda item: item[1], reverse=True)
+        for name, us in slowest[:args.top]:
+            print(f"    {name:30} {us / 1000:9.1f} ms")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark the rotating proxy pool against local stand-in proxies.
+
+Starts a local origin server and several local forward proxies. Each
+healthy proxy handles one request at a time with a fixed delay, like a
+bandwidth-limited upstream proxy, so throughput should scale with the
+number of proxies. One extra proxy is slow and one answers every request
+with 403; both should be avoided or ejected and receive almost no
+traffic.
+
+Usage:
+    python benchmarks/bench_proxy_pool.py [--proxies 4] [--requests 200] [--delay 0.05]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_fetch import fetch_response
+from proxy_pool import ProxyPool
+
+PAGE = b"<html><head><title>bench</title></head><body><p>" + b"Server-rendered content. " * 40 + b"</p></body></html>"
+
+
+class OriginHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_proxy_handler(delay, status=None):
+    """Forward proxy handler serving one request at a time after ``delay`` seconds."""
+    lock = threading.Lock()
+
+    class ProxyHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                time.sleep(delay)
+                if status is not None:
+                    self.send_response(status)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                with urllib.request.urlopen(self.path, timeout=10) as upstream:
+                    body = upstream.read()
+                    content_type = upstream.headers.get("Content-Type", "text/html")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return ProxyHandler
+
+
+def start_server(handler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def fetch_through(pool, url):
+    """Fetch a page the way scrape_website does with use_proxy=True."""
+    proxy = pool.acquire(url)
+    started = time.monotonic()
+    response = fetch_response(url, timeout=10, proxy_server=proxy)
+    pool.report(proxy, response is not None, time.monotonic() - started, response["status"] if response else None)
+    return response is not None and response["status"] == 200
+
+
+def run(pool, url, requests, concurrency):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        ok = sum(executor.map(lambda i: fetch_through(pool, f"{url}/page/{i}"), range(requests)))
+    return ok, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--proxies", type=int, default=4, help="Number of healthy stand-in proxies")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.05, help="Seconds each proxy spends per request")
+    args = parser.parse_args()
+
+    _, origin = start_server(OriginHandler)
+    healthy = [start_server(make_proxy_handler(args.delay))[1] for _ in range(args.proxies)]
+    _, slow = start_server(make_proxy_handler(args.delay * 20))
+    _, banned = start_server(make_proxy_handler(0, status=403))
+    concurrency = args.proxies * 4
+
+    print(f"{args.requests} requests, {concurrency} workers, {args.delay * 1000:.0f} ms per proxy request\n")
+    baseline = None
+    for label, proxies in (("1 proxy", healthy[:1]),
+                           (f"{args.proxies} proxies", healthy),
+                           (f"{args.proxies} + slow + banned", healthy + [slow, banned])):
+        pool = ProxyPool(proxies, cooldown=60, max_latency=args.delay * 10)
+        ok, elapsed = run(pool, origin, args.requests, concurrency)
+        rate = args.requests / elapsed
+        baseline = baseline or rate
+        print(f"{label:<24} {ok:>4}/{args.requests} ok  {elapsed:6.2f}s  {rate:7.1f} req/s  ({rate / baseline:.1f}x)")
+        for state in pool.stats():
+            print(f"    {state['proxy']:<24} requests={state['requests']:<4} failures={state['failures']:<3} "
+                  f"latency={state['latency']}  ejections={state['ejections']}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
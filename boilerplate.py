@@ -0,0 +1,444 @@
+"""
+Main-content extraction and cross-page boilerplate removal.
+
+html_to_text keeps every block outside a fixed tag list, so cookie
+banners, menus and "related articles" lists reach the LLM with every
+page. Here the page is split into text blocks and each block is
+classified by its word count and link density, and those of its
+neighbours (the "densitometric" rules used by boilerpipe): long,
+link-poor blocks are content; short blocks between other short blocks
+and link-heavy blocks are boilerplate. Elements whose class, id or role
+marks them as cookie notices, navigation, sidebars, sharing widgets and
+the like are dropped outright, unless they hold most of the page's text
+(sites put classes like "has-sidebar" on their outermost wrapper).
+
+Whatever the site's template repeats on every page (headings of
+navigation menus, footers written as plain divs, "Back to top") is then
+removed by SiteBoilerplate, which counts how many different pages of a
+host each line appears on.
+"""
+from urllib.parse import urlsplit
+import hashlib
+import logging
+import re
+import threading
+
+from lxml import etree
+import lxml.html
+
+from scrape import EXCLUDED_TAGS, html_to_text
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_PARSER = lxml.html.HTMLParser(encoding="utf-8", remove_comments=True)
+
+# Tags that start a new text block
+_BLOCK_TAGS = frozenset((
+    "p", "div", "section", "article", "main", "aside", "blockquote", "pre", "ul", "ol", "dl", "table",
+    "figure", "figcaption", "form", "fieldset", "address", "details", "summary", "h1", "h2", "h3", "h4",
+    "h5", "h6", "header", "footer", "nav", "dialog", "body",
+))
+# Tags that start a new line inside a block (a list or table is one block)
+_LINE_TAGS = frozenset(("li", "dt", "dd", "tr", "br", "option"))
+_HEADINGS = frozenset(("h1", "h2", "h3", "h4", "h5", "h6"))
+_CELL_TAGS = frozenset(("td", "th"))
+# Blocks kept whatever their length unless they are mostly links (data tables, code, lists)
+_STRUCTURED_TAGS = frozenset(("table", "pre", "dl", "ul", "ol"))
+
+# Elements that never hold main content
+_NOISE_TAGS = frozenset(("aside", "form", "button", "select", "svg", "template", "dialog", "menu"))
+_NOISE_ROLES = frozenset(("navigation", "banner", "contentinfo", "complementary", "dialog", "alertdialog",
+                          "menu", "menubar", "search"))
+# Whole words of a class or id that mark page furniture ("share-buttons", not "shared-layout")
+_NOISE_WORDS = frozenset((
+    "cookie", "cookies", "cookiebanner", "consent", "gdpr", "breadcrumb", "breadcrumbs", "share", "sharing",
+    "sharebar", "social", "related", "recommended", "recommendations", "newsletter", "subscribe", "sidebar",
+    "sidenav", "widget", "widgets", "menu", "navbar", "nav", "navigation", "skiplink", "skip", "promo",
+    "advert", "advertisement", "ad", "ads", "sponsor", "sponsored", "popup", "modal", "overlay", "comment",
+    "comments", "footer", "masthead", "pagination", "pager", "toolbar", "signup",
+))
+# Words that turn the next one into a layout flag ("no-sidebar", "has-comments")
+_NOISE_NEGATIONS = frozenset(("no", "not", "has", "with", "without", "hide"))
+_NAME_SPLIT = re.compile(r"[\s_-]+")
+# Containers never dropped for their class (sites put layout classes on them)
+_NEVER_NOISE = frozenset(("html", "body", "main", "article"))
+
+# Below this much main content, fall back to all non-noise text
+MIN_MAIN_CHARS = 200
+# Below this share of the page's text, the rules misjudged it: keep it all
+MIN_MAIN_SHARE = 0.05
+# An element with more than this share of the page's text is never noise
+_MAX_NOISE_SHARE = 0.5
+
+
+def _parse(html_content):
+    if isinstance(html_content, str):
+        html_content = html_content.encode("utf-8")
+    try:
+        return lxml.html.document_fromstring(html_content, parser=_PARSER)
+    except etree.ParserError:
+        return None
+
+
+def _is_noise(element):
+    """Whether an element's tag, role or class/id marks it as page furniture."""
+    tag = element.tag
+    if tag in _NOISE_TAGS:
+        return True
+    if tag in _NEVER_NOISE:
+        return False
+    if element.get("hidden") is not None or element.get("aria-hidden") == "true":
+        return True
+    if (element.get("role") or "").lower() in _NOISE_ROLES:
+        return True
+    words = _NAME_SPLIT.split(f"{element.get('class') or ''} {element.get('id') or ''}".lower())
+    return any(word in _NOISE_WORDS and (index == 0 or words[index - 1] not in _NOISE_NEGATIONS)
+               for index, word in enumerate(words))
+
+
+def _text_length(element):
+    """Characters of visible text inside an element (scripts, styles etc. excluded)."""
+    length = 0
+    walker = etree.iterwalk(element, events=("start", "end"))
+    for event, node in walker:
+        if event == "start":
+            if not isinstance(node.tag, str) or node.tag in EXCLUDED_TAGS:
+                walker.skip_subtree()
+            elif node.text:
+                length += len(node.text.strip())
+        elif node is not element and node.tail:
+            length += len(node.tail.strip())
+    return length
+
+
+class _Block:
+    """A run of text between block-level tags."""
+
+    def __init__(self, tag, noise, heading):
+        self.tag = tag
+        self.noise = noise
+        self.heading = heading
+        self.lines = []
+        self.words = 0
+        self.link_words = 0
+
+    @property
+    def link_density(self):
+        return self.link_words / self.words if self.words else 0.0
+
+    @property
+    def chars(self):
+        return sum(len(line) for line in self.lines) + max(0, len(self.lines) - 1)
+
+
+class _BlockBuilder:
+    """Collects text pieces into blocks and lines as the tree is walked."""
+
+    def __init__(self):
+        self.blocks = []
+        self._pieces = []
+        self._lines = []
+        self._words = 0
+        self._link_words = 0
+
+    def add(self, text, in_link):
+        words = len(text.split())
+        if not words:
+            if self._pieces and text:
+                self._pieces.append(" ")
+            return
+        self._pieces.append(text)
+        self._words += words
+        if in_link:
+            self._link_words += words
+
+    def new_line(self):
+        line = " ".join("".join(self._pieces).split())
+        if line:
+            self._lines.append(line)
+        self._pieces = []
+
+    def flush(self, tag, noise, heading):
+        self.new_line()
+        if self._lines:
+            block = _Block(tag, noise, heading)
+            block.lines, block.words, block.link_words = self._lines, self._words, self._link_words
+            self.blocks.append(block)
+        self._lines, self._words, self._link_words = [], 0, 0
+
+
+def _iter_blocks(root):
+    """Split a document into text blocks, marking those inside noise elements."""
+    builder = _BlockBuilder()
+    max_noise_chars = _MAX_NOISE_SHARE * _text_length(root)
+    # Innermost block-level element, which a flushed block belongs to
+    block_tags = [root.tag]
+    # Noise flag of every open element, set on "start" and used again on "end"
+    noise_flags = []
+    noise_depth = 0
+    link_depth = 0
+    headings = 0
+    walker = etree.iterwalk(root, events=("start", "end"))
+    for event, element in walker:
+        tag = element.tag
+        skipped = not isinstance(tag, str) or tag in EXCLUDED_TAGS
+        if event == "start":
+            if skipped:
+                walker.skip_subtree()
+                continue
+            noise = _is_noise(element)
+            if noise and noise_depth == 0 and _text_length(element) > max_noise_chars:
+                # A wrapper around most of the page is layout, whatever its class says
+                noise = False
+            noise_flags.append(noise)
+            if noise or tag in _BLOCK_TAGS:
+                builder.flush(block_tags[-1], noise_depth > 0, headings > 0)
+                block_tags.append(tag)
+            elif tag in _LINE_TAGS:
+                builder.new_line()
+            elif tag in _CELL_TAGS:
+                builder.add(" ", False)
+            noise_depth += noise
+            link_depth += tag == "a"
+            headings += tag in _HEADINGS
+            if element.text:
+                builder.add(element.text, link_depth > 0)
+        else:
+            if not skipped:
+                noise = noise_flags.pop()
+                if noise or tag in _BLOCK_TAGS:
+                    builder.flush(block_tags.pop(), noise_depth > 0, headings > 0)
+                elif tag in _LINE_TAGS:
+                    builder.new_line()
+                noise_depth -= noise
+                link_depth -= tag == "a"
+                headings -= tag in _HEADINGS
+            # Skipped subtrees still get an "end" event, which carries their tail
+            if element is not root and element.tail:
+                builder.add(element.tail, link_depth > 0)
+    builder.flush(block_tags[-1], noise_depth > 0, False)
+    return builder.blocks
+
+
+def _classify(blocks):
+    """
+    Mark each block as content or boilerplate from its own and its
+    neighbours' word counts and link densities.
+    Returns:
+        list: One bool per block
+    """
+    empty = _Block(None, False, False)
+    content = []
+    for index, block in enumerate(blocks):
+        previous = blocks[index - 1] if index > 0 else empty
+        following = blocks[index + 1] if index + 1 < len(blocks) else empty
+        if block.link_density > 0.333:
+            keep = False
+        elif block.tag in _STRUCTURED_TAGS:
+            keep = True
+        elif previous.link_density <= 0.555:
+            keep = block.words > 16 or following.words > 15 or previous.words > 4
+        else:
+            keep = block.words > 40 or following.words > 17
+        content.append(keep)
+
+    # Headings belong to the content they introduce
+    for index, block in enumerate(blocks):
+        if block.heading and not content[index] and block.link_density <= 0.333:
+            content[index] = index + 1 < len(blocks) and content[index + 1]
+    return content
+
+
+def extract_main_content(html_content, min_chars=MIN_MAIN_CHARS):
+    """
+    Extract the main text of a page, without menus, banners and link lists.
+
+    If less than ``min_chars`` of content is found (very short pages, or
+    pages the rules misjudge), all text outside noise elements is kept;
+    if that is still empty or under MIN_MAIN_SHARE of the page's text, the
+    whole html_to_text output is returned instead.
+
+    Args:
+        html_content (str): HTML content
+        min_chars (int): Minimum main content before falling back
+    Returns:
+        tuple: (main text, one line per paragraph or list item;
+            report dict with text_chars, the size of the html_to_text
+            output, and main_chars)
+    """
+    root = _parse(html_content) if html_content else None
+    if root is None:
+        return "", {"text_chars": 0, "main_chars": 0}
+    body = root.find("body")
+    blocks = _iter_blocks(body if body is not None else root)
+    text_chars = sum(block.chars for block in blocks) + max(0, len(blocks) - 1)
+
+    candidates = [block for block in blocks if not block.noise]
+    kept = [block for block, keep in zip(candidates, _classify(candidates)) if keep]
+    if sum(block.chars for block in kept) < min_chars:
+        kept = candidates
+    text = "\n".join(line for block in kept for line in block.lines)
+    if text_chars and len(text) < MIN_MAIN_SHARE * text_chars:
+        logger.debug(f"Main content is {len(text)} of {text_chars} characters; keeping all text")
+        text = html_to_text(html_content)
+    return text, {"text_chars": text_chars, "main_chars": len(text)}
+
+
+def _line_key(line):
+    return hashlib.blake2b(" ".join(line.split()).encode("utf-8"), digest_size=8).digest()
+
+
+class SiteBoilerplate:
+    """
+    Learns which lines a site's template repeats and strips them.
+
+    A line counts as boilerplate for a host once it has appeared on at
+    least ``min_pages`` different pages (URLs) of that host and on at least
+    ``min_share`` of them; seeing the same page again does not count. Pages
+    are counted as they are cleaned, so the first pages of a site keep their
+    boilerplate; pass a batch to remove_site_boilerplate to learn from all
+    of them first.
+    """
+
+    # Per-host lines tracked before lines seen only once are forgotten
+    MAX_TRACKED_LINES = 50_000
+
+    def __init__(self, min_pages=3, min_share=0.5):
+        """
+        Args:
+            min_pages (int): Pages a line must appear on before it is removed
+            min_share (float): Fraction of the host's pages it must appear on
+        """
+        self.min_pages = min_pages
+        self.min_share = min_share
+        # Per host: page URL -> page number, and line digest -> page numbers it is on
+        self._pages = {}
+        self._lines = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _host(url):
+        return (urlsplit(url).hostname or "").lower()
+
+    @staticmethod
+    def _page(url):
+        return url.split("#", 1)[0]
+
+    def observe(self, url, text):
+        """
+        Count the lines of one page of a site.
+        Args:
+            url (str): Page URL
+            text (str): Cleaned page text
+        """
+        host = self._host(url)
+        keys = {_line_key(line) for line in text.splitlines() if line.strip()}
+        with self._lock:
+            pages = self._pages.setdefault(host, {})
+            page = pages.setdefault(self._page(url), len(pages))
+            lines = self._lines.setdefault(host, {})
+            for key in keys:
+                lines.setdefault(key, set()).add(page)
+            if len(lines) > self.MAX_TRACKED_LINES:
+                self._lines[host] = {key: seen for key, seen in lines.items() if len(seen) > 1}
+
+    def strip(self, url, text):
+        """
+        Remove the lines of a page that are boilerplate for its site.
+        Args:
+            url (str): Page URL
+            text (str): Cleaned page text
+        Returns:
+            str: Text without the site's repeated lines
+        """
+        host = self._host(url)
+        with self._lock:
+            pages = len(self._pages.get(host, ()))
+            lines = self._lines.get(host)
+            if lines is None or pages < self.min_pages:
+                return text
+            threshold = max(self.min_pages, self.min_share * pages)
+            return "\n".join(line for line in text.splitlines()
+                             if len(lines.get(_line_key(line), ())) < threshold)
+
+    def clean(self, url, text):
+        """
+        Count a page's lines, then strip the site's boilerplate from it.
+        Args:
+            url (str): Page URL
+            text (str): Cleaned page text
+        Returns:
+            str: Text without the site's repeated lines
+        """
+        self.observe(url, text)
+        return self.strip(url, text)
+
+
+def remove_site_boilerplate(pages, min_pages=3, min_share=0.5):
+    """
+    Remove lines repeated across pages of the same site from a batch.
+    Args:
+        pages (dict): {url: cleaned text}
+        min_pages (int): Pages a line must appear on before it is removed
+        min_share (float): Fraction of the host's pages it must appear on
+    Returns:
+        dict: {url: text without the site's repeated lines}
+    """
+    site = SiteBoilerplate(min_pages, min_share)
+    for url, text in pages.items():
+        site.observe(url, text)
+    return {url: site.strip(url, text) for url, text in pages.items()}
+
+
+def clean_page(html_content, url=None, site=None, main_content=True):
+    """
+    Turn a page into the text sent to the LLM, reporting how much was cut.
+    Args:
+        html_content (str): HTML content
+        url (str): Page URL (needed for cross-page boilerplate removal)
+        site (SiteBoilerplate): Cross-page boilerplate state (None skips that step)
+        main_content (bool): Keep only the main content (False keeps all of html_to_text)
+    Returns:
+        tuple: (text, report dict with text_chars, main_chars, final_chars and
+            reduction, the fraction of html_to_text's output removed)
+    """
+    if main_content:
+        text, report = extract_main_content(html_content)
+    else:
+        text = html_to_text(html_content)
+        report = {"text_chars": len(text), "main_chars": len(text)}
+    if site is not None and url:
+        text = site.clean(url, text)
+    return text, finish_report(report, text)
+
+
+def finish_report(report, text):
+    """
+    Add the final size and the reduction to a report from extract_main_content.
+    Args:
+        report (dict): Report with text_chars
+        text (str): Text that will be sent on
+    Returns:
+        dict: The report, with final_chars and reduction
+    """
+    report["final_chars"] = len(text)
+    report["reduction"] = round(1 - len(text) / report["text_chars"], 3) if report["text_chars"] else 0.0
+    return report
+
+
+def summarize_reports(reports):
+    """
+    Total the reports of several pages.
+    Args:
+        reports (iterable): Reports from clean_page
+    Returns:
+        dict: pages, text_chars, final_chars and overall reduction
+    """
+    total = {"pages": 0, "text_chars": 0, "final_chars": 0}
+    for report in reports:
+        total["pages"] += 1
+        total["text_chars"] += report["text_chars"]
+        total["final_chars"] += report["final_chars"]
+    total["reduction"] = round(1 - total["final_chars"] / total["text_chars"], 3) if total["text_chars"] else 0.0
+    return total
@@ -0,0 +1,216 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import OrderedDict, deque
+from urllib.parse import urlparse
+import queue
+import threading
+import time
+import logging
+
+from scrape import scrape_website, html_to_text
+from driver_pool import get_driver_pool
+from proxy_pool import get_proxy_pool
+from exporters import open_writer
+from search import iter_search
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def _host_of(url):
+    """Return the lower-cased host of a URL (empty string if it has none)."""
+    return (urlparse(url).hostname or "").lower()
+
+
+class _HostState:
+    """Per-host politeness bookkeeping."""
+
+    def __init__(self):
+        self.pending = deque()
+        self.in_flight = 0
+        self.next_start = 0.0
+
+
+_END = object()
+_FEED_POLL = 0.1
+
+
+def _feed_urls(urls, incoming):
+    """Copy URLs from a (possibly slow) iterable into a queue, then mark the end."""
+    try:
+        for url in urls:
+            incoming.put(url)
+    except Exception as e:
+        logger.error(f"Error reading URLs to scrape: {str(e)}")
+    finally:
+        incoming.put(_END)
+
+
+def _scrape_one(url, fetch, clean, queued_at, scrape_options):
+    """
+    Fetch (and optionally clean) a single URL, timing each stage.
+    Returns:
+        dict: {url, content, status, mode, timings, blocking}
+    """
+    started = time.monotonic()
+    timings = {"queued": round(started - queued_at, 3)}
+    mode = None
+    blocking = None
+    try:
+        if fetch is None:
+            stats = {}
+            content = scrape_website(url, stats=stats, **scrape_options)
+            mode = stats.get("fetch_mode")
+            if "readiness" in stats:
+                timings["ready_wait"] = stats["readiness"]["waited"]
+            blocking = stats.get("blocking")
+        else:
+            content = fetch(url)
+        timings["fetch"] = round(time.monotonic() - started, 3)
+        if content and clean:
+            clean_started = time.monotonic()
+            content = html_to_text(content)
+            timings["clean"] = round(time.monotonic() - clean_started, 3)
+        status = "ok" if content else "empty"
+    except Exception as e:
+        logger.error(f"Error scraping {url}: {str(e)}")
+        content = None
+        status = f"error: {str(e)}"
+    timings["total"] = round(time.monotonic() - queued_at, 3)
+    return {"url": url, "content": content, "status": status, "mode": mode, "timings": timings, "blocking": blocking}
+
+
+def scrape_many(urls, concurrency=4, per_host_limit=2, min_delay=1.0, clean=False, fetch=None, **scrape_options):
+    """
+    Scrape many URLs concurrently, yielding each result as soon as it finishes.
+
+    A host never has more than ``per_host_limit`` requests in flight, and
+    consecutive requests to the same host start at least ``min_delay``
+    seconds apart. Other hosts keep the workers busy in the meantime.
+
+    Args:
+        urls (iterable): URLs to scrape (duplicates are skipped); consumed lazily,
+            so a generator such as search.iter_search starts scraping at its first URL
+        concurrency (int): Number of worker threads
+        per_host_limit (int): Maximum concurrent requests per host
+        min_delay (float): Minimum seconds between request starts on one host
+        clean (bool): Return cleaned text instead of raw HTML
+        fetch (callable): Function url -> HTML (default: scrape_website)
+        **scrape_options: Extra keyword arguments for scrape_website
+            (use_proxy, mode, readiness, selector, max_wait, profile, allowlist)
+    Yields:
+        dict: {url, content, status, mode, timings, blocking} in completion order,
+            where blocking is the resource_blocking report for browser renders
+    """
+    if concurrency < 1 or per_host_limit < 1:
+        raise ValueError("concurrency and per_host_limit must be at least 1")
+
+    if fetch is None:
+        # Make sure each worker can get its own warm driver
+        proxy_pool = get_proxy_pool() if scrape_options.get("use_proxy") else None
+        if proxy_pool is None:
+            get_driver_pool(None).ensure_capacity(concurrency)
+        else:
+            # Workers are spread over the proxies, each with its own driver pool
+            for proxy in proxy_pool.proxies:
+                get_driver_pool(proxy).ensure_capacity(-(-concurrency // len(proxy_pool)))
+
+    # URLs are read from the source in a background thread (it may be a search
+    # still in progress), so the first results are scraped while later ones arrive
+    lookahead = concurrency * 4
+    incoming = queue.Queue(maxsize=lookahead)
+    feeder = threading.Thread(target=_feed_urls, args=(urls, incoming), daemon=True)
+    feeder.start()
+    seen = set()
+    hosts = OrderedDict()
+    queued = 0
+    exhausted = False
+
+    futures = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            # Block for the next URL only when there is nothing else to do
+            block = not futures and not queued
+            while not exhausted and queued < lookahead:
+                try:
+                    url = incoming.get(block=block)
+                except queue.Empty:
+                    break
+                block = False
+                if url is _END:
+                    exhausted = True
+                elif url not in seen:
+                    seen.add(url)
+                    hosts.setdefault(_host_of(url), _HostState()).pending.append((url, time.monotonic()))
+                    queued += 1
+            if not futures and not queued and exhausted:
+                break
+
+            # Dispatch every URL whose host currently allows another request
+            now = time.monotonic()
+            next_wakeup = None
+            for host, state in hosts.items():
+                while (state.pending and len(futures) < concurrency
+                       and state.in_flight < per_host_limit and state.next_start <= now):
+                    url, queued_at = state.pending.popleft()
+                    queued -= 1
+                    state.in_flight += 1
+                    state.next_start = now + min_delay
+                    futures[executor.submit(_scrape_one, url, fetch, clean, queued_at, scrape_options)] = host
+                if state.pending and state.in_flight < per_host_limit and state.next_start > now:
+                    wakeup = state.next_start - now
+                    next_wakeup = wakeup if next_wakeup is None else min(next_wakeup, wakeup)
+
+            if not futures:
+                # Every queued host is cooling down
+                time.sleep(next_wakeup if exhausted else min(next_wakeup or 0, _FEED_POLL))
+                continue
+
+            # Wake up periodically while the source may still produce URLs
+            timeout = next_wakeup if exhausted else min(next_wakeup or _FEED_POLL, _FEED_POLL)
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                hosts[futures.pop(future)].in_flight -= 1
+                yield future.result()
+
+
+
+def scrape_to_file(urls, path, format=None, buffer_rows=None, **options):
+    """
+    Scrape many URLs, streaming each result to a JSONL, CSV or Parquet file.
+
+    Results are written as they complete, so memory use does not grow with
+    the number of pages and a crash only loses the unflushed buffer (nothing,
+    for JSONL).
+
+    Args:
+        urls (iterable): URLs to scrape
+        path (str): Output file; the format follows its extension
+        format (str): Override the output format ("jsonl", "csv" or "parquet")
+        buffer_rows (int): Records buffered before a CSV block / Parquet row group is written
+        **options: Keyword arguments for scrape_many
+    Returns:
+        dict: Number of pages written per status ("ok", "empty", "error")
+    """
+    writer_options = {"buffer_rows": buffer_rows} if buffer_rows else {}
+    summary = {"ok": 0, "empty": 0, "error": 0}
+    with open_writer(path, format, **writer_options) as writer:
+        for result in scrape_many(urls, **options):
+            writer.write(result)
+            summary["error" if result["status"].startswith("error") else result["status"]] += 1
+    logger.info(f"Wrote {sum(summary.values())} pages to {path}: {summary}")
+    return summary
+
+
+def search_and_scrape(query, num_results=10, backend="google", use_cache=True, **options):
+    """
+    Search the web and scrape each result as soon as the search yields it.
+    Args:
+        query (str): The search query
+        num_results (int): Number of results to scrape
+        backend (str): Search backend name (see search.register_backend)
+        use_cache (bool): Whether to reuse cached search results
+        **options: Keyword arguments for scrape_many
+    Yields:
+        dict: scrape_many results in completion order
+    """
+    return scrape_many(iter_search(query, num_results, backend=backend, use_cache=use_cache), **options)
@@ -0,0 +1,304 @@
+from collections import deque
+from itertools import islice
+import hashlib
+import math
+
+# Rough characters-per-token ratio for English text with Llama/GPT tokenizers
+CHARS_PER_TOKEN = 4
+
+# Context window (tokens) of the models used for extraction
+CONTEXT_WINDOWS = {
+    "llama3": 8192,
+    "llama3-70b-8192": 8192,
+    "gpt-3.5-turbo-1106": 16385,
+}
+DEFAULT_CONTEXT_WINDOW = 4096
+
+
+def estimate_tokens(text):
+    """
+    Estimate the number of tokens in a piece of text.
+    Args:
+        text (str): Text to measure
+    Returns:
+        int: Approximate token count
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def chunk_budget(model="llama3", prompt_tokens=512, response_tokens=1024):
+    """
+    Compute how many content tokens fit in one request to a model.
+    Args:
+        model (str): Model name (see CONTEXT_WINDOWS)
+        prompt_tokens (int): Tokens reserved for the prompt template and description
+        response_tokens (int): Tokens reserved for the model's answer
+    Returns:
+        int: Token budget for the chunk itself
+    """
+    context = CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+    return max(256, context - prompt_tokens - response_tokens)
+
+
+def _iter_line_spans(text, start=0, stop=None):
+    """Yield (line, start, end) for the non-empty lines of text[start:stop] without building a list."""
+    stop = len(text) if stop is None else stop
+    while start < stop:
+        end = text.find("\n", start, stop)
+        if end == -1:
+            end = stop
+        line = text[start:end].strip()
+        if line:
+            yield line, start, end
+        start = end + 1
+
+
+def _iter_lines(text, start=0, stop=None):
+    """Yield the non-empty lines of text without building a list of them."""
+    for line, _, _ in _iter_line_spans(text, start, stop):
+        yield line
+
+
+def _split_long_line(line, max_chars):
+    """Split a line longer than max_chars at whitespace where possible."""
+    while len(line) > max_chars:
+        cut = line.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        yield line[:cut].rstrip()
+        line = line[cut:].lstrip()
+    if line:
+        yield line
+
+
+def _iter_pieces(text, start, stop, max_chars):
+    """Yield the lines of text[start:stop], splitting any longer than max_chars."""
+    for line in _iter_lines(text, start, stop):
+        yield from _split_long_line(line, max_chars)
+
+
+def _iter_piece_costs_reversed(text, start, stop, max_chars):
+    """Yield the sizes (length plus newline) of _iter_pieces' output, last piece first."""
+    end = stop
+    while end > start:
+        newline = text.rfind("\n", start, end)
+        line_start = start if newline == -1 else newline + 1
+        line = text[line_start:end].strip()
+        if line:
+            for piece in reversed(list(_split_long_line(line, max_chars))):
+                yield len(piece) + 1
+        end = line_start - 1
+
+
+def iter_chunks(text, max_tokens=None, model="llama3", overlap_tokens=0, balance=True):
+    """
+    Pack whole lines of text into chunks that fit a model's token budget.
+
+    Lines are never cut unless a single line exceeds the budget. With
+    ``balance`` the chunks are sized evenly instead of filling every chunk
+    to the limit and leaving a small remainder, so parallel workers finish
+    together, and there are never more chunks than without. Balancing
+    first scans the text backwards, keeping only where chunks could end;
+    the chunks themselves are then streamed in one forward pass.
+
+    Args:
+        text (str): Cleaned text, one block per line
+        max_tokens (int): Token budget per chunk (default: chunk_budget(model))
+        model (str): Model the chunks are for, used for the default budget
+        overlap_tokens (int): Tokens of trailing lines repeated at the start of the next chunk
+        balance (bool): Aim for equal-sized chunks (never more chunks than without)
+    Yields:
+        str: Chunks of newline-joined lines
+    """
+    if not text:
+        return
+
+    max_chars = (max_tokens or chunk_budget(model)) * CHARS_PER_TOKEN
+    overlap_chars = min(overlap_tokens * CHARS_PER_TOKEN, max_chars // 2)
+    yield from _iter_packed(text, 0, len(text), max_chars, overlap_chars, balance)
+
+
+def _iter_packed(text, start, stop, max_chars, overlap_chars, balance):
+    """Chunk text[start:stop] (see iter_chunks)."""
+    plan = None
+    if balance:
+        plan = _plan_chunks(_iter_piece_costs_reversed(text, start, stop, max_chars), max_chars, overlap_chars)
+    for lines in _pack(_iter_pieces(text, start, stop, max_chars), max_chars, overlap_chars, plan):
+        yield "\n".join(lines)
+
+
+def _plan_chunks(costs_reversed, limit, overlap_chars):
+    """
+    Pack greedily from the end of the text, which needs as few chunks as
+    packing from the start, and record where the chunks begin.
+    Args:
+        costs_reversed (iterable): Piece sizes, last piece first
+    Returns:
+        tuple: (fits, pieces, chars) where fits[j] is how many trailing
+            pieces fit in j chunks, and pieces/chars are the totals
+    """
+    fits = [0]
+    ahead = deque()
+    costs = iter(costs_reversed)
+    pieces = chars = size = fresh = 0
+    while True:
+        cost = ahead.popleft() if ahead else next(costs, None)
+        if cost is None:
+            break
+        # Overlap this piece would carry in from the previous chunk if it started a chunk
+        tail = index = 0
+        bound = min(overlap_chars, limit - cost)
+        while overlap_chars:
+            if index == len(ahead):
+                following = next(costs, None)
+                if following is None:
+                    break
+                ahead.append(following)
+            if tail + ahead[index] > bound:
+                break
+            tail += ahead[index]
+            index += 1
+        if fresh and tail + size + cost > limit:
+            fits.append(pieces)
+            size = fresh = 0
+        size += cost
+        fresh += 1
+        pieces += 1
+        chars += cost
+    if fresh:
+        fits.append(pieces)
+    return fits, pieces, chars
+
+
+def _pack(pieces, limit, overlap_chars, plan=None):
+    """
+    Pack lines into chunks of at most ``limit`` characters, yielding each
+    chunk as a list of lines. Greedy, unless a plan from _plan_chunks is
+    given: then each chunk aims at an even share of the remaining text,
+    ending only where the rest still fits in the chunks left.
+    """
+    fits, total_pieces, total = plan if plan is not None else ([0], 0, 0)
+    count = len(fits) - 1
+    target = total / count if count else limit
+    emitted = consumed = index = 0
+    current = []
+    size = fresh = 0
+    for piece in pieces:
+        cost = len(piece) + 1
+        if fresh:
+            left = count - emitted
+            close = size + cost > limit
+            if not close and left > 1:
+                # Closing here is safe once the remaining pieces fit in the other chunks
+                close = total_pieces - index <= fits[left - 1] and size + cost / 2 > target
+            if close:
+                yield current
+                emitted += 1
+                current, size = _overlap_tail(current, overlap_chars)
+                while current and size + cost > limit:
+                    size -= len(current.pop(0)) + 1
+                fresh = 0
+                if plan is not None:
+                    target = size + (total - consumed) / max(1, count - emitted)
+        current.append(piece)
+        size += cost
+        fresh += 1
+        consumed += cost
+        index += 1
+    if current:
+        yield current
+
+
+def _overlap_tail(lines, overlap_chars):
+    """Return the trailing lines (and their size) to repeat in the next chunk."""
+    tail = deque()
+    size = 0
+    for line in reversed(lines):
+        if size + len(line) + 1 > overlap_chars:
+            break
+        tail.appendleft(line)
+        size += len(line) + 1
+    return list(tail), size
+
+
+def _hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_signature(chunk):
+    """
+    Describe a chunk so it can be found again in a later version of the page.
+    Args:
+        chunk (str): A chunk produced by iter_chunks
+    Returns:
+        dict: hash of the chunk, hash of its first line, and its line count
+    """
+    return {"hash": _hash(chunk), "head": _hash(chunk.split("\n", 1)[0]), "lines": chunk.count("\n") + 1}
+
+
+def iter_chunks_reusing(text, previous, max_tokens=None, model="llama3"):
+    """
+    Chunk text while keeping chunks from a previous version of the same page.
+
+    Any run of lines that exactly matches a previous chunk (located by the
+    hash of its first line, then checked by the hash of the whole chunk) is
+    emitted as-is, so chunk boundaries do not shift when text is inserted
+    elsewhere. Only the lines between matches are chunked afresh.
+
+    Args:
+        text (str): Cleaned text, one block per line
+        previous (list): chunk_signature() dicts of the previous chunk set
+        max_tokens (int): Token budget per chunk (default: chunk_budget(model))
+        model (str): Model the chunks are for, used for the default budget
+    Yields:
+        tuple: (chunk, matching previous signature or None for a new chunk)
+    """
+    max_chars = (max_tokens or chunk_budget(model)) * CHARS_PER_TOKEN
+    by_head = {}
+    for signature in previous:
+        by_head.setdefault(signature["head"], []).append(signature)
+    if not by_head:
+        for chunk in _iter_packed(text, 0, len(text), max_chars, 0, True):
+            yield chunk, None
+        return
+
+    # Find the runs of new and reused lines, holding at most one chunk of lines
+    window = deque()
+    spans = _iter_line_spans(text)
+    pending_start = None
+    while True:
+        if not window:
+            span = next(spans, None)
+            if span is None:
+                break
+            window.append(span)
+        match = None
+        for signature in by_head.get(_hash(window[0][0]), ()):
+            while len(window) < signature["lines"]:
+                span = next(spans, None)
+                if span is None:
+                    break
+                window.append(span)
+            if len(window) < signature["lines"]:
+                continue
+            candidate = "\n".join(line for line, _, _ in islice(window, signature["lines"]))
+            if len(candidate) <= max_chars and _hash(candidate) == signature["hash"]:
+                match = signature
+                break
+        if match is None:
+            _, start, _ = window.popleft()
+            if pending_start is None:
+                pending_start = start
+            continue
+        if pending_start is not None:
+            # Only the lines between matches are chunked afresh
+            for chunk in _iter_packed(text, pending_start, window[0][1], max_chars, 0, True):
+                yield chunk, None
+            pending_start = None
+        yield candidate, match
+        for _ in range(match["lines"]):
+            window.popleft()
+
+    if pending_start is not None:
+        for chunk in _iter_packed(text, pending_start, len(text), max_chars, 0, True):
+            yield chunk, None
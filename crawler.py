@@ -0,0 +1,300 @@
+"""
+Link-following crawler built on scrape_website.
+
+Pages are fetched concurrently from a prioritized frontier (shallowest
+first by default). Each page is cleaned and its links extracted in one
+parse; new links are normalized, checked against a compact seen-set and
+queued while the other workers keep fetching.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from urllib import robotparser
+import hashlib
+import heapq
+import itertools
+import logging
+import math
+import re
+import threading
+import time
+
+from scrape import scrape_website, html_to_text_and_links
+from http_fetch import get_session
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Query parameters that only track the visitor and never change the page
+_TRACKING_PARAMS = re.compile(r"^(utm_\w+|gclid|fbclid|mc_cid|mc_eid|ref|ref_src)$", re.IGNORECASE)
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Links to these never lead to HTML pages
+_SKIPPED_EXTENSIONS = (
+    ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".pdf", ".zip", ".gz", ".mp3", ".mp4",
+    ".avi", ".mov", ".css", ".js", ".xml", ".json", ".woff", ".woff2", ".ttf", ".exe", ".dmg",
+)
+
+
+def normalize_url(url):
+    """
+    Normalize a URL so trivially different spellings are crawled once.
+
+    Lower-cases the scheme and host, drops default ports, fragments and
+    tracking parameters, sorts the query and gives an empty path "/".
+
+    Args:
+        url (str): Absolute URL
+    Returns:
+        str: Normalized URL
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if not _TRACKING_PARAMS.match(key)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def _digest(url):
+    """Return a 64-bit integer hash of a URL."""
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashedSeenSet:
+    """
+    Exact seen-set that stores a 64-bit hash per URL instead of the URL
+    itself (a few dozen bytes per entry rather than the full string).
+    Collisions are possible but vanishingly rare below billions of URLs.
+    """
+
+    def __init__(self):
+        self._hashes = set()
+
+    def add(self, url):
+        """
+        Add a URL.
+        Args:
+            url (str): Normalized URL
+        Returns:
+            bool: True if the URL had not been seen before
+        """
+        digest = _digest(url)
+        if digest in self._hashes:
+            return False
+        self._hashes.add(digest)
+        return True
+
+    def __contains__(self, url):
+        return _digest(url) in self._hashes
+
+    def __len__(self):
+        return len(self._hashes)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter seen-set for very large crawls. Uses a bit
+    array sized for ``capacity`` URLs at ``error_rate`` false positives;
+    a false positive means a new URL is wrongly skipped, never crawled twice.
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=0.001):
+        """
+        Args:
+            capacity (int): Expected number of URLs
+            error_rate (float): Acceptable false-positive rate at that capacity
+        """
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._count = 0
+
+    def _positions(self, url):
+        # Double hashing: k positions from two independent 64-bit hashes
+        digest = hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, url):
+        """
+        Add a URL.
+        Args:
+            url (str): Normalized URL
+        Returns:
+            bool: True if the URL had (probably) not been seen before
+        """
+        new = False
+        for position in self._positions(url):
+            byte, bit = divmod(position, 8)
+            if not self._bits[byte] & (1 << bit):
+                self._bits[byte] |= 1 << bit
+                new = True
+        self._count += new
+        return new
+
+    def __contains__(self, url):
+        return all(self._bits[position // 8] & (1 << (position % 8)) for position in self._positions(url))
+
+    def __len__(self):
+        return self._count
+
+
+class _RobotsCache:
+    """robots.txt rules per host, fetched once each."""
+
+    def __init__(self, user_agent="*"):
+        self.user_agent = user_agent
+        self._parsers = {}
+        self._lock = threading.Lock()
+        self._host_locks = {}
+
+    def allowed(self, url):
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        parser = self._parsers.get(origin)
+        if parser is None:
+            with self._lock:
+                host_lock = self._host_locks.setdefault(origin, threading.Lock())
+            # Workers on the same host wait for the first one's fetch instead of repeating it
+            with host_lock:
+                parser = self._parsers.get(origin)
+                if parser is None:
+                    parser = self._fetch(origin)
+                    self._parsers[origin] = parser
+        return parser.can_fetch(self.user_agent, url)
+
+    @staticmethod
+    def _fetch(origin):
+        parser = robotparser.RobotFileParser()
+        try:
+            response = get_session().get(f"{origin}/robots.txt", timeout=10)
+            parser.parse(response.text.splitlines() if response.status_code == 200 else [])
+        except Exception as e:
+            logger.info(f"Could not read robots.txt for {origin}: {str(e)}")
+            parser.parse([])
+        return parser
+
+
+def _fetch_page(url, fetch, robots, scrape_options):
+    """Fetch a page, then clean it and extract its links in one parse."""
+    started = time.monotonic()
+    if robots is not None and not robots.allowed(url):
+        return None, None, [], "disallowed", 0.0
+    html = fetch(url) if fetch is not None else scrape_website(url, **scrape_options)
+    content, links = html_to_text_and_links(html, url) if html else ("", [])
+    return html, content, links, "ok" if html else "empty", round(time.monotonic() - started, 3)
+
+
+def crawl(start_urls, max_pages=100, max_depth=2, same_domain=True, concurrency=4, per_host_limit=2,
+          min_delay=0.5, allow=None, priority=None, seen=None, respect_robots=True, fetch=None,
+          **scrape_options):
+    """
+    Crawl outward from one or more start URLs, yielding pages as they finish.
+
+    The frontier is a priority queue (lowest ``priority(url, depth)`` first;
+    by default breadth-first). Workers are refilled from it as soon as a
+    page finishes, skipping hosts that are at ``per_host_limit`` or still
+    inside their ``min_delay`` so other hosts keep the workers busy.
+
+    Args:
+        start_urls (str or list): Where to start
+        max_pages (int): Stop after this many pages have been fetched
+        max_depth (int): Follow links at most this many hops from a start URL
+        same_domain (bool): Only follow links on the start URLs' hosts
+        concurrency (int): Pages fetched at once
+        per_host_limit (int): Maximum concurrent requests per host
+        min_delay (float): Minimum seconds between request starts on one host
+        allow (str or callable): Regex (or url -> bool) a link must match to be followed
+        priority (callable): (url, depth) -> number, lower is crawled first
+        seen (HashedSeenSet or BloomFilter): Seen-set to use (default: HashedSeenSet)
+        respect_robots (bool): Skip URLs disallowed by robots.txt
+        fetch (callable): Function url -> HTML (default: scrape_website)
+        **scrape_options: Extra keyword arguments for scrape_website
+    Yields:
+        dict: {url, depth, html, content, links, status, elapsed} in completion order
+    """
+    if isinstance(start_urls, str):
+        start_urls = [start_urls]
+    if isinstance(allow, str):
+        allow = re.compile(allow).search
+    priority = priority or (lambda url, depth: depth)
+    seen = seen if seen is not None else HashedSeenSet()
+    robots = _RobotsCache() if respect_robots else None
+    domains = {urlsplit(normalize_url(url)).hostname for url in start_urls}
+
+    # One priority heap per host, so a busy or cooling host never blocks the others
+    frontier = {}
+    order = itertools.count()
+
+    def enqueue(url, depth):
+        url = normalize_url(url)
+        host = urlsplit(url).hostname
+        if urlsplit(url).path.lower().endswith(_SKIPPED_EXTENSIONS):
+            return
+        if same_domain and host not in domains:
+            return
+        if depth and allow is not None and not allow(url):
+            return
+        if seen.add(url):
+            heapq.heappush(frontier.setdefault(host, []), (priority(url, depth), next(order), url, depth))
+
+    for url in start_urls:
+        enqueue(url, 0)
+
+    in_flight = {}
+    host_busy = {}
+    host_next_start = {}
+    dispatched = 0
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while in_flight or (dispatched < max_pages and any(frontier.values())):
+            # Refill the workers with the best URL among hosts that may take another request
+            now = time.monotonic()
+            next_wakeup = None
+            while len(in_flight) < concurrency and dispatched < max_pages:
+                best = None
+                for host, heap in frontier.items():
+                    if not heap or host_busy.get(host, 0) >= per_host_limit:
+                        continue
+                    if host_next_start.get(host, 0) > now:
+                        wakeup = host_next_start[host] - now
+                        next_wakeup = wakeup if next_wakeup is None else min(next_wakeup, wakeup)
+                        continue
+                    if best is None or heap[0] < frontier[best][0]:
+                        best = host
+                if best is None:
+                    break
+                _, _, url, depth = heapq.heappop(frontier[best])
+                host_busy[best] = host_busy.get(best, 0) + 1
+                host_next_start[best] = now + min_delay
+                in_flight[executor.submit(_fetch_page, url, fetch, robots, scrape_options)] = (url, depth, best)
+                dispatched += 1
+
+            if not in_flight:
+                # Every queued host is cooling down
+                time.sleep(next_wakeup or 0)
+                continue
+
+            done, _ = wait(in_flight, timeout=next_wakeup, return_when=FIRST_COMPLETED)
+            for future in done:
+                url, depth, host = in_flight.pop(future)
+                host_busy[host] -= 1
+                try:
+                    html, content, links, status, elapsed = future.result()
+                except Exception as e:
+                    logger.error(f"Error crawling {url}: {str(e)}")
+                    html, content, links, status, elapsed = None, None, [], f"error: {str(e)}", None
+                if status == "disallowed":
+                    # robots.txt skips do not count against max_pages
+                    dispatched -= 1
+                    logger.info(f"Skipping {url}: disallowed by robots.txt")
+                if depth < max_depth:
+                    for link in links:
+                        enqueue(link, depth + 1)
+                yield {"url": url, "depth": depth, "html": html, "content": content, "links": links,
+                       "status": status, "elapsed": elapsed}
+
+    left = sum(len(heap) for heap in frontier.values())
+    logger.info(f"Crawl finished: {dispatched} pages fetched, {len(seen)} URLs seen, {left} left in frontier")
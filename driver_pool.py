@@ -0,0 +1,297 @@
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
+from contextlib import contextmanager
+from functools import lru_cache
+import atexit
+import threading
+import logging
+import os
+
+# Try to import webdriver_manager for automatic driver management
+try:
+    from webdriver_manager.chrome import ChromeDriverManager
+    USE_WEBDRIVER_MANAGER = True
+except ImportError:
+    USE_WEBDRIVER_MANAGER = False
+    logging.warning("webdriver-manager not installed. Using system ChromeDriver.")
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36"
+
+# Pool defaults, overridable from the environment
+DEFAULT_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "2"))
+DEFAULT_MAX_PAGES = int(os.getenv("DRIVER_MAX_PAGES", "50"))
+
+# Script used to wipe the current tab's session storage (CDP does not reach it)
+_CLEAR_STORAGE_JS = """
+try { window.sessionStorage && window.sessionStorage.clear(); } catch (e) {}
+"""
+
+
+@lru_cache(maxsize=1)
+def resolve_driver_path():
+    """
+    Resolve the ChromeDriver binary path once per process.
+    Returns:
+        str: Path to the ChromeDriver binary, or None to use the system driver
+    """
+    if not USE_WEBDRIVER_MANAGER:
+        return None
+    try:
+        # Automatically download and use the correct ChromeDriver
+        return ChromeDriverManager().install()
+    except Exception as e:
+        logger.error(f"Error resolving ChromeDriver with webdriver-manager: {str(e)}")
+        return None
+
+
+def build_chrome_options(proxy_server=None):
+    """
+    Build the headless Chrome options used for scraping.
+    Args:
+        proxy_server (str): Optional proxy server address
+    Returns:
+        Options: Configured Chrome options
+    """
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument(f"--user-agent={USER_AGENT}")
+
+    if proxy_server:
+        options.add_argument(f"--proxy-server={proxy_server}")
+
+    # Network events feed the resource-blocking stats (see resource_blocking)
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+    return options
+
+
+def create_driver(options):
+    """
+    Start a new Chrome WebDriver.
+    Args:
+        options (Options): Chrome options to launch with
+    Returns:
+        WebDriver: A running Chrome driver
+    """
+    driver_path = resolve_driver_path()
+    if driver_path:
+        driver = webdriver.Chrome(service=Service(driver_path), options=options)
+    else:
+        # Use system ChromeDriver or one in current directory
+        driver = webdriver.Chrome(options=options)
+
+    # Set page load timeout
+    driver.set_page_load_timeout(30)
+    return driver
+
+
+class _PooledDriver:
+    """A WebDriver together with its pool bookkeeping."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+
+class DriverPool:
+    """
+    Pool of warm headless Chrome drivers handed out one lease at a time.
+
+    Drivers are started lazily up to ``size``, reset between leases and
+    recycled after ``max_pages`` leases or when they stop responding.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, max_pages=DEFAULT_MAX_PAGES, options_factory=None):
+        """
+        Args:
+            size (int): Maximum number of concurrently running drivers
+            max_pages (int): Pages served by a driver before it is recycled
+            options_factory (callable): Returns the Options for a new driver
+        """
+        if size < 1:
+            raise ValueError("Driver pool size must be at least 1")
+        self.size = size
+        self.max_pages = max_pages
+        self.options_factory = options_factory or build_chrome_options
+        self._idle = []
+        self._running = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout=None):
+        """
+        Take a driver out of the pool, starting one if the pool has room.
+        Args:
+            timeout (float): Seconds to wait for a free driver (None waits forever)
+        Returns:
+            _PooledDriver: The leased driver record
+        """
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Driver pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._running < self.size:
+                    self._running += 1
+                    break
+                if not self._cond.wait(timeout):
+                    raise TimeoutError("Timed out waiting for a free driver")
+
+        # Start the browser outside the lock so other leases are not blocked
+        try:
+            return _PooledDriver(create_driver(self.options_factory()))
+        except Exception:
+            with self._cond:
+                self._running -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, pooled, broken=False):
+        """
+        Return a leased driver to the pool, recycling it if needed.
+        Args:
+            pooled (_PooledDriver): The driver record returned by acquire
+            broken (bool): Whether the lease ended with a driver failure
+        """
+        pooled.pages += 1
+        recycle = broken or self._closed or pooled.pages >= self.max_pages
+        if not recycle:
+            recycle = not self._reset(pooled.driver)
+
+        if recycle:
+            self._quit(pooled.driver)
+            with self._cond:
+                self._running -= 1
+                self._cond.notify()
+            return
+
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """
+        Context manager yielding a WebDriver for the duration of one page.
+        Args:
+            timeout (float): Seconds to wait for a free driver
+        Yields:
+            WebDriver: A clean, warm Chrome driver
+        """
+        pooled = self.acquire(timeout)
+        broken = False
+        try:
+            yield pooled.driver
+        except Exception:
+            broken = not self._is_alive(pooled.driver)
+            raise
+        finally:
+            self.release(pooled, broken=broken)
+
+    def ensure_capacity(self, size):
+        """
+        Grow the pool so at least ``size`` drivers may run at once.
+        Args:
+            size (int): Minimum number of concurrently running drivers
+        """
+        with self._cond:
+            if size > self.size:
+                self.size = size
+                self._cond.notify_all()
+
+    def close(self):
+        """Quit every idle driver and refuse further leases."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._running -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._quit(pooled.driver)
+
+    def _reset(self, driver):
+        """Clear cookies, storage and extra tabs. Returns False if the driver is unusable."""
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            clear_browser_state(driver)
+            driver.get("about:blank")
+            return True
+        except Exception as e:
+            logger.warning(f"Driver reset failed, recycling: {str(e)}")
+            return False
+
+    @staticmethod
+    def _is_alive(driver):
+        try:
+            driver.current_window_handle
+            return True
+        except WebDriverException:
+            return False
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting driver: {str(e)}")
+
+
+def clear_browser_state(driver, origin="*"):
+    """
+    Wipe cookies and storage so the next page starts from a clean profile.
+    By default every origin the browser has visited is cleared, not only
+    the current page's. The current tab's sessionStorage is always cleared.
+    Args:
+        driver (webdriver.Chrome): Driver to clear
+        origin (str): Origin to clear (e.g. "https://example.com"), "*" for
+            all of them, or None for the current tab's sessionStorage only
+    """
+    driver.execute_script(_CLEAR_STORAGE_JS)
+    if origin == "*":
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    if origin is not None:
+        driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+
+
+# One pool per distinct launch configuration (e.g. with/without proxy)
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_driver_pool(proxy_server=None):
+    """
+    Get the shared driver pool for a launch configuration.
+    Args:
+        proxy_server (str): Optional proxy server the drivers launch with
+    Returns:
+        DriverPool: The process-wide pool for that configuration
+    """
+    with _pools_lock:
+        pool = _pools.get(proxy_server)
+        if pool is None:
+            pool = DriverPool(options_factory=lambda: build_chrome_options(proxy_server))
+            _pools[proxy_server] = pool
+        return pool
+
+
+@atexit.register
+def close_all_pools():
+    """Shut down every shared driver pool."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
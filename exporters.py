@@ -0,0 +1,201 @@
+"""
+Streaming writers for bulk results.
+
+Records are written as they arrive instead of being collected into one
+list: JSONL writes (and flushes) one line per record, while CSV and
+Parquet buffer at most ``buffer_rows`` records before writing them out as
+a block / row group. Memory stays bounded however many pages are scraped,
+and a crash loses at most one buffer.
+"""
+import csv
+import importlib.util
+import json
+import logging
+import os
+
+# pyarrow is optional; it is only needed (and only imported) for Parquet output
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+FORMATS = ("jsonl", "csv", "parquet")
+
+
+def _flatten(record):
+    """Encode nested values (dicts, lists) as JSON so every column is a scalar."""
+    return {key: json.dumps(value) if isinstance(value, (dict, list, tuple)) else value
+            for key, value in record.items()}
+
+
+class RecordWriter:
+    """
+    Base class for streaming writers. Use as a context manager, or call
+    close() when done; close() flushes whatever is still buffered.
+    """
+
+    def __init__(self, path, buffer_rows=1000):
+        """
+        Args:
+            path (str): Output file
+            buffer_rows (int): Records held in memory before they are written
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.buffer_rows = max(1, buffer_rows)
+        self.count = 0
+        self._buffer = []
+
+    def write(self, record):
+        """
+        Add one record, writing out the buffer once it is full.
+        Args:
+            record (dict): Record to write
+        """
+        self._buffer.append(record)
+        self.count += 1
+        if len(self._buffer) >= self.buffer_rows:
+            self.flush()
+
+    def write_many(self, records):
+        """
+        Add every record from an iterable.
+        Args:
+            records (iterable): Records to write
+        Returns:
+            int: Total number of records written so far
+        """
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def flush(self):
+        """Write out the buffered records."""
+        if self._buffer:
+            self._write_rows(self._buffer)
+            self._buffer = []
+
+    def _write_rows(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        """Flush the buffer and close the file."""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class JSONLWriter(RecordWriter):
+    """Write one JSON object per line, flushed to disk after every record."""
+
+    def __init__(self, path, buffer_rows=1):
+        super().__init__(path, buffer_rows)
+        # Truncate like the CSV and Parquet writers, so a rerun replaces the old output
+        self._file = open(path, "w", encoding="utf-8")
+
+    def _write_rows(self, rows):
+        self._file.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        self._file.flush()
+
+    def close(self):
+        super().close()
+        self._file.close()
+
+
+class CSVWriter(RecordWriter):
+    """
+    Write CSV in blocks of ``buffer_rows`` records. Columns come from
+    ``fieldnames`` or the first record; keys not in them are dropped.
+    """
+
+    def __init__(self, path, buffer_rows=1000, fieldnames=None):
+        super().__init__(path, buffer_rows)
+        self.fieldnames = list(fieldnames) if fieldnames else None
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = None
+
+    def _write_rows(self, rows):
+        if self._writer is None:
+            self.fieldnames = self.fieldnames or list(rows[0].keys())
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction="ignore")
+            self._writer.writeheader()
+        self._writer.writerows(_flatten(row) for row in rows)
+        self._file.flush()
+
+    def close(self):
+        super().close()
+        self._file.close()
+
+
+class ParquetWriter(RecordWriter):
+    """
+    Write Parquet with one row group per ``buffer_rows`` records. The
+    schema is inferred from the first row group; later records are cast
+    to it (missing keys become nulls).
+    """
+
+    def __init__(self, path, buffer_rows=10000):
+        if not HAS_PYARROW:
+            raise ImportError("Parquet export requires pyarrow")
+        super().__init__(path, buffer_rows)
+        self._writer = None
+        self._schema = None
+
+    def _write_rows(self, rows):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        rows = [_flatten(row) for row in rows]
+        if self._writer is None:
+            inferred = pa.Table.from_pylist(rows).schema
+            # Columns that were all empty in the first group default to strings
+            self._schema = pa.schema([
+                field.with_type(pa.string()) if pa.types.is_null(field.type) else field for field in inferred
+            ])
+            self._writer = pq.ParquetWriter(self.path, self._schema)
+        self._writer.write_table(pa.Table.from_pylist(rows, schema=self._schema))
+
+    def close(self):
+        super().close()
+        if self._writer is not None:
+            self._writer.close()
+
+
+def open_writer(path, format=None, **options):
+    """
+    Open a streaming writer, choosing the format from the file extension.
+    Args:
+        path (str): Output file (.jsonl, .csv or .parquet)
+        format (str): Override the format ("jsonl", "csv" or "parquet")
+        **options: Extra keyword arguments for the writer (e.g. buffer_rows)
+    Returns:
+        RecordWriter: The writer
+    """
+    format = format or os.path.splitext(path)[1].lstrip(".").lower()
+    if format == "jsonl":
+        return JSONLWriter(path, **options)
+    if format == "csv":
+        return CSVWriter(path, **options)
+    if format == "parquet":
+        return ParquetWriter(path, **options)
+    raise ValueError(f"Unknown export format: {format} (expected one of {', '.join(FORMATS)})")
+
+
+def iter_jsonl(path):
+    """
+    Read records back from a JSONL file one at a time, skipping a truncated last line.
+    Args:
+        path (str): JSONL file
+    Yields:
+        dict: Records
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping unreadable line in {path}")
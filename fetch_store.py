@@ -0,0 +1,190 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = os.getenv("FETCH_STORE_PATH", "data/cache/fetch_meta.sqlite")
+
+
+def fingerprint(text):
+    """
+    Fingerprint cleaned page text.
+    Args:
+        text (str): Cleaned text
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class FetchStore:
+    """
+    Local SQLite store of per-URL fetch metadata (ETag, Last-Modified and
+    the fingerprint of the cleaned text), plus the last extraction result
+    per URL and description so unchanged pages can skip the LLM entirely,
+    and the last chunk set with per-chunk results so changed pages only
+    re-extract the chunks that changed.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        """
+        Args:
+            path (str): SQLite database file (":memory:" for a throwaway store)
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " url TEXT PRIMARY KEY,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " fingerprint TEXT,"
+                " fetched_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS extractions ("
+                " url TEXT NOT NULL,"
+                " description TEXT NOT NULL,"
+                " fingerprint TEXT NOT NULL,"
+                " result TEXT NOT NULL,"
+                " PRIMARY KEY (url, description))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                " url TEXT NOT NULL,"
+                " description TEXT NOT NULL,"
+                " position INTEGER NOT NULL,"
+                " hash TEXT NOT NULL,"
+                " head TEXT NOT NULL,"
+                " lines INTEGER NOT NULL,"
+                " result TEXT NOT NULL,"
+                " PRIMARY KEY (url, description, position))"
+            )
+
+    def get(self, url):
+        """
+        Get the stored metadata for a URL.
+        Args:
+            url (str): Page URL
+        Returns:
+            dict: etag, last_modified, fingerprint and fetched_at, or None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, fingerprint, fetched_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def update(self, url, etag=None, last_modified=None, fingerprint=None):
+        """
+        Record the validators and content fingerprint of a fetch.
+        Args:
+            url (str): Page URL
+            etag (str): ETag response header
+            last_modified (str): Last-Modified response header
+            fingerprint (str): Fingerprint of the cleaned text
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, fingerprint, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, fingerprint, time.time()),
+            )
+
+    def touch(self, url):
+        """Mark a URL as checked without changing its metadata."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+    def get_extraction(self, url, description, page_fingerprint):
+        """
+        Get the stored extraction for a URL and description, if the page has not changed.
+        Args:
+            url (str): Page URL
+            description (str): Extraction description
+            page_fingerprint (str): Current fingerprint of the page
+        Returns:
+            str: The stored result, or None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM extractions WHERE url = ? AND description = ? AND fingerprint = ?",
+                (url, description, page_fingerprint),
+            ).fetchone()
+        return row["result"] if row else None
+
+    def set_extraction(self, url, description, page_fingerprint, result):
+        """
+        Store the extraction result for a URL and description.
+        Args:
+            url (str): Page URL
+            description (str): Extraction description
+            page_fingerprint (str): Fingerprint of the page it was extracted from
+            result (str): Extraction result
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions (url, description, fingerprint, result) VALUES (?, ?, ?, ?)",
+                (url, description, page_fingerprint, result),
+            )
+
+    def get_chunks(self, url, description):
+        """
+        Get the chunk set last extracted for a URL and description.
+        Args:
+            url (str): Page URL
+            description (str): Extraction description
+        Returns:
+            list: Dicts with hash, head, lines and result, in page order
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT hash, head, lines, result FROM chunks WHERE url = ? AND description = ? ORDER BY position",
+                (url, description),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def set_chunks(self, url, description, chunks):
+        """
+        Replace the chunk set stored for a URL and description.
+        Args:
+            url (str): Page URL
+            description (str): Extraction description
+            chunks (list): Dicts with hash, head, lines and result, in page order
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunks WHERE url = ? AND description = ?", (url, description))
+            self._conn.executemany(
+                "INSERT INTO chunks (url, description, position, hash, head, lines, result)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(url, description, position, chunk["hash"], chunk["head"], chunk["lines"], chunk["result"])
+                 for position, chunk in enumerate(chunks)],
+            )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_fetch_store():
+    """
+    Get the process-wide fetch metadata store.
+    Returns:
+        FetchStore: The shared store
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = FetchStore()
+        return _store
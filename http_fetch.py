@@ -0,0 +1,175 @@
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urlparse
+import lxml.html
+import requests
+import threading
+import logging
+import re
+
+from driver_pool import USER_AGENT
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Pages with less visible text than this are assumed to be rendered client-side
+MIN_TEXT_CHARS = 200
+
+# Element ids used as mount points by common single-page-app frameworks
+_SPA_ROOT_IDS = ("root", "app", "__next", "__nuxt", "svelte")
+_JS_WARNING = re.compile(r"(enable|requires?|turn on)\s+javascript", re.IGNORECASE)
+
+_session = None
+_session_lock = threading.Lock()
+
+# Remembered fetch mode ("http" or "browser") per host
+_domain_modes = {}
+_domain_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Get the shared keep-alive HTTP session.
+    Returns:
+        requests.Session: Session with pooled connections and retries
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=16,
+                pool_maxsize=32,
+                max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504]),
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({
+                "User-Agent": USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.9",
+            })
+            _session = session
+        return _session
+
+
+def fetch_response(url, timeout=15, proxy_server=None, etag=None, last_modified=None):
+    """
+    Fetch a page over plain HTTP, optionally as a conditional GET.
+    Args:
+        url (str): The URL to fetch
+        timeout (float): Request timeout in seconds
+        proxy_server (str): Optional proxy server address
+        etag (str): ETag from a previous fetch (sent as If-None-Match)
+        last_modified (str): Last-Modified from a previous fetch (sent as If-Modified-Since)
+    Returns:
+        dict: status, html (None unless a usable HTML page), etag and
+            last_modified, or None if the request failed
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    proxies = {"http": proxy_server, "https": proxy_server} if proxy_server else None
+    try:
+        response = get_session().get(url, timeout=timeout, proxies=proxies, headers=headers)
+    except requests.RequestException as e:
+        logger.info(f"HTTP fetch failed for {url}: {str(e)}")
+        return None
+
+    html = None
+    content_type = response.headers.get("Content-Type", "")
+    if response.status_code == 200 and "html" in content_type.lower():
+        html = response.text
+    elif response.status_code != 304:
+        logger.info(f"HTTP fetch unusable for {url}: {response.status_code} {content_type}")
+
+    return {
+        "status": response.status_code,
+        "html": html,
+        "etag": response.headers.get("ETag", etag if response.status_code == 304 else None),
+        "last_modified": response.headers.get("Last-Modified", last_modified if response.status_code == 304 else None),
+    }
+
+
+def fetch_html(url, timeout=15, proxy_server=None):
+    """
+    Fetch a page over plain HTTP.
+    Args:
+        url (str): The URL to fetch
+        timeout (float): Request timeout in seconds
+        proxy_server (str): Optional proxy server address
+    Returns:
+        str: HTML content, or None if the response is not a usable HTML page
+    """
+    response = fetch_response(url, timeout=timeout, proxy_server=proxy_server)
+    return response["html"] if response else None
+
+
+def needs_javascript(html, min_text_chars=MIN_TEXT_CHARS):
+    """
+    Guess whether a page needs a browser to render its content.
+    Args:
+        html (str): HTML returned by a plain HTTP fetch
+        min_text_chars (int): Minimum visible text for a page to count as rendered
+    Returns:
+        tuple: (bool, str) whether JavaScript is needed and the reason
+    """
+    if not html or not html.strip():
+        return True, "empty response"
+
+    try:
+        tree = lxml.html.fromstring(html)
+    except Exception:
+        return True, "unparseable HTML"
+
+    for noscript in tree.iter("noscript"):
+        if _JS_WARNING.search(noscript.text_content() or ""):
+            return True, "noscript warning"
+
+    next_data = tree.find(".//script[@id='__NEXT_DATA__']")
+    for element in list(tree.iter("script", "style", "noscript", "template")):
+        element.drop_tree()
+    text_length = len(" ".join(tree.text_content().split()))
+
+    if text_length < min_text_chars:
+        return True, f"near-empty body ({text_length} chars)"
+
+    for root_id in _SPA_ROOT_IDS:
+        root = tree.find(f".//*[@id='{root_id}']")
+        if root is not None and len(" ".join(root.text_content().split())) < min_text_chars:
+            return True, f"empty #{root_id} app shell"
+
+    if next_data is not None and text_length < min_text_chars * 5:
+        return True, "__NEXT_DATA__ shell"
+
+    return False, "server-rendered"
+
+
+def _host_of(url):
+    """Return the lower-cased host of a URL."""
+    return (urlparse(url).hostname or "").lower()
+
+
+def get_domain_mode(url):
+    """
+    Get the remembered fetch mode for a URL's host.
+    Args:
+        url (str): Any URL on the host
+    Returns:
+        str: "http", "browser", or None if the host has not been probed
+    """
+    with _domain_lock:
+        return _domain_modes.get(_host_of(url))
+
+
+def remember_domain_mode(url, mode):
+    """
+    Remember which fetch mode works for a URL's host.
+    Args:
+        url (str): Any URL on the host
+        mode (str): "http" or "browser"
+    """
+    with _domain_lock:
+        _domain_modes[_host_of(url)] = mode
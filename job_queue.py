@@ -0,0 +1,293 @@
+"""
+Resumable, SQLite-backed job queue for large crawl batches.
+
+Each URL is a job that moves through the pipeline stages:
+
+    pending -> fetching -> fetched -> cleaned -> extracted
+                                   \\-> failed (after max_attempts)
+
+A worker claims jobs under a lease. If the worker dies, the lease
+expires and another worker picks the job up at the last completed stage,
+so fetched HTML and cleaned text are never recomputed. Claims run in an
+IMMEDIATE transaction, so several worker processes on one machine can
+share the same database.
+"""
+import logging
+import os
+import socket
+import sqlite3
+import time
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "data/jobs.sqlite")
+DEFAULT_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "600"))
+DEFAULT_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+STATES = ("pending", "fetching", "fetched", "cleaned", "extracted", "failed")
+
+# Jobs with work left to do
+_CLAIMABLE = "(state IN ('pending', 'fetching', 'fetched') OR (state = 'cleaned' AND description IS NOT NULL))"
+
+# Columns stored with each stage
+_PAYLOADS = {"fetched": "html", "cleaned": "content", "extracted": "parsed"}
+
+
+def default_worker_id():
+    """Return an id unique to this process on this machine."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue:
+    """
+    Job queue with per-URL states, leases with timeouts and retry counts.
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH, lease_seconds=DEFAULT_LEASE_SECONDS,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """
+        Args:
+            path (str): SQLite database file
+            lease_seconds (float): How long a claimed job stays reserved without progress
+            max_attempts (int): Claims allowed per job before it is marked failed
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # Autocommit mode, so claims can open their own IMMEDIATE transaction
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " batch TEXT NOT NULL,"
+            " url TEXT NOT NULL,"
+            " description TEXT,"
+            " state TEXT NOT NULL DEFAULT 'pending',"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " lease_owner TEXT,"
+            " lease_expires REAL,"
+            " error TEXT,"
+            " html TEXT,"
+            " content TEXT,"
+            " parsed TEXT,"
+            " updated_at REAL NOT NULL,"
+            " UNIQUE (batch, url))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, lease_expires)")
+
+    def add(self, urls, batch="default", parse_description=None):
+        """
+        Queue URLs. URLs already queued in the batch are left as they are,
+        so re-running the same command after a crash does not reset progress.
+        Args:
+            urls (iterable): URLs to queue
+            batch (str): Batch name
+            parse_description (str): What to extract with the LLM (None stops after cleaning)
+        Returns:
+            int: Number of newly queued URLs
+        """
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO jobs (batch, url, description, updated_at) VALUES (?, ?, ?, ?)",
+                ((batch, url, parse_description, now) for url in urls),
+            )
+            added = self._conn.total_changes - before
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def claim(self, worker_id=None, limit=1, batch=None):
+        """
+        Lease up to ``limit`` jobs that still have work to do.
+
+        Claimable jobs are pending ones, fetched ones, cleaned ones with a
+        description, and any job whose previous lease expired. Each claim
+        counts as an attempt; a job claimed more than max_attempts times is
+        marked failed instead of being handed out again.
+
+        Args:
+            worker_id (str): Id of the claiming worker (default: host:pid)
+            limit (int): Maximum number of jobs to claim
+            batch (str): Only claim jobs from this batch
+        Returns:
+            list: Job dicts (id, batch, url, description, state, attempts, html, content)
+        """
+        worker_id = worker_id or default_worker_id()
+        now = time.time()
+        batch_filter = " AND batch = ?" if batch is not None else ""
+        params = [now] + ([batch] if batch is not None else [])
+
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute(
+                "UPDATE jobs SET state = 'failed', lease_owner = NULL, lease_expires = NULL, updated_at = ?,"
+                " error = COALESCE(error, 'lease expired') || ' (gave up after ' || attempts || ' attempts)'"
+                " WHERE " + _CLAIMABLE + " AND attempts >= ?"
+                " AND (lease_expires IS NULL OR lease_expires < ?)" + batch_filter,
+                [now, self.max_attempts] + params,
+            )
+            rows = self._conn.execute(
+                "SELECT id, batch, url, description, state, attempts, html, content FROM jobs"
+                " WHERE (lease_expires IS NULL OR lease_expires < ?)"
+                " AND " + _CLAIMABLE + batch_filter + " ORDER BY id LIMIT ?",
+                params + [limit],
+            ).fetchall()
+            expires = now + self.lease_seconds
+            self._conn.executemany(
+                "UPDATE jobs SET lease_owner = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ?,"
+                " state = CASE WHEN state = 'pending' THEN 'fetching' ELSE state END WHERE id = ?",
+                [(worker_id, expires, now, row["id"]) for row in rows],
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+        jobs = []
+        for row in rows:
+            job = dict(row)
+            job["attempts"] += 1
+            if job["state"] == "pending":
+                job["state"] = "fetching"
+            jobs.append(job)
+        return jobs
+
+    def advance(self, job_id, worker_id, state, payload=None):
+        """
+        Record that a leased job completed a stage, and renew its lease.
+        Args:
+            job_id (int): Job id
+            worker_id (str): Worker holding the lease
+            state (str): Stage just completed ("fetched", "cleaned" or "extracted")
+            payload (str): The stage's output (HTML, cleaned text or extraction result)
+        Returns:
+            bool: False if the worker no longer holds the lease (the job was taken over)
+        """
+        if state not in _PAYLOADS:
+            raise ValueError(f"Cannot advance a job to {state}")
+        now = time.time()
+        # Finished jobs (extracted, or cleaned without a description) release their lease
+        expires = now + self.lease_seconds
+        cursor = self._conn.execute(
+            f"UPDATE jobs SET state = ?, {_PAYLOADS[state]} = ?, error = NULL, updated_at = ?,"
+            " lease_expires = CASE WHEN ? = 'extracted' OR (? = 'cleaned' AND description IS NULL) THEN NULL ELSE ? END,"
+            " lease_owner = CASE WHEN ? = 'extracted' OR (? = 'cleaned' AND description IS NULL) THEN NULL ELSE lease_owner END"
+            " WHERE id = ? AND lease_owner = ?",
+            (state, payload, now, state, state, expires, state, state, job_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def renew(self, job_id, worker_id):
+        """
+        Extend a leased job's lease while a long stage is still running.
+        Args:
+            job_id (int): Job id
+            worker_id (str): Worker holding the lease
+        Returns:
+            bool: False if the worker no longer holds the lease (the job was taken over)
+        """
+        cursor = self._conn.execute(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ?",
+            (time.time() + self.lease_seconds, job_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id, worker_id, error, retry_delay=30):
+        """
+        Record a failed attempt. The job keeps its last completed stage and
+        becomes claimable again after ``retry_delay`` seconds, or is marked
+        failed if it has used up its attempts.
+        Args:
+            job_id (int): Job id
+            worker_id (str): Worker holding the lease
+            error (str): What went wrong
+            retry_delay (float): Seconds before the job may be retried
+        Returns:
+            bool: False if the worker no longer holds the lease
+        """
+        now = time.time()
+        cursor = self._conn.execute(
+            "UPDATE jobs SET error = ?, updated_at = ?, lease_owner = NULL,"
+            " state = CASE WHEN attempts >= ? THEN 'failed' WHEN state = 'fetching' THEN 'pending' ELSE state END,"
+            " lease_expires = CASE WHEN attempts >= ? THEN NULL ELSE ? END"
+            " WHERE id = ? AND lease_owner = ?",
+            (error, now, self.max_attempts, self.max_attempts, now + retry_delay, job_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def release(self, job_id, worker_id):
+        """Give a leased job back without counting the attempt (e.g. on shutdown)."""
+        self._conn.execute(
+            "UPDATE jobs SET lease_owner = NULL, lease_expires = NULL, attempts = MAX(attempts - 1, 0),"
+            " state = CASE WHEN state = 'fetching' THEN 'pending' ELSE state END, updated_at = ?"
+            " WHERE id = ? AND lease_owner = ?",
+            (time.time(), job_id, worker_id),
+        )
+
+    def retry_failed(self, batch=None):
+        """
+        Make failed jobs claimable again, with fresh attempt counts.
+        Args:
+            batch (str): Only retry jobs from this batch
+        Returns:
+            int: Number of jobs reset
+        """
+        batch_filter = " AND batch = ?" if batch is not None else ""
+        cursor = self._conn.execute(
+            "UPDATE jobs SET attempts = 0, error = NULL, updated_at = ?,"
+            " state = CASE WHEN parsed IS NOT NULL THEN 'extracted' WHEN content IS NOT NULL THEN 'cleaned'"
+            " WHEN html IS NOT NULL THEN 'fetched' ELSE 'pending' END"
+            " WHERE state = 'failed'" + batch_filter,
+            [time.time()] + ([batch] if batch is not None else []),
+        )
+        return cursor.rowcount
+
+    def counts(self, batch=None):
+        """
+        Count jobs per state.
+        Args:
+            batch (str): Only count jobs from this batch
+        Returns:
+            dict: {state: count} for every state
+        """
+        batch_filter = " WHERE batch = ?" if batch is not None else ""
+        rows = self._conn.execute(
+            "SELECT state, COUNT(*) FROM jobs" + batch_filter + " GROUP BY state",
+            [batch] if batch is not None else [],
+        ).fetchall()
+        counts = dict.fromkeys(STATES, 0)
+        counts.update({state: count for state, count in rows})
+        return counts
+
+    def results(self, batch=None):
+        """
+        Iterate over finished jobs.
+        Args:
+            batch (str): Only return jobs from this batch
+        Yields:
+            dict: url, state, content, parsed and error of each extracted,
+                cleaned (without a description) or failed job
+        """
+        batch_filter = " AND batch = ?" if batch is not None else ""
+        cursor = self._conn.execute(
+            "SELECT url, state, content, parsed, error FROM jobs"
+            " WHERE (state IN ('extracted', 'failed') OR (state = 'cleaned' AND description IS NULL))"
+            + batch_filter + " ORDER BY id",
+            [batch] if batch is not None else [],
+        )
+        for row in cursor:
+            yield dict(row)
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
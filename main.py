@@ -1,12 +1,16 @@
 import streamlit as st
 import os
+import json
+import time
+from collections import OrderedDict
 from datetime import datetime
 from dotenv import load_dotenv
 
 # Import local modules
 try:
-    from scrape import scrape_website, extract_body_content, clean_body_content, split_dom_content
-    from parse import parse_with_ollama
+    from pipeline import iter_page_events
+    from chunking import iter_chunks
+    from parse import parse_multiple_with_ollama
     from utils import setup_logging, save_data
 except ImportError as e:
     st.error(f"Error importing modules: {e}")
@@ -16,6 +20,10 @@ except ImportError as e:
 setup_logging()
 load_dotenv()
 
+# Scraped pages are kept per session so reruns and follow-up extractions reuse them
+PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", "1800"))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
 # Page config
 st.set_page_config(
     page_title="IntelliScraper",
@@ -28,66 +36,209 @@ st.title("🧠 IntelliScraper")
 st.markdown("**AI-Powered Web Scraping Made Simple**")
 st.divider()
 
+def get_cached_page(url):
+    """
+    Get a scraped page from the session cache, dropping it if it has expired.
+    Args:
+        url (str): Page URL
+    Returns:
+        dict: Page entry (html, content, chunks, timestamp), or None
+    """
+    pages = st.session_state.setdefault("pages", OrderedDict())
+    page = pages.get(url)
+    if page is None:
+        return None
+    if time.time() - page["fetched_at"] > PAGE_CACHE_TTL:
+        del pages[url]
+        return None
+    pages.move_to_end(url)
+    return page
+
+
+def cache_page(url, html, content):
+    """
+    Store a scraped page in the session cache, evicting the least recently
+    used pages once the cache exceeds its memory cap.
+    Args:
+        url (str): Page URL
+        html (str): Raw HTML
+        content (str): Cleaned text
+    Returns:
+        dict: The cached page entry
+    """
+    pages = st.session_state.setdefault("pages", OrderedDict())
+    page = {
+        "html": html,
+        "content": content,
+        "chunks": list(iter_chunks(content)),
+        "timestamp": datetime.now().strftime("%Y%m%d_%H%M%S"),
+        "fetched_at": time.time(),
+        "size": len(html or "") + 2 * len(content),
+    }
+    pages[url] = page
+    pages.move_to_end(url)
+    while len(pages) > 1 and sum(p["size"] for p in pages.values()) > PAGE_CACHE_MAX_BYTES:
+        pages.popitem(last=False)
+    return page
+
+
+def scrape_page(url):
+    """
+    Scrape and clean a page, showing stage timings as they happen.
+    Args:
+        url (str): Page URL
+    Returns:
+        dict: The cached page entry, or None if scraping failed
+    """
+    html = cleaned_content = None
+    with st.status("⏳ Scraping website...", expanded=True) as status:
+        for event in iter_page_events(url):
+            if event["event"] == "fetch_done":
+                html = event["html"]
+                st.write(f"🌐 Fetched via {event['mode'] or 'browser'} in {event['elapsed']:.2f}s")
+            elif event["event"] == "clean_done":
+                cleaned_content = event["content"]
+                st.write(f"🧹 Cleaned {event['chars']:,} characters in {event['elapsed']:.2f}s "
+                         f"({event['reduction']['reduction']:.0%} boilerplate removed)")
+            elif event["event"] == "error":
+                status.update(label="❌ Scraping failed", state="error")
+
+        if cleaned_content is None:
+            return None
+        status.update(label="✅ Website scraped successfully!", state="complete", expanded=False)
+
+    page = cache_page(url, html, cleaned_content)
+
+    # Save data
+    save_data(cleaned_content, f"scraped_{page['timestamp']}.txt", folder="data/raw_data", url=url)
+    return page
+
+
+def render_multi_extraction(page, queries):
+    """
+    Answer several extraction questions in one pass over the cached chunks.
+    Args:
+        page (dict): Cached page entry
+        queries (list): What to extract, one description per item
+    """
+    parse_stats = {}
+    with st.spinner(f"🔍 Answering {len(queries)} questions..."):
+        results = parse_multiple_with_ollama(page["chunks"], queries, stats=parse_stats)
+    if parse_stats.get("relevance", {}).get("skipped"):
+        st.caption(f"⚡ Skipped {parse_stats['relevance']['skipped']} irrelevant chunks")
+
+    # Save parsed data
+    save_data(json.dumps(results, indent=4), f"parsed_{page['timestamp']}.json", folder="data/processed_data")
+
+    st.success("✅ Extraction complete!")
+    st.markdown("### 📊 Results")
+    for query, result in results.items():
+        st.markdown(f"**{query}**")
+        st.write(result or "_No matching information found._")
+
+
+def render_extraction(url, page, parse_query):
+    """
+    Run the extraction and render partial results as chunks stream in.
+    Args:
+        url (str): Scraped URL
+        page (dict): Cached page entry
+        parse_query (str): What to extract
+    """
+    progress = st.progress(0.0, text="🔍 Analyzing content...")
+    st.markdown("### 📊 Results")
+    result_area = st.empty()
+
+    partials = {}
+    total_chunks = 1
+    completed = 0
+    last_render = 0.0
+    for event in iter_page_events(url, parse_query, chunks=page["chunks"]):
+        kind = event["event"]
+        if kind == "chunks_ready":
+            total_chunks = max(1, event["count"])
+            if event["skipped"]:
+                st.caption(f"⚡ Skipped {event['skipped']} irrelevant chunks")
+        elif kind == "token":
+            partials[event["index"]] = partials.get(event["index"], "") + event["text"]
+        elif kind == "reset":
+            partials[event["index"]] = ""
+        elif kind == "chunk":
+            partials[event["index"]] = event["result"]
+            completed += 1
+            progress.progress(completed / total_chunks, text=f"🔍 Analyzed {completed}/{total_chunks} chunks")
+        elif kind == "done":
+            timings = event["timings"]
+            parsed_result = event["parsed"] or ""
+
+            # Save parsed data
+            save_data(parsed_result, f"parsed_{page['timestamp']}.txt", folder="data/processed_data", url=url)
+
+            result_area.write(parsed_result)
+            progress.progress(1.0, text="✅ Extraction complete!")
+            first = timings.get("first_token", timings.get("first_chunk"))
+            if first is not None:
+                st.caption(f"⏱️ First output after {first:.2f}s · total {timings['total']:.2f}s")
+            return
+
+        # Re-render partial results at most ~10 times per second
+        if kind in ("token", "chunk") and time.monotonic() - last_render > 0.1:
+            result_area.write("\n".join(partials[i] for i in sorted(partials) if partials[i]))
+            last_render = time.monotonic()
+
+
 # Main interface
 url = st.text_input("🌐 Enter Website URL", placeholder="https://example.com")
 
 if st.button("🚀 Scrape Website", type="primary", use_container_width=True):
     if url:
-        with st.spinner("⏳ Scraping website..."):
+        try:
+            page = get_cached_page(url)
+            if page is None:
+                page = scrape_page(url)
+            else:
+                st.info("♻️ Using the cached copy of this page")
+            if page is None:
+                st.error("❌ Failed to scrape website. Please check the URL.")
+            else:
+                st.session_state["current_url"] = url
+        except Exception as e:
+            st.error(f"❌ Error: {str(e)}")
+    else:
+        st.warning("⚠️ Please enter a URL")
+
+# The extraction section lives outside the button branch so it survives reruns
+current_url = st.session_state.get("current_url")
+page = get_cached_page(current_url) if current_url else None
+
+if page is not None:
+    st.caption(f"📄 {current_url}")
+    
+    # Show content
+    with st.expander("📄 View Scraped Content"):
+        st.text_area("Content", page["content"], height=300, label_visibility="collapsed")
+    
+    # Parse section
+    st.divider()
+    st.subheader("🤖 Extract Specific Information")
+    
+    parse_query = st.text_area(
+        "What would you like to extract? (one question per line)",
+        placeholder="e.g., product prices, contact information, article headlines"
+    )
+    
+    if st.button("✨ Extract", use_container_width=True):
+        queries = [line.strip() for line in parse_query.splitlines() if line.strip()]
+        if not queries:
+            st.warning("⚠️ Please describe what you want to extract")
+        else:
             try:
-                # Scrape website
-                html_content = scrape_website(url)
-                
-                if html_content:
-                    body_content = extract_body_content(html_content)
-                    cleaned_content = clean_body_content(body_content)
-                    
-                    # Save data
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    save_data(cleaned_content, f"scraped_{timestamp}.txt", folder="data/raw_data")
-                    
-                    # Display success
-                    st.success("✅ Website scraped successfully!")
-                    
-                    # Show content
-                    with st.expander("📄 View Scraped Content"):
-                        st.text_area("Content", cleaned_content, height=300, label_visibility="collapsed")
-                    
-                    # Parse section
-                    st.divider()
-                    st.subheader("🤖 Extract Specific Information")
-                    
-                    parse_query = st.text_input(
-                        "What would you like to extract?",
-                        placeholder="e.g., product prices, contact information, article headlines"
-                    )
-                    
-                    if st.button("✨ Extract", use_container_width=True):
-                        if parse_query:
-                            with st.spinner("🔍 Analyzing content..."):
-                                try:
-                                    dom_chunks = split_dom_content(cleaned_content)
-                                    parsed_result = parse_with_ollama(dom_chunks, parse_query)
-                                    
-                                    # Save parsed data
-                                    save_data(parsed_result, f"parsed_{timestamp}.txt", folder="data/processed_data")
-                                    
-                                    # Display result
-                                    st.success("✅ Extraction complete!")
-                                    st.markdown("### 📊 Results")
-                                    st.write(parsed_result)
-                                    
-                                except Exception as e:
-                                    st.error(f"❌ Extraction failed: {str(e)}")
-                        else:
-                            st.warning("⚠️ Please describe what you want to extract")
+                if len(queries) == 1:
+                    render_extraction(current_url, page, queries[0])
                 else:
-                    st.error("❌ Failed to scrape website. Please check the URL.")
-                    
+                    render_multi_extraction(page, queries)
             except Exception as e:
-                st.error(f"❌ Error: {str(e)}")
-    else:
-        st.warning("⚠️ Please enter a URL")
+                st.error(f"❌ Extraction failed: {str(e)}")
 
 # Footer
 st.divider()
@@ -0,0 +1,139 @@
+"""
+Migrate the one-file-per-scrape ``data/`` tree into the record store.
+
+Every file under the data folder (except the store itself, data/cache and
+live SQLite databases such as the job queue, with their -wal/-shm files)
+is saved under its path, e.g. "data/raw_data/raw_data_20250308_230842.txt",
+with the file's modification time as its timestamp, so utils.load_data
+keeps finding it. Identical files are stored once, and files already in
+the store with the same content are skipped, so the migration can be run
+again safely. Each record is read back and compared before the original
+is deleted (with --delete).
+
+Usage:
+    python migrate_data.py [--data data] [--store data/store] [--delete] [--dry-run]
+"""
+import argparse
+import hashlib
+import logging
+import os
+import re
+
+from record_store import RecordStore, DEFAULT_STORE_PATH, normalize_key
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SKIPPED_FOLDERS = ("cache",)
+
+# Databases the series keeps under data/ (job queue, caches), whatever they are called
+_DATABASE_ENV = {
+    "JOB_QUEUE_PATH": "data/jobs.sqlite",
+    "FETCH_STORE_PATH": "data/cache/fetch_meta.sqlite",
+    "SEARCH_CACHE_PATH": "data/cache/search_cache.sqlite",
+    "LLM_CACHE_PATH": "data/cache/llm_cache.sqlite",
+}
+_DATABASE_NAME = re.compile(r"\.(sqlite3?|db)(-wal|-shm|-journal)?$", re.IGNORECASE)
+_SQLITE_HEADER = b"SQLite format 3\x00"
+
+
+def _is_database(path):
+    """Whether a file is a SQLite database or one of its -wal/-shm/-journal files."""
+    if _DATABASE_NAME.search(path):
+        return True
+    absolute = os.path.abspath(path)
+    for name, default in _DATABASE_ENV.items():
+        database = os.path.abspath(os.getenv(name, default))
+        if absolute in (database, database + "-wal", database + "-shm", database + "-journal"):
+            return True
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(_SQLITE_HEADER)) == _SQLITE_HEADER
+    except OSError:
+        return False
+
+
+def iter_data_files(data_folder, store_path):
+    """
+    Yield the files to migrate, oldest first, skipping SQLite databases.
+    Args:
+        data_folder (str): Root of the data tree
+        store_path (str): Record store directory, which is never migrated
+    Yields:
+        str: File paths
+    """
+    store_path = os.path.abspath(store_path)
+    paths = []
+    for root, folders, files in os.walk(data_folder):
+        folders[:] = [
+            folder for folder in folders
+            if folder not in SKIPPED_FOLDERS and os.path.abspath(os.path.join(root, folder)) != store_path
+        ]
+        paths.extend(path for path in (os.path.join(root, name) for name in files) if not _is_database(path))
+    yield from sorted(paths, key=os.path.getmtime)
+
+
+def migrate(data_folder="data", store_path=DEFAULT_STORE_PATH, delete=False, dry_run=False):
+    """
+    Copy every data file into the record store.
+    Args:
+        data_folder (str): Root of the data tree
+        store_path (str): Record store directory
+        delete (bool): Remove each original once its record has been verified
+        dry_run (bool): Only report what would be migrated
+    Returns:
+        dict: files, duplicates, already_migrated, bytes_before and bytes_after counts
+    """
+    store = None if dry_run else RecordStore(store_path)
+    before = store.stats() if store else None
+    report = {"files": 0, "duplicates": 0, "already_migrated": 0, "bytes_before": 0, "bytes_after": 0}
+    seen = set()
+
+    for path in iter_data_files(data_folder, store_path):
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        report["files"] += 1
+        report["bytes_before"] += len(data)
+        if digest in seen:
+            report["duplicates"] += 1
+        seen.add(digest)
+        if dry_run:
+            continue
+
+        key = normalize_key(os.path.relpath(path, data_folder), os.path.basename(os.path.normpath(data_folder)))
+        if store.contains(key) and store.get(key) == data:
+            # Migrated by an earlier run: storing it again would add a second record
+            report["already_migrated"] += 1
+        else:
+            store.put(data, key, created_at=os.path.getmtime(path))
+        if store.get(key) != data:
+            raise RuntimeError(f"Verification failed for {path}")
+        if delete:
+            os.remove(path)
+
+    if store:
+        after = store.stats()
+        report["bytes_after"] = after["stored_bytes"] - before["stored_bytes"]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="data", help="Data folder to migrate")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="Record store directory")
+    parser.add_argument("--delete", action="store_true", help="Delete originals after verifying them")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be migrated")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    report = migrate(args.data, args.store, delete=args.delete, dry_run=args.dry_run)
+    print(f"Files:      {report['files']} ({report['duplicates']} duplicates, "
+          f"{report['already_migrated']} already migrated)")
+    print(f"Before:     {report['bytes_before']:,} bytes")
+    if not args.dry_run:
+        print(f"After:      {report['bytes_after']:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,3 @@
-import cohere
-from langchain_ollama import OllamaLLM
-from groq import Groq
 from dotenv import load_dotenv
 import os
 import logging
@@ -8,6 +5,7 @@ import json
 # Add these imports
 import subprocess
 from pathlib import Path
+from providers import get_client
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -15,14 +13,15 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-# Retrieve API keys
-COHERE_API_KEY = os.getenv("COHERE_API_KEY")
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+# Clients are built on first use by the provider registry
+_LAZY_CLIENTS = {"co": "cohere", "groq_client": "groq", "ollama_model": "ollama"}
 
-# Initialize clients
-co = cohere.Client(api_key=COHERE_API_KEY)
-groq_client = Groq(api_key=GROQ_API_KEY)
-ollama_model = OllamaLLM(model="llama3")
+
+def __getattr__(name):
+    # Keep model.co / model.groq_client / model.ollama_model working without eager construction
+    if name in _LAZY_CLIENTS:
+        return get_client(_LAZY_CLIENTS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Define function keywords for task categorization
 funcs = [
@@ -103,7 +102,7 @@ def categorize_query(prompt):
         list: Categorized tasks
     """
     try:
-        response = co.chat(
+        response = get_client("cohere").chat(
             model='command-r-plus',
             message=prompt,
             preamble="""You are a Decision-Making Model that categorizes queries.
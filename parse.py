@@ -1,15 +1,16 @@
-from langchain_ollama import OllamaLLM
-from langchain_core.prompts import ChatPromptTemplate
-from openai import OpenAI
 import os
 import json
 import logging
 from dotenv import load_dotenv
-import cohere
-from groq import Groq
 from bs4 import BeautifulSoup
 import random
 import time
+import asyncio
+import queue
+from llm_cache import LLMCache, get_llm_cache
+from relevance import DEFAULT_METHOD, DEFAULT_MIN_SCORE, DEFAULT_TOP_K, prefilter_chunks
+from providers import get_client, OLLAMA_MODEL_NAME
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import sys
 import os
 import subprocess
@@ -21,14 +22,18 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-# Retrieve API keys
-COHERE_API_KEY = os.getenv("COHERE_API_KEY")
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+# Model used by format_data_with_openai, also part of the LLM cache keys
+OPENAI_FORMAT_MODEL = "gpt-3.5-turbo-1106"
 
-# Initialize clients
-co = cohere.Client(api_key=COHERE_API_KEY)
-groq_client = Groq(api_key=GROQ_API_KEY)
-ollama_model = OllamaLLM(model="llama3")
+# Clients are built on first use by the provider registry
+_LAZY_CLIENTS = {"co": "cohere", "groq_client": "groq", "ollama_model": "ollama"}
+
+
+def __getattr__(name):
+    # Keep parse.co / parse.groq_client / parse.ollama_model working without eager construction
+    if name in _LAZY_CLIENTS:
+        return get_client(_LAZY_CLIENTS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Define function keywords for task categorization
 funcs = [
@@ -39,12 +44,6 @@ funcs = [
 
 
 
-# Modify the initialization section
-# Comment out or replace the existing client initializations
-ollama_model = OllamaLLM(model="llama3")
-
-
-
 def categorize_query(prompt):
     """
     Categorize user query using Cohere AI.
@@ -54,7 +53,7 @@ def categorize_query(prompt):
         list: Categorized tasks
     """
     try:
-        response = co.chat(
+        response = get_client("cohere").chat(
             model='command-r-plus',
             message=prompt,
             preamble="""You are a Decision-Making Model that categorizes queries.
@@ -77,7 +76,185 @@ def categorize_query(prompt):
         logger.error(f"Error categorizing query: {str(e)}")
         return ["general " + prompt]
 
-def parse_with_ollama(dom_chunks, parse_description, max_retries=3):
+# Prompt template for chunk extraction
+PARSE_TEMPLATE = (
+    "You are tasked with extracting specific information from the following text content: {dom_content}. "
+    "Please follow these instructions carefully: \n\n"
+    "1. **Extract Information:** Only extract the information that directly matches the provided description: {parse_description}. "
+    "2. **No Extra Content:** Do not include any additional text, comments, or explanations in your response. "
+    "3. **Empty Response:** If no information matches the description, return an empty string ('')."
+    "4. **Direct Data Only:** Your output should contain only the data that is explicitly requested, with no other text."
+)
+
+def _chunk_cache_key(chunk, parse_description):
+    """Content-addressed cache key for one chunk extraction."""
+    return LLMCache.make_key("ollama", OLLAMA_MODEL_NAME, PARSE_TEMPLATE, chunk, parse_description)
+
+
+def _invoke_with_retries(prompt, max_retries=3, provider="ollama", on_token=None, on_reset=None):
+    """
+    Invoke an LLM, retrying with exponential backoff.
+    The backoff sleep only blocks the calling worker.
+    
+    Args:
+        prompt (str): Prompt to send
+        max_retries (int): Maximum number of retries
+        provider (str): Provider registry name of the client
+        on_token (callable): If given, the response is streamed and each token passed to it
+        on_reset (callable): Called before retrying a partially streamed response
+        
+    Returns:
+        tuple: (response, None) on success or (None, error message) if every attempt failed
+    """
+    for attempt in range(max_retries):
+        try:
+            if on_token is None:
+                return get_client(provider).invoke(prompt), None
+            tokens = []
+            for token in get_client(provider).stream(prompt):
+                tokens.append(token)
+                on_token(token)
+            return "".join(tokens), None
+        except Exception as e:
+            if on_reset is not None:
+                on_reset()
+            logger.error(f"Error parsing chunk (attempt {attempt+1}): {str(e)}")
+            if attempt < max_retries - 1:
+                # Add exponential backoff
+                delay = (2 ** attempt) + random.uniform(0, 1)
+                logger.info(f"Retrying after {delay:.2f} seconds...")
+                time.sleep(delay)
+            else:
+                logger.error(f"All {max_retries} attempts failed for chunk")
+                return None, f"Error processing content: {str(e)}"
+
+
+def _parse_chunk(chunk, parse_description, max_retries=3, use_cache=True, on_token=None, on_reset=None):
+    """
+    Parse a single chunk with Ollama, retrying with exponential backoff.
+    
+    Args:
+        chunk (str): DOM content chunk
+        parse_description (str): Description of what to parse
+        max_retries (int): Maximum number of retries
+        use_cache (bool): Whether to read and write the LLM response cache
+        on_token (callable): If given, stream the response and pass each token to it
+        on_reset (callable): Called before retrying a partially streamed response
+        
+    Returns:
+        str: Parsed result, or an error message if every attempt failed
+    """
+    if use_cache:
+        cache = get_llm_cache()
+        key = _chunk_cache_key(chunk, parse_description)
+        cached = cache.get(key)
+        if cached is not None:
+            if on_token is not None:
+                on_token(cached)
+            return cached
+
+    prompt = PARSE_TEMPLATE.format(dom_content=chunk, parse_description=parse_description)
+    response, error = _invoke_with_retries(prompt, max_retries, on_token=on_token, on_reset=on_reset)
+    if error:
+        return error
+    if use_cache:
+        cache.set(key, response)
+    return response
+
+
+def iter_parse_with_ollama(dom_chunks, parse_description, max_retries=3, concurrency=4, use_cache=True):
+    """
+    Parse DOM chunks in parallel, yielding each result as soon as it completes.
+    Identical chunks are only sent to the model once.
+    
+    Args:
+        dom_chunks (list): List of DOM content chunks
+        parse_description (str): Description of what to parse
+        max_retries (int): Maximum number of retries per chunk
+        concurrency (int): Number of chunks sent to the model at once
+        use_cache (bool): Whether to read and write the LLM response cache
+        
+    Yields:
+        tuple: (chunk index, parsed result) in completion order
+    """
+    # Group duplicate chunks so each distinct text is parsed once
+    indices_by_chunk = {}
+    for index, chunk in enumerate(dom_chunks):
+        indices_by_chunk.setdefault(chunk, []).append(index)
+    if not indices_by_chunk:
+        return
+
+    # Not a with-block: closing the generator early must not wait for the queued LLM calls
+    executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(indices_by_chunk))))
+    try:
+        futures = {
+            executor.submit(_parse_chunk, chunk, parse_description, max_retries, use_cache): indices
+            for chunk, indices in indices_by_chunk.items()
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            for index in futures[future]:
+                yield index, result
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def stream_parse_with_ollama(dom_chunks, parse_description, max_retries=3, concurrency=4, use_cache=True):
+    """
+    Parse DOM chunks in parallel, streaming tokens as the model produces them.
+    
+    Args:
+        dom_chunks (list): List of DOM content chunks
+        parse_description (str): Description of what to parse
+        max_retries (int): Maximum number of retries per chunk
+        concurrency (int): Number of chunks sent to the model at once
+        use_cache (bool): Whether to read and write the LLM response cache
+        
+    Yields:
+        dict: {"event": "token", "index", "text"} for each streamed token,
+              {"event": "reset", "index"} when a partial response is discarded for a retry,
+              {"event": "chunk", "index", "result"} when a chunk is complete
+    """
+    indices_by_chunk = {}
+    for index, chunk in enumerate(dom_chunks):
+        indices_by_chunk.setdefault(chunk, []).append(index)
+    if not indices_by_chunk:
+        return
+
+    # Workers push events here; the generator hands them out on the caller's thread
+    events = queue.Queue()
+
+    def work(chunk, indices):
+        def emit(event, **data):
+            for index in indices:
+                events.put(dict(event=event, index=index, **data))
+        try:
+            result = _parse_chunk(chunk, parse_description, max_retries, use_cache,
+                                  on_token=lambda text: emit("token", text=text),
+                                  on_reset=lambda: emit("reset"))
+        except Exception as e:
+            logger.error(f"Error parsing chunk: {str(e)}")
+            result = f"Error processing content: {str(e)}"
+        emit("chunk", result=result)
+
+    # Not a with-block: closing the generator early (a Streamlit rerun or stop) must
+    # not block until every queued LLM call has finished
+    executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(indices_by_chunk))))
+    try:
+        for chunk, indices in indices_by_chunk.items():
+            executor.submit(work, chunk, indices)
+        remaining = sum(len(indices) for indices in indices_by_chunk.values())
+        while remaining:
+            event = events.get()
+            if event["event"] == "chunk":
+                remaining -= 1
+            yield event
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_with_ollama(dom_chunks, parse_description, max_retries=3, concurrency=4, use_cache=True,
+                      top_k=DEFAULT_TOP_K, min_score=DEFAULT_MIN_SCORE, relevance_method=DEFAULT_METHOD, stats=None):
     """
     Parse DOM content using Ollama LLM with retry mechanism.
     
@@ -85,56 +262,216 @@ def parse_with_ollama(dom_chunks, parse_description, max_retries=3):
         dom_chunks (list): List of DOM content chunks
         parse_description (str): Description of what to parse
         max_retries (int): Maximum number of retries
+        concurrency (int): Number of chunks sent to the model at once
+        use_cache (bool): Whether to read and write the LLM response cache
+        top_k (int): Only send the top_k most relevant chunks to the model
+            (default: RELEVANCE_TOP_K, off)
+        min_score (float): Skip chunks matching the description but scoring below this
+            fraction of the best chunk (default: RELEVANCE_MIN_SCORE, off; chunks
+            sharing no word with the description are always sent)
+        relevance_method (str): "bm25" or "tfidf" ranking for top_k/min_score
+        stats (dict): Optional dict filled with the relevance filter report
         
     Returns:
-        str: Parsed results
-    """
-    # Define a prompt template
-    template = (
-        "You are tasked with extracting specific information from the following text content: {dom_content}. "
-        "Please follow these instructions carefully: \n\n"
-        "1. **Extract Information:** Only extract the information that directly matches the provided description: {parse_description}. "
-        "2. **No Extra Content:** Do not include any additional text, comments, or explanations in your response. "
-        "3. **Empty Response:** If no information matches the description, return an empty string ('')."
-        "4. **Direct Data Only:** Your output should contain only the data that is explicitly requested, with no other text."
-    )
-    
-    # Process with Ollama
-    parsed_results = []
-    
-    for chunk in dom_chunks:
+        str: Parsed results in document order
+    """
+    dom_chunks = prefilter_chunks(dom_chunks, parse_description, top_k, min_score, relevance_method, stats)
+    parsed_results = [""] * len(dom_chunks)
+    for index, result in iter_parse_with_ollama(dom_chunks, parse_description, max_retries, concurrency, use_cache):
+        parsed_results[index] = result
+    
+    return "\n".join(parsed_results)
+
+
+# Prompt template for answering several extraction descriptions in one call
+MULTI_PARSE_TEMPLATE = (
+    "You are tasked with extracting specific information from the following text content: {dom_content}. "
+    "Please follow these instructions carefully: \n\n"
+    "1. **Extract Information:** For each numbered description below, extract only the information that directly matches it.\n"
+    "{descriptions}\n"
+    "2. **JSON Output:** Respond with a single JSON object whose keys are the description numbers as strings "
+    "(\"1\", \"2\", ...) and whose values are the extracted data as strings. "
+    "3. **Empty Response:** If nothing matches a description, use an empty string ('') as its value. "
+    "4. **Direct Data Only:** Do not include any text outside the JSON object."
+)
+
+
+def _parse_multi_response(response, count):
+    """
+    Parse the keyed JSON object returned for a multi-description prompt.
+    Returns:
+        list: One answer string per description, or None if the response is not usable
+    """
+    start, end = response.find("{"), response.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json.loads(response[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    answers = []
+    for number in range(1, count + 1):
+        value = data.get(str(number), "")
+        if not isinstance(value, str):
+            value = json.dumps(value, ensure_ascii=False)
+        answers.append(value.strip())
+    return answers
+
+
+def _parse_chunk_multi(chunk, parse_descriptions, max_retries=3, use_cache=True):
+    """
+    Answer several extraction descriptions for one chunk with a single LLM call.
+    Falls back to one call per description if the model does not return valid JSON.
+    
+    Args:
+        chunk (str): DOM content chunk
+        parse_descriptions (list): Descriptions of what to parse
+        max_retries (int): Maximum number of retries
+        use_cache (bool): Whether to read and write the LLM response cache
+        
+    Returns:
+        list: One parsed result per description
+    """
+    if len(parse_descriptions) == 1:
+        return [_parse_chunk(chunk, parse_descriptions[0], max_retries, use_cache)]
+
+    if use_cache:
+        cache = get_llm_cache()
+        key = LLMCache.make_key("ollama-multi", OLLAMA_MODEL_NAME, MULTI_PARSE_TEMPLATE, chunk, *parse_descriptions)
+        cached = cache.get(key)
+        if cached is not None:
+            return json.loads(cached)
+
+    descriptions = "\n".join(f"{number}. {description}" for number, description in enumerate(parse_descriptions, 1))
+    prompt = MULTI_PARSE_TEMPLATE.format(dom_content=chunk, descriptions=descriptions)
+    response, error = _invoke_with_retries(prompt, max_retries, provider="ollama_json")
+    if error:
+        return [error] * len(parse_descriptions)
+
+    answers = _parse_multi_response(response, len(parse_descriptions))
+    if answers is None:
+        logger.warning("Multi-description response was not valid JSON; parsing descriptions separately")
+        return [_parse_chunk(chunk, description, max_retries, use_cache) for description in parse_descriptions]
+
+    if use_cache:
+        cache.set(key, json.dumps(answers))
+    return answers
+
+
+def parse_multiple_with_ollama(dom_chunks, parse_descriptions, max_retries=3, concurrency=4, use_cache=True,
+                               top_k=DEFAULT_TOP_K, min_score=DEFAULT_MIN_SCORE, stats=None):
+    """
+    Answer several extraction descriptions in one pass over the chunks.
+    Each chunk is sent to the model once with a combined prompt, so N
+    descriptions cost about as many LLM calls as one.
+    
+    Args:
+        dom_chunks (list): List of DOM content chunks
+        parse_descriptions (list): Descriptions of what to parse
+        max_retries (int): Maximum number of retries per chunk
+        concurrency (int): Number of chunks sent to the model at once
+        use_cache (bool): Whether to read and write the LLM response cache
+        top_k (int): Relevance pre-filter, ranked against all descriptions together
+        min_score (float): Relevance pre-filter threshold (see parse_with_ollama)
+        stats (dict): Optional dict filled with the relevance filter report
+        
+    Returns:
+        dict: Description -> parsed results in document order
+    """
+    parse_descriptions = list(dict.fromkeys(d.strip() for d in parse_descriptions if d and d.strip()))
+    dom_chunks = prefilter_chunks(dom_chunks, " ".join(parse_descriptions), top_k, min_score, stats=stats)
+    per_chunk = [None] * len(dom_chunks)
+
+    # Group duplicate chunks so each distinct text is parsed once
+    indices_by_chunk = {}
+    for index, chunk in enumerate(dom_chunks):
+        indices_by_chunk.setdefault(chunk, []).append(index)
+
+    if parse_descriptions and indices_by_chunk:
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(indices_by_chunk)))) as executor:
+            futures = {
+                executor.submit(_parse_chunk_multi, chunk, parse_descriptions, max_retries, use_cache): indices
+                for chunk, indices in indices_by_chunk.items()
+            }
+            for future in as_completed(futures):
+                answers = future.result()
+                for index in futures[future]:
+                    per_chunk[index] = answers
+
+    return {
+        description: "\n".join(answers[i] for answers in per_chunk if answers[i])
+        for i, description in enumerate(parse_descriptions)
+    }
+
+
+async def async_parse_with_ollama(dom_chunks, parse_description, max_retries=3, concurrency=4, use_cache=True,
+                                  top_k=DEFAULT_TOP_K, min_score=DEFAULT_MIN_SCORE, stats=None):
+    """
+    Async version of parse_with_ollama that runs chunks concurrently.
+    
+    Args:
+        dom_chunks (list): List of DOM content chunks
+        parse_description (str): Description of what to parse
+        max_retries (int): Maximum number of retries per chunk
+        concurrency (int or asyncio.Semaphore): Maximum chunks in flight,
+            or a semaphore shared with other callers
+        use_cache (bool): Whether to read and write the LLM response cache
+        top_k (int): Relevance pre-filter (see parse_with_ollama)
+        min_score (float): Relevance pre-filter threshold (see parse_with_ollama)
+        stats (dict): Optional dict filled with the relevance filter report
+        
+    Returns:
+        str: Parsed results in document order
+    """
+    dom_chunks = prefilter_chunks(dom_chunks, parse_description, top_k, min_score, stats=stats)
+    semaphore = concurrency if isinstance(concurrency, asyncio.Semaphore) else asyncio.Semaphore(concurrency)
+
+    cache = get_llm_cache() if use_cache else None
+    loop = asyncio.get_running_loop()
+
+    async def parse_chunk(chunk):
+        key = _chunk_cache_key(chunk, parse_description)
+        if cache is not None:
+            # SQLite calls block, so keep them off the event loop
+            cached = await loop.run_in_executor(None, cache.get, key)
+            if cached is not None:
+                return cached
+
+        prompt = PARSE_TEMPLATE.format(dom_content=chunk, parse_description=parse_description)
         for attempt in range(max_retries):
             try:
-                prompt = template.format(dom_content=chunk, parse_description=parse_description)
-                response = ollama_model.invoke(prompt)
-                parsed_results.append(response)
-                break  # Success, exit retry loop
+                async with semaphore:
+                    response = await get_client("ollama").ainvoke(prompt)
+                if cache is not None:
+                    await loop.run_in_executor(None, cache.set, key, response)
+                return response
             except Exception as e:
                 logger.error(f"Error parsing chunk (attempt {attempt+1}): {str(e)}")
                 if attempt < max_retries - 1:
-                    # Add exponential backoff
+                    # Exponential backoff without holding a slot or blocking the loop
                     delay = (2 ** attempt) + random.uniform(0, 1)
                     logger.info(f"Retrying after {delay:.2f} seconds...")
-                    time.sleep(delay)
+                    await asyncio.sleep(delay)
                 else:
                     logger.error(f"All {max_retries} attempts failed for chunk")
-                    parsed_results.append(f"Error processing content: {str(e)}")
-    
-    return "\n".join(parsed_results)
+                    return f"Error processing content: {str(e)}"
 
+    parsed_results = await asyncio.gather(*(parse_chunk(chunk) for chunk in dom_chunks))
+    return "\n".join(parsed_results)
 
-def format_data_with_openai(data, fields=None):
+def format_data_with_openai(data, fields=None, use_cache=True):
     """
     Format data using OpenAI API.
     Args:
         data (str): Data to format
         fields (list): List of fields to extract
+        use_cache (bool): Whether to read and write the LLM response cache
     Returns:
         dict: Formatted data as JSON
     """
-    load_dotenv()
-    client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-    
     if fields is None:
         fields = ["Title", "Content", "Author", "Date", "URL"]
     
@@ -145,9 +482,18 @@ def format_data_with_openai(data, fields=None):
     
     user_message = f"Extract the following information from the provided text: \nPage content: \n\n{data}\n\nInformation to extract: {fields}"
     
+    if use_cache:
+        cache = get_llm_cache()
+        key = LLMCache.make_key("openai", OPENAI_FORMAT_MODEL, system_message, data, fields)
+        cached = cache.get(key)
+        if cached is not None:
+            return json.loads(cached)
+
+    client = get_client("openai")
+    
     try:
         response = client.chat.completions.create(
-            model="gpt-3.5-turbo-1106",
+            model=OPENAI_FORMAT_MODEL,
             response_format={"type": "json_object"},
             messages=[
                 {"role": "system", "content": system_message},
@@ -161,6 +507,8 @@ def format_data_with_openai(data, fields=None):
             
             try:
                 parsed_json = json.loads(formatted_data)
+                if use_cache:
+                    cache.set(key, formatted_data)
                 return parsed_json
             except json.JSONDecodeError as e:
                 logger.error(f"JSON decoding error: {e}")
@@ -0,0 +1,488 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import logging
+import time
+
+from scrape import scrape_website, async_scrape_website, html_to_text
+from boilerplate import SiteBoilerplate, clean_page, extract_main_content, finish_report, summarize_reports
+from chunking import chunk_signature, iter_chunks, iter_chunks_reusing
+from parse import async_parse_with_ollama, iter_parse_with_ollama, parse_with_ollama, stream_parse_with_ollama
+from relevance import DEFAULT_MIN_SCORE, DEFAULT_TOP_K, prefilter_chunks
+from fetch_store import fingerprint, get_fetch_store
+from job_queue import JobQueue, default_worker_id
+from crawler import crawl
+from search import iter_search
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Start of the result parse.py returns for a chunk whose every LLM attempt failed
+_LLM_ERROR = "Error processing content"
+
+
+async def run_pipeline(query_or_urls, parse_description=None, num_results=10,
+                       fetch_concurrency=8, clean_concurrency=4, llm_concurrency=2,
+                       clean_executor=None, main_content=True, site=None, **scrape_options):
+    """
+    Search, scrape, clean and (optionally) extract many pages on one event loop.
+
+    Each stage is bounded by its own semaphore, so network fetches, browser
+    sessions and LLM calls for different pages overlap. Search results are
+    processed as soon as each URL arrives.
+
+    Cleaning keeps only each page's main content and strips lines repeated
+    across pages of the same site (see boilerplate), so less text is chunked
+    and sent to the LLM.
+
+    Args:
+        query_or_urls (str or list): A search query, a single URL or a list of URLs
+        parse_description (str): What to extract with the LLM (None skips extraction)
+        num_results (int): Number of search results when given a query
+        fetch_concurrency (int): Maximum pages being fetched at once
+        clean_concurrency (int): Maximum pages being cleaned at once
+        llm_concurrency (int): Maximum LLM calls in flight across all pages
+        clean_executor (Executor): Executor for HTML cleaning, e.g. a
+            ProcessPoolExecutor (default: the loop's thread pool)
+        main_content (bool): Keep only the main content of each page
+        site (SiteBoilerplate): Cross-page boilerplate state (default: a new one
+            for this run); pass one to keep learning across runs
+        **scrape_options: Extra keyword arguments for scrape_website
+    Returns:
+        list: One dict per URL with url, content, parsed, status, timings, the
+            reduction report from boilerplate.clean_page and the relevance
+            filter report (chunks skipped before the LLM)
+    """
+    loop = asyncio.get_running_loop()
+
+    if isinstance(query_or_urls, str) and query_or_urls.startswith(("http://", "https://")):
+        urls = iter([query_or_urls])
+    elif isinstance(query_or_urls, str):
+        urls = iter_search(query_or_urls, num_results)
+    else:
+        urls = iter(query_or_urls)
+
+    site = site if site is not None else SiteBoilerplate()
+    fetch_semaphore = asyncio.Semaphore(fetch_concurrency)
+    clean_semaphore = asyncio.Semaphore(clean_concurrency)
+    llm_semaphore = asyncio.Semaphore(llm_concurrency)
+
+    # Blocking fetches get their own threads so they do not starve cleaning
+    fetch_executor = ThreadPoolExecutor(max_workers=fetch_concurrency)
+
+    async def process(url):
+        result = {"url": url, "content": None, "parsed": None, "status": "ok", "timings": {}}
+        timings = result["timings"]
+        try:
+            started = time.monotonic()
+            async with fetch_semaphore:
+                html = await async_scrape_website(url, executor=fetch_executor, **scrape_options)
+            timings["fetch"] = round(time.monotonic() - started, 3)
+            if not html:
+                result["status"] = "empty"
+                return result
+
+            started = time.monotonic()
+            async with clean_semaphore:
+                if main_content:
+                    content, report = await loop.run_in_executor(clean_executor, extract_main_content, html)
+                else:
+                    content = await loop.run_in_executor(clean_executor, html_to_text, html)
+                    report = {"text_chars": len(content), "main_chars": len(content)}
+            # Site statistics stay in this process, even with a process pool
+            content = site.clean(url, content)
+            result["reduction"] = finish_report(report, content)
+            timings["clean"] = round(time.monotonic() - started, 3)
+            result["content"] = content
+
+            if parse_description and content:
+                started = time.monotonic()
+                parse_stats = {}
+                result["parsed"] = await async_parse_with_ollama(
+                    list(iter_chunks(content)), parse_description, concurrency=llm_semaphore, stats=parse_stats
+                )
+                result["relevance"] = parse_stats.get("relevance")
+                timings["parse"] = round(time.monotonic() - started, 3)
+        except Exception as e:
+            logger.error(f"Pipeline failed for {url}: {str(e)}")
+            result["status"] = f"error: {str(e)}"
+        return result
+
+    try:
+        # Start each page as soon as the search yields its URL
+        tasks = []
+        while True:
+            url = await loop.run_in_executor(None, next, urls, None)
+            if url is None:
+                break
+            tasks.append(asyncio.ensure_future(process(url)))
+        results = await asyncio.gather(*tasks)
+        _log_reduction([result["reduction"] for result in results if "reduction" in result])
+        return results
+    finally:
+        fetch_executor.shutdown(wait=False)
+
+
+def iter_page_events(url, parse_description=None, html=None, content=None, chunks=None, on_event=None,
+                     concurrency=4, main_content=True, site=None, **scrape_options):
+    """
+    Scrape, clean and extract one page, reporting progress as events.
+
+    Events are yielded as they happen (and passed to ``on_event`` if given),
+    so a UI can show the cleaned text and partial extraction results long
+    before the whole page has been processed:
+
+        {"event": "fetch_done", "url", "html", "mode", "elapsed"}
+        {"event": "clean_done", "content", "chars", "reduction", "elapsed"}
+        {"event": "chunks_ready", "count", "skipped", "elapsed"}  (skipped by the relevance filter)
+        {"event": "token" | "reset" | "chunk", "index", ...}  (see stream_parse_with_ollama)
+        {"event": "done", "content", "parsed", "timings"}
+        {"event": "error", "stage", "message"}
+
+    Args:
+        url (str): The URL to process
+        parse_description (str): What to extract with the LLM (None stops after cleaning)
+        html (str): Already fetched HTML, to skip the fetch stage
+        content (str): Already cleaned text, to skip the fetch and clean stages
+        chunks (list): Already chunked content, to skip chunking as well
+        on_event (callable): Optional callback receiving each event
+        concurrency (int): Number of chunks sent to the model at once
+        main_content (bool): Keep only the page's main content
+        site (SiteBoilerplate): Optional cross-page boilerplate state
+        **scrape_options: Extra keyword arguments for scrape_website
+    Yields:
+        dict: Pipeline events
+    """
+    started = time.monotonic()
+    timings = {}
+
+    def event(name, **data):
+        data = dict(event=name, **data)
+        if on_event is not None:
+            on_event(data)
+        return data
+
+    if chunks is not None and content is None:
+        content = "\n".join(chunks)
+
+    if html is None and content is None:
+        stats = {}
+        html = scrape_website(url, stats=stats, **scrape_options)
+        timings["fetch"] = round(time.monotonic() - started, 3)
+        if not html:
+            yield event("error", stage="fetch", message=f"Failed to scrape {url}")
+            return
+        yield event("fetch_done", url=url, html=html, mode=stats.get("fetch_mode"), elapsed=timings["fetch"])
+
+    if content is None:
+        stage_started = time.monotonic()
+        content, reduction = clean_page(html, url, site=site, main_content=main_content)
+        timings["clean"] = round(time.monotonic() - stage_started, 3)
+        yield event("clean_done", content=content, chars=len(content), reduction=reduction,
+                    elapsed=timings["clean"])
+
+    parsed = None
+    if parse_description and content:
+        stage_started = time.monotonic()
+        if chunks is None:
+            chunks = list(iter_chunks(content))
+        relevance = {}
+        chunks = prefilter_chunks(chunks, parse_description, stats=relevance)
+        skipped = relevance["relevance"]["skipped"] if relevance else 0
+        yield event("chunks_ready", count=len(chunks), skipped=skipped,
+                    elapsed=round(time.monotonic() - stage_started, 3))
+
+        results = [""] * len(chunks)
+        for chunk_event in stream_parse_with_ollama(chunks, parse_description, concurrency=concurrency):
+            if chunk_event["event"] == "chunk":
+                results[chunk_event["index"]] = chunk_event["result"]
+                if "first_chunk" not in timings:
+                    timings["first_chunk"] = round(time.monotonic() - stage_started, 3)
+            elif chunk_event["event"] == "token" and "first_token" not in timings:
+                timings["first_token"] = round(time.monotonic() - stage_started, 3)
+            yield event(chunk_event.pop("event"), **chunk_event)
+        parsed = "\n".join(results)
+        timings["parse"] = round(time.monotonic() - stage_started, 3)
+
+    timings["total"] = round(time.monotonic() - started, 3)
+    yield event("done", content=content, parsed=parsed, timings=timings)
+
+
+def refresh_page(url, parse_description=None, store=None, **scrape_options):
+    """
+    Re-check a previously processed page, doing only the work its changes require.
+
+    The page is fetched as a conditional GET with the stored ETag and
+    Last-Modified validators. A 304 Not Modified skips cleaning and
+    extraction (pages rendered in a browser store no validators, so
+    they always go through the fingerprint check below). Otherwise the cleaned text is fingerprinted, and if it is
+    identical to last time (e.g. only ads or timestamps in the markup
+    changed) the stored extraction is reused instead of calling the LLM.
+    If it did change, only the changed chunks are re-extracted.
+
+    Args:
+        url (str): The URL to refresh
+        parse_description (str): What to extract with the LLM (None skips extraction)
+        store (FetchStore): Metadata store (default: the shared store)
+        **scrape_options: Extra keyword arguments for scrape_website
+    Returns:
+        dict: url, status ("not_modified", "unchanged", "changed" or "error"),
+            content, parsed, the list of skipped stages and, when extraction
+            ran, the chunk report from extract_incremental
+    """
+    store = store or get_fetch_store()
+    previous = store.get(url) or {}
+    result = {"url": url, "status": "changed", "content": None, "parsed": None, "skipped": []}
+
+    stats = {}
+    html = scrape_website(url, stats=stats, validators=previous, **scrape_options)
+    if stats.get("not_modified"):
+        store.touch(url)
+        result["status"] = "not_modified"
+        result["skipped"] = ["download", "clean", "extract"]
+        if parse_description and previous.get("fingerprint"):
+            result["parsed"] = store.get_extraction(url, parse_description, previous["fingerprint"])
+        return result
+    if not html:
+        result["status"] = "error"
+        return result
+
+    content = html_to_text(html)
+    page_fingerprint = fingerprint(content)
+    result["content"] = content
+    if page_fingerprint == previous.get("fingerprint"):
+        result["status"] = "unchanged"
+        result["skipped"].append("extract")
+
+    if parse_description:
+        parsed = store.get_extraction(url, parse_description, page_fingerprint)
+        if parsed is None:
+            if "extract" in result["skipped"]:
+                result["skipped"].remove("extract")
+            parsed, result["chunks"] = extract_incremental(url, content, parse_description, store=store)
+            # A partial (filtered) extraction is not cached for the whole page
+            if not result["chunks"]["skipped"]:
+                store.set_extraction(url, parse_description, page_fingerprint, parsed)
+        result["parsed"] = parsed
+
+    validators = stats.get("validators", {})
+    store.update(url, etag=validators.get("etag"), last_modified=validators.get("last_modified"),
+                 fingerprint=page_fingerprint)
+    return result
+
+
+def refresh_pages(urls, parse_description=None, store=None, **scrape_options):
+    """
+    Refresh several pages and summarize how much work was avoided.
+    Args:
+        urls (list): URLs to refresh
+        parse_description (str): What to extract with the LLM (None skips extraction)
+        store (FetchStore): Metadata store (default: the shared store)
+        **scrape_options: Extra keyword arguments for scrape_website
+    Returns:
+        tuple: (list of refresh_page results, summary dict counting each status)
+    """
+    results = []
+    summary = {"not_modified": 0, "unchanged": 0, "changed": 0, "error": 0}
+    for url in urls:
+        try:
+            result = refresh_page(url, parse_description, store=store, **scrape_options)
+        except Exception as e:
+            logger.error(f"Refresh failed for {url}: {str(e)}")
+            result = {"url": url, "status": "error", "content": None, "parsed": None, "skipped": []}
+        results.append(result)
+        summary[result["status"]] += 1
+    logger.info(f"Refreshed {len(results)} pages: {summary['not_modified']} not modified, "
+                f"{summary['unchanged']} unchanged, {summary['changed']} changed, {summary['error']} failed")
+    return results, summary
+
+
+def extract_incremental(url, content, parse_description, store=None, max_retries=3, concurrency=4,
+                        top_k=DEFAULT_TOP_K, min_score=DEFAULT_MIN_SCORE):
+    """
+    Extract from a page, re-using per-chunk results from its previous version.
+
+    Chunks found unchanged in the new text (see chunking.iter_chunks_reusing)
+    keep their stored results; only new or edited chunks are sent to the
+    LLM. The merged result is in page order, as with parse_with_ollama.
+
+    With the relevance pre-filter on, chunks are ranked against the whole
+    page. Changed chunks it rules out get an empty result but are not
+    stored, so the next refresh judges them again.
+
+    Args:
+        url (str): Page URL the content came from
+        content (str): Cleaned page text
+        parse_description (str): What to extract with the LLM
+        store (FetchStore): Metadata store (default: the shared store)
+        max_retries (int): Maximum number of retries per chunk
+        concurrency (int): Number of chunks sent to the model at once
+        top_k (int): Relevance pre-filter (see parse_with_ollama)
+        min_score (float): Relevance pre-filter threshold (see parse_with_ollama)
+    Returns:
+        tuple: (merged result, report dict with total, reused, extracted and
+            skipped (ruled out by the relevance filter) chunk counts)
+    """
+    store = store or get_fetch_store()
+    previous = store.get_chunks(url, parse_description)
+    plan = list(iter_chunks_reusing(content, previous))
+
+    results = [match["result"] if match else None for _, match in plan]
+    changed = [index for index, (_, match) in enumerate(plan) if match is None]
+    # Rank against every chunk of the page, not just the changed ones
+    relevant = set(prefilter_chunks([chunk for chunk, _ in plan], parse_description, top_k, min_score))
+    skipped = [index for index in changed if plan[index][0] not in relevant]
+    for index in skipped:
+        results[index] = ""
+    changed = [index for index in changed if plan[index][0] in relevant]
+    for position, result in iter_parse_with_ollama([plan[index][0] for index in changed], parse_description,
+                                                   max_retries=max_retries, concurrency=concurrency):
+        results[changed[position]] = result
+
+    # Failed and skipped chunks are not stored, so the next refresh tries them again
+    not_extracted = set(skipped)
+    store.set_chunks(url, parse_description, [
+        dict(chunk_signature(chunk), result=result)
+        for index, ((chunk, _), result) in enumerate(zip(plan, results))
+        if index not in not_extracted and not result.startswith(_LLM_ERROR)
+    ])
+
+    report = {"total": len(plan), "reused": len(plan) - len(changed) - len(skipped), "extracted": len(changed),
+              "skipped": len(skipped)}
+    logger.info(f"Incremental extraction for {url}: {report['extracted']}/{report['total']} chunks re-extracted, "
+                f"{report['skipped']} skipped as irrelevant")
+    return "\n".join(results), report
+
+
+def run_job_worker(queue=None, batch=None, worker_id=None, idle_timeout=0, poll_interval=1.0, **scrape_options):
+    """
+    Work through a JobQueue until it has nothing left to claim.
+
+    Each claimed job resumes at its last completed stage: pending jobs are
+    fetched, fetched ones cleaned, cleaned ones (with a description)
+    extracted. Every stage's output is saved before the next begins, so a
+    crash costs at most the stage that was running. Start this in several
+    processes to share a batch between them.
+
+    Args:
+        queue (JobQueue): Queue to work on (default: JobQueue() at JOB_QUEUE_PATH)
+        batch (str): Only work on this batch
+        worker_id (str): Id used for leases (default: host:pid)
+        idle_timeout (float): Keep polling this long for new jobs once the queue is empty
+        poll_interval (float): Seconds between polls while idle
+        **scrape_options: Extra keyword arguments for scrape_website
+    Returns:
+        dict: Number of jobs this worker finished and failed
+    """
+    queue = queue or JobQueue()
+    worker_id = worker_id or default_worker_id()
+    summary = {"finished": 0, "failed": 0}
+    idle_since = None
+
+    while True:
+        jobs = queue.claim(worker_id, batch=batch)
+        if not jobs:
+            idle_since = idle_since or time.monotonic()
+            if time.monotonic() - idle_since >= idle_timeout:
+                break
+            time.sleep(poll_interval)
+            continue
+        idle_since = None
+
+        job = jobs[0]
+        try:
+            if _run_job(queue, job, worker_id, scrape_options):
+                summary["finished"] += 1
+            else:
+                logger.warning(f"Lost the lease on {job['url']}; another worker took it over")
+        except Exception as e:
+            logger.error(f"Job failed for {job['url']} (attempt {job['attempts']}): {str(e)}")
+            queue.fail(job["id"], worker_id, str(e))
+            summary["failed"] += 1
+
+    logger.info(f"Worker {worker_id} done: {summary['finished']} finished, {summary['failed']} failed attempts")
+    return summary
+
+
+def _run_job(queue, job, worker_id, scrape_options):
+    """
+    Run the remaining stages of one claimed job.
+
+    The lease is renewed after every extracted chunk, so a long extraction
+    is not handed to another worker. A chunk whose LLM call failed fails
+    the whole attempt rather than saving the error as the job's result.
+
+    Returns:
+        bool: False if the lease was lost part-way
+    """
+    html, content = job["html"], job["content"]
+
+    if job["state"] == "fetching":
+        html = scrape_website(job["url"], **scrape_options)
+        if not html:
+            raise RuntimeError("empty response")
+        if not queue.advance(job["id"], worker_id, "fetched", html):
+            return False
+
+    if job["state"] in ("fetching", "fetched"):
+        content = html_to_text(html)
+        if not queue.advance(job["id"], worker_id, "cleaned", content):
+            return False
+
+    if job["description"]:
+        chunks = prefilter_chunks(list(iter_chunks(content)), job["description"])
+        results = [""] * len(chunks)
+        for index, result in iter_parse_with_ollama(chunks, job["description"]):
+            if result.startswith(_LLM_ERROR):
+                raise RuntimeError(f"chunk {index + 1}/{len(chunks)}: {result}")
+            results[index] = result
+            if not queue.renew(job["id"], worker_id):
+                return False
+        if not queue.advance(job["id"], worker_id, "extracted", "\n".join(results)):
+            return False
+    return True
+
+
+def crawl_and_extract(start_urls, parse_description, llm_concurrency=4, main_content=True, site=None,
+                      **crawl_options):
+    """
+    Crawl a site and run the same extraction on every page it reaches.
+
+    Extraction for one page overlaps with fetching the next ones, since
+    the crawler's workers keep running while results are being parsed.
+    Only each page's main content is extracted from, minus the lines the
+    site repeats on every page.
+
+    Args:
+        start_urls (str or list): Where to start crawling
+        parse_description (str): What to extract from each page
+        llm_concurrency (int): Chunks of one page sent to the model at once
+        main_content (bool): Keep only the main content of each page
+        site (SiteBoilerplate): Cross-page boilerplate state (default: a new one)
+        **crawl_options: Keyword arguments for crawler.crawl (max_pages, max_depth, ...)
+    Yields:
+        dict: url, depth, status, parsed result, reduction report and relevance
+            filter report of each crawled page
+    """
+    site = site if site is not None else SiteBoilerplate()
+    reports = []
+    for page in crawl(start_urls, **crawl_options):
+        parsed = reduction = relevance = None
+        if page["html"]:
+            content, reduction = clean_page(page["html"], page["url"], site=site, main_content=main_content)
+            reports.append(reduction)
+            if content:
+                parse_stats = {}
+                parsed = parse_with_ollama(list(iter_chunks(content)), parse_description,
+                                           concurrency=llm_concurrency, stats=parse_stats)
+                relevance = parse_stats.get("relevance")
+        yield {"url": page["url"], "depth": page["depth"], "status": page["status"], "parsed": parsed,
+               "reduction": reduction, "relevance": relevance}
+    _log_reduction(reports)
+
+
+def _log_reduction(reports):
+    """Log how much text boilerplate removal kept away from the LLM."""
+    total = summarize_reports(reports)
+    if total["pages"]:
+        logger.info(f"Boilerplate removal: {total['text_chars']} -> {total['final_chars']} chars "
+                    f"over {total['pages']} pages ({total['reduction']:.0%} less LLM input)")
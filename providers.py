@@ -0,0 +1,95 @@
+"""
+Lazy registry of LLM clients.
+
+Provider SDKs (langchain, openai, cohere, groq) are only imported and their
+clients only constructed the first time they are requested. Clients are
+cached per process, so forked workers build their own instead of sharing
+connections with the parent.
+"""
+import logging
+import os
+import threading
+
+from dotenv import load_dotenv
+from chunking import CONTEXT_WINDOWS
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+# Default models, also part of the LLM cache keys
+OLLAMA_MODEL_NAME = "llama3"
+GROQ_MODEL_NAME = "llama3-70b-8192"
+
+_factories = {}
+_clients = {}
+_lock = threading.Lock()
+
+
+def register_provider(name, factory):
+    """
+    Register (or replace) the factory that builds a provider's client.
+    Args:
+        name (str): Provider name
+        factory (callable): Zero-argument function returning the client
+    """
+    with _lock:
+        _factories[name] = factory
+        _clients.pop(name, None)
+
+
+def get_client(name):
+    """
+    Get a provider's client, importing and constructing it on first use.
+    Args:
+        name (str): Provider name ("ollama", "groq", "cohere", "openai", ...)
+    Returns:
+        object: The cached client for this process
+    """
+    pid = os.getpid()
+    with _lock:
+        cached = _clients.get(name)
+        if cached is not None and cached[0] == pid:
+            return cached[1]
+        factory = _factories.get(name)
+        if factory is None:
+            raise KeyError(f"Unknown LLM provider: {name}")
+        logger.debug(f"Initializing {name} client")
+        client = factory()
+        _clients[name] = (pid, client)
+        return client
+
+
+def _ollama():
+    from langchain_ollama import OllamaLLM
+    return OllamaLLM(model=OLLAMA_MODEL_NAME, num_ctx=CONTEXT_WINDOWS[OLLAMA_MODEL_NAME])
+
+
+def _ollama_json():
+    # Same model constrained to emit JSON, for keyed multi-description extraction
+    from langchain_ollama import OllamaLLM
+    return OllamaLLM(model=OLLAMA_MODEL_NAME, num_ctx=CONTEXT_WINDOWS[OLLAMA_MODEL_NAME], format="json")
+
+
+def _groq():
+    from groq import Groq
+    return Groq(api_key=os.getenv("GROQ_API_KEY"))
+
+
+def _cohere():
+    import cohere
+    return cohere.Client(api_key=os.getenv("COHERE_API_KEY"))
+
+
+def _openai():
+    from openai import OpenAI
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+register_provider("ollama", _ollama)
+register_provider("ollama_json", _ollama_json)
+register_provider("groq", _groq)
+register_provider("cohere", _cohere)
+register_provider("openai", _openai)
@@ -0,0 +1,279 @@
+"""
+Rotating proxy pool with per-proxy health scoring.
+
+Requests are spread over every healthy proxy, preferring the ones with
+the fewest requests in flight, the lowest latency and the fewest recent
+errors. Proxies that are refused outright (HTTP 407), keep failing or are
+persistently slow are ejected for a cooldown that doubles each time they
+are ejected again, then put back on probation.
+
+Proxies come from PROXY_SERVERS (comma-separated), PROXY_LIST_FILE (one
+per line) or, for backwards compatibility, the single PROXY_SERVER.
+"""
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+import logging
+import os
+import random
+import threading
+import time
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_COOLDOWN = float(os.getenv("PROXY_COOLDOWN", "60"))
+DEFAULT_MAX_LATENCY = float(os.getenv("PROXY_MAX_LATENCY", "10"))
+DEFAULT_MAX_ERROR_RATE = float(os.getenv("PROXY_MAX_ERROR_RATE", "0.5"))
+
+# Status codes that mean the proxy itself is refused
+BAN_STATUSES = (407,)
+# Status codes that may only mean one site blocks or throttles this proxy;
+# they count as failures, so a proxy is ejected once they keep coming
+FAILURE_STATUSES = (403, 429)
+
+# Latency assumed for proxies when none has been measured yet
+_INITIAL_LATENCY = 1.0
+_EWMA_ALPHA = 0.2
+_MAX_CONSECUTIVE_FAILURES = 3
+_MIN_SAMPLES = 5
+
+
+class _ProxyState:
+    """Health bookkeeping for one proxy."""
+
+    def __init__(self, proxy):
+        self.proxy = proxy
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.samples = 0
+        self.latency = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.cooldown_until = 0.0
+
+    def score(self, default_latency):
+        """Lower is better: expected wait, inflated by recent errors."""
+        latency = self.latency if self.latency is not None else default_latency
+        return (self.in_flight + 1) * latency * (1 + 4 * self.error_rate)
+
+    def snapshot(self, now):
+        return {
+            "proxy": self.proxy,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "ejections": self.ejections,
+            "cooling_for": round(max(0.0, self.cooldown_until - now), 1),
+        }
+
+
+class ProxyPool:
+    """
+    Pool of proxies handed out per request (or per host with ``sticky_hosts``).
+    """
+
+    def __init__(self, proxies, cooldown=DEFAULT_COOLDOWN, max_latency=DEFAULT_MAX_LATENCY,
+                 max_error_rate=DEFAULT_MAX_ERROR_RATE, sticky_hosts=False):
+        """
+        Args:
+            proxies (list): Proxy addresses ("host:port" or "http://host:port")
+            cooldown (float): Seconds a proxy sits out after its first ejection
+            max_latency (float): Eject proxies whose average latency exceeds this
+                (and is several times that of the fastest healthy proxy)
+            max_error_rate (float): Eject proxies whose recent error rate exceeds this
+            sticky_hosts (bool): Keep using the same proxy for a host while it stays healthy
+        """
+        proxies = list(dict.fromkeys(proxy.strip() for proxy in proxies if proxy and proxy.strip()))
+        if not proxies:
+            raise ValueError("ProxyPool needs at least one proxy")
+        self.cooldown = cooldown
+        self.max_latency = max_latency
+        self.max_error_rate = max_error_rate
+        self.sticky_hosts = sticky_hosts
+        self._states = {proxy: _ProxyState(proxy) for proxy in proxies}
+        self._hosts = {}
+        self._warned_until = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._states)
+
+    @property
+    def proxies(self):
+        """All proxy addresses in the pool, healthy or not."""
+        return list(self._states)
+
+    def acquire(self, url=None):
+        """
+        Pick a proxy for a request.
+
+        If every proxy is cooling down, the one whose cooldown ends first is
+        used rather than failing the request.
+
+        Args:
+            url (str): URL about to be requested (used for per-host stickiness)
+        Returns:
+            str: Proxy address
+        """
+        host = (urlsplit(url).hostname or "") if url else ""
+        now = time.monotonic()
+        with self._lock:
+            available = [state for state in self._states.values() if state.cooldown_until <= now]
+            state = None
+            if self.sticky_hosts and host:
+                sticky = self._states.get(self._hosts.get(host))
+                if sticky is not None and sticky in available:
+                    state = sticky
+            if state is None and available:
+                # Unmeasured proxies are assumed as fast as the fastest one, so each gets tried
+                measured = [candidate.latency for candidate in available if candidate.latency is not None]
+                default_latency = min(measured) if measured else _INITIAL_LATENCY
+                scores = [(candidate.score(default_latency), candidate) for candidate in available]
+                best = min(score for score, _ in scores)
+                # Random among near-equal candidates so load spreads evenly
+                state = random.choice([candidate for score, candidate in scores if score <= best * 1.1])
+            if state is None:
+                state = min(self._states.values(), key=lambda candidate: candidate.cooldown_until)
+                if now >= self._warned_until:
+                    self._warned_until = state.cooldown_until
+                    logger.warning(f"All proxies are cooling down; using {state.proxy}")
+            if self.sticky_hosts and host:
+                self._hosts[host] = state.proxy
+            state.in_flight += 1
+            state.requests += 1
+            return state.proxy
+
+    def report(self, proxy, ok, latency=None, status=None):
+        """
+        Record the outcome of a request made through a proxy.
+        Args:
+            proxy (str): Proxy returned by acquire
+            ok (bool): Whether the request succeeded
+            latency (float): Seconds the request took
+            status (int): HTTP status, if known (407 ejects the proxy at once,
+                403/429 count as failures)
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.get(proxy)
+            if state is None:
+                return
+            state.in_flight = max(0, state.in_flight - 1)
+            state.samples += 1
+            banned = status in BAN_STATUSES
+            failed = banned or not ok or status in FAILURE_STATUSES
+            state.error_rate += _EWMA_ALPHA * ((1.0 if failed else 0.0) - state.error_rate)
+            if failed:
+                state.failures += 1
+                state.consecutive_failures += 1
+            else:
+                state.consecutive_failures = 0
+            if latency is not None and not failed:
+                state.latency = latency if state.latency is None else (
+                    state.latency + _EWMA_ALPHA * (latency - state.latency))
+
+            reason = None
+            if banned:
+                reason = f"HTTP {status}"
+            elif state.consecutive_failures >= _MAX_CONSECUTIVE_FAILURES:
+                reason = f"{state.consecutive_failures} failures in a row"
+            elif state.samples >= _MIN_SAMPLES and state.error_rate > self.max_error_rate:
+                reason = f"error rate {state.error_rate:.0%}"
+            elif state.samples >= _MIN_SAMPLES and self._too_slow(state, now):
+                reason = f"latency {state.latency:.1f}s"
+            if reason and state.cooldown_until <= now:
+                self._eject(state, reason, now)
+
+    def _too_slow(self, state, now):
+        """
+        Slow means over max_latency and well behind the fastest healthy peer.
+        Latency includes time queued behind our own requests, so a proxy is
+        never ejected for slowness when there is nothing faster to use.
+        """
+        if state.latency is None or state.latency <= self.max_latency:
+            return False
+        peers = [peer.latency for peer in self._states.values()
+                 if peer is not state and peer.latency is not None and peer.cooldown_until <= now]
+        return bool(peers) and state.latency > 3 * min(peers)
+
+    def _eject(self, state, reason, now):
+        state.ejections += 1
+        cooldown = min(self.cooldown * 2 ** (state.ejections - 1), self.cooldown * 16)
+        state.cooldown_until = now + cooldown
+        # Back on probation afterwards: judged on fresh samples
+        state.samples = 0
+        state.error_rate = 0.0
+        state.consecutive_failures = 0
+        state.latency = None
+        for host in [host for host, proxy in self._hosts.items() if proxy == state.proxy]:
+            del self._hosts[host]
+        logger.warning(f"Ejecting proxy {state.proxy} for {cooldown:.0f}s: {reason}")
+
+    @contextmanager
+    def lease(self, url=None):
+        """
+        Context manager that picks a proxy and reports the outcome: a failure
+        if the block raises, a success with the elapsed time otherwise.
+        Args:
+            url (str): URL about to be requested
+        Yields:
+            str: Proxy address
+        """
+        proxy = self.acquire(url)
+        started = time.monotonic()
+        try:
+            yield proxy
+        except Exception:
+            self.report(proxy, False, time.monotonic() - started)
+            raise
+        self.report(proxy, True, time.monotonic() - started)
+
+    def stats(self):
+        """
+        Describe every proxy's health.
+        Returns:
+            list: One dict per proxy with in_flight, requests, failures,
+                latency, error_rate, ejections and cooling_for (seconds)
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [state.snapshot(now) for state in self._states.values()]
+
+
+def load_proxies():
+    """
+    Read the configured proxy list from the environment.
+    Returns:
+        list: Proxy addresses (empty if none are configured)
+    """
+    proxies = [proxy for proxy in os.getenv("PROXY_SERVERS", "").split(",") if proxy.strip()]
+    list_file = os.getenv("PROXY_LIST_FILE")
+    if list_file and os.path.exists(list_file):
+        with open(list_file, "r", encoding="utf-8") as f:
+            proxies.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    if not proxies and os.getenv("PROXY_SERVER"):
+        proxies.append(os.getenv("PROXY_SERVER"))
+    return proxies
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_proxy_pool():
+    """
+    Get the process-wide proxy pool built from the environment.
+    Returns:
+        ProxyPool: The shared pool, or None if no proxies are configured
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            proxies = load_proxies()
+            if proxies:
+                _pool = ProxyPool(proxies, sticky_hosts=os.getenv("PROXY_STICKY_HOSTS", "").lower() in ("1", "true"))
+        return _pool
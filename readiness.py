@@ -0,0 +1,191 @@
+import time
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Available readiness strategies
+STRATEGIES = ("ready_state", "network_idle", "dom_quiet", "selector")
+
+# Injected before any page script runs: counts in-flight fetch/XHR requests
+# and records the time of the last network event and the last DOM mutation.
+_PROBE_JS = """
+(function () {
+    if (window.__isProbe) { return; }
+    var probe = window.__isProbe = {pending: 0, lastNet: Date.now(), lastMutation: Date.now()};
+    function start() { probe.pending++; probe.lastNet = Date.now(); }
+    function end() { probe.pending = Math.max(0, probe.pending - 1); probe.lastNet = Date.now(); }
+    if (window.fetch) {
+        var originalFetch = window.fetch;
+        window.fetch = function () {
+            start();
+            return originalFetch.apply(this, arguments).finally(end);
+        };
+    }
+    var originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        start();
+        this.addEventListener("loadend", end);
+        return originalSend.apply(this, arguments);
+    };
+    new MutationObserver(function () { probe.lastMutation = Date.now(); })
+        .observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+})();
+"""
+
+# Snapshot of the page state polled by wait_until_ready
+_SNAPSHOT_JS = """
+var probe = window.__isProbe;
+var now = Date.now();
+return {
+    readyState: document.readyState,
+    resources: performance.getEntriesByType("resource").length,
+    nodes: document.getElementsByTagName("*").length,
+    probe: !!probe,
+    pending: probe ? probe.pending : 0,
+    sinceNet: probe ? (now - probe.lastNet) / 1000 : null,
+    sinceMutation: probe ? (now - probe.lastMutation) / 1000 : null,
+    matched: arguments[0] ? !!document.querySelector(arguments[0]) : false
+};
+"""
+
+
+def install_probes(driver):
+    """
+    Register the network/DOM probes so they run on every new document.
+    Only Chromium drivers support this; others fall back to polling.
+    Probes are per tab, so this is needed once for each window handle.
+    Args:
+        driver (WebDriver): The browser to instrument (its current tab)
+    Returns:
+        bool: Whether the probes are installed
+    """
+    installed_tabs = getattr(driver, "_readiness_probes", None)
+    if installed_tabs is None:
+        installed_tabs = driver._readiness_probes = {}
+    try:
+        handle = driver.current_window_handle
+    except Exception:
+        handle = None
+    if handle in installed_tabs:
+        return installed_tabs[handle]
+    try:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": _PROBE_JS})
+        installed = True
+    except Exception as e:
+        logger.debug(f"Readiness probes unavailable, falling back to polling: {str(e)}")
+        installed = False
+    installed_tabs[handle] = installed
+    return installed
+
+
+class ReadinessTracker:
+    """
+    Non-blocking readiness check for one page load. Call check() as often
+    as convenient (e.g. while round-robining over several tabs); it keeps
+    the activity history that the quiet-period strategies need.
+    """
+
+    def __init__(self, strategy="network_idle", selector=None, quiet_period=0.5):
+        """
+        Args:
+            strategy (str or callable): Readiness strategy (see wait_until_ready)
+            selector (str): CSS selector for the "selector" strategy
+            quiet_period (float): Seconds of inactivity that count as idle
+        """
+        if not callable(strategy) and strategy not in STRATEGIES:
+            raise ValueError(f"Unknown readiness strategy: {strategy}")
+        if strategy == "selector" and not selector:
+            raise ValueError("The 'selector' readiness strategy needs a CSS selector")
+        self.strategy = strategy
+        self.selector = selector
+        self.quiet_period = quiet_period
+        self.started = time.monotonic()
+        self._last_resources = self._last_nodes = None
+        self._resources_changed = self._nodes_changed = self.started
+
+    @property
+    def name(self):
+        return getattr(self.strategy, "__name__", self.strategy)
+
+    def check(self, driver):
+        """
+        Poll the page once.
+        Args:
+            driver (WebDriver): The browser, switched to the tab being tracked
+        Returns:
+            bool: Whether the page is ready
+        """
+        now = time.monotonic()
+        try:
+            if callable(self.strategy):
+                return bool(self.strategy(driver))
+            state = driver.execute_script(_SNAPSHOT_JS, self.selector)
+
+            # Also track activity by polling counters, for pages without the probe
+            if state["resources"] != self._last_resources:
+                self._last_resources, self._resources_changed = state["resources"], now
+            if state["nodes"] != self._last_nodes:
+                self._last_nodes, self._nodes_changed = state["nodes"], now
+
+            return _is_ready(self.strategy, state, now - self._resources_changed, now - self._nodes_changed,
+                             self.quiet_period)
+        except Exception as e:
+            logger.debug(f"Readiness check failed: {str(e)}")
+            return False
+
+
+def wait_until_ready(driver, strategy="network_idle", selector=None, max_wait=10, quiet_period=0.5, poll_interval=0.1):
+    """
+    Wait until the current page is ready according to a strategy.
+
+    Strategies:
+        ready_state:  document.readyState is "complete"
+        network_idle: page loaded and no fetch/XHR/resource activity for quiet_period
+        dom_quiet:    no DOM mutations for quiet_period
+        selector:     an element matching the CSS selector is present
+    A callable taking the driver and returning a bool may also be passed.
+
+    Args:
+        driver (WebDriver): The browser to wait on
+        strategy (str or callable): Readiness strategy
+        selector (str): CSS selector for the "selector" strategy
+        max_wait (float): Hard upper bound on the wait in seconds
+        quiet_period (float): Seconds of inactivity that count as idle
+        poll_interval (float): Seconds between checks
+    Returns:
+        dict: {"strategy", "waited", "timed_out"} with waited in seconds
+    """
+    tracker = ReadinessTracker(strategy, selector, quiet_period)
+    deadline = tracker.started + max_wait
+    timed_out = False
+
+    while not tracker.check(driver):
+        now = time.monotonic()
+        if now >= deadline:
+            timed_out = True
+            break
+        time.sleep(min(poll_interval, max(0, deadline - now)))
+
+    waited = round(time.monotonic() - tracker.started, 3)
+    if timed_out:
+        logger.info(f"Readiness '{tracker.name}' timed out after {waited}s")
+    return {"strategy": tracker.name, "waited": waited, "timed_out": timed_out}
+
+
+def _is_ready(strategy, state, since_resources, since_nodes, quiet_period):
+    """Evaluate one strategy against a page snapshot."""
+    if strategy == "selector":
+        return state["matched"]
+    if strategy == "ready_state":
+        return state["readyState"] == "complete"
+    if strategy == "dom_quiet":
+        if state["readyState"] == "loading":
+            return False
+        since_mutation = state["sinceMutation"] if state["probe"] else since_nodes
+        return since_mutation >= quiet_period
+    # network_idle
+    if state["readyState"] != "complete" or state["pending"]:
+        return False
+    since_net = min(state["sinceNet"], since_resources) if state["probe"] else since_resources
+    return since_net >= quiet_period
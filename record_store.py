@@ -0,0 +1,244 @@
+"""
+Append-only, deduplicated storage for scraped and parsed data.
+
+Content is addressed by its SHA-256 hash: identical payloads are stored
+once, however many times they are saved. Each distinct payload is
+compressed (zstd if the ``zstandard`` package is installed, gzip
+otherwise) and appended to the current segment file. A SQLite index maps
+each saved name to its payload's segment, offset and length, so a lookup
+is a single indexed query plus one seek and read.
+"""
+import gzip
+import hashlib
+import importlib.util
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# zstandard is optional; gzip is always available
+HAS_ZSTD = importlib.util.find_spec("zstandard") is not None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = os.getenv("DATA_STORE_PATH", "data/store")
+SEGMENT_MAX_BYTES = int(os.getenv("DATA_STORE_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+
+
+def _compress(data):
+    """Compress a payload, returning (codec, bytes)."""
+    if HAS_ZSTD:
+        import zstandard
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(data)
+    return "gzip", gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def _decompress(codec, data):
+    """Decompress a payload written by _compress."""
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "gzip":
+        return gzip.decompress(data)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def normalize_key(filename, folder="data"):
+    """
+    Build the store key for a file name, matching the path utils used to write.
+    Args:
+        filename (str): Name of the file
+        folder (str): Folder the file belongs to
+    Returns:
+        str: Key such as "data/raw_data/scraped_20250308_230842.txt"
+    """
+    return os.path.normpath(os.path.join(folder, filename)).replace(os.sep, "/")
+
+
+class RecordStore:
+    """
+    Content-addressed record store: compressed segment files plus a SQLite index.
+
+    ``blobs`` holds one row per distinct payload (hash, segment, offset,
+    length, codec, size). ``records`` holds one row per save (key, url,
+    created_at, hash), so saving the same content twice costs one index row.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, segment_max_bytes=SEGMENT_MAX_BYTES):
+        """
+        Args:
+            path (str): Directory holding the segment files and index.sqlite
+            segment_max_bytes (int): Start a new segment file after this size
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.segment_max_bytes = segment_max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(path, "index.sqlite"), check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                " hash TEXT PRIMARY KEY,"
+                " segment INTEGER NOT NULL,"
+                " offset INTEGER NOT NULL,"
+                " length INTEGER NOT NULL,"
+                " codec TEXT NOT NULL,"
+                " size INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " key TEXT NOT NULL,"
+                " url TEXT,"
+                " created_at REAL NOT NULL,"
+                " hash TEXT NOT NULL REFERENCES blobs(hash))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS records_key ON records (key, id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS records_url ON records (url, id)")
+
+    def _segment_path(self, segment):
+        return os.path.join(self.path, f"segment_{segment:05d}.seg")
+
+    def _append(self, payload):
+        """Append a compressed payload to the current segment; return (segment, offset)."""
+        row = self._conn.execute("SELECT MAX(segment) FROM blobs").fetchone()
+        segment = row[0] if row[0] is not None else 0
+        segment_path = self._segment_path(segment)
+        if os.path.exists(segment_path) and os.path.getsize(segment_path) + len(payload) > self.segment_max_bytes:
+            segment += 1
+            segment_path = self._segment_path(segment)
+        with open(segment_path, "ab") as f:
+            offset = f.tell()
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        return segment, offset
+
+    def put(self, data, key, url=None, created_at=None):
+        """
+        Save a payload under a key, storing its content only if it is new.
+        Args:
+            data (str or bytes): Payload (str is stored as UTF-8)
+            key (str): Name to save it under (see normalize_key)
+            url (str): Optional source URL, for lookup by URL
+            created_at (float): Optional timestamp (default: now)
+        Returns:
+            str: Content hash of the payload
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        codec, payload = _compress(data)
+        with self._lock:
+            # The IMMEDIATE transaction holds SQLite's write lock across processes,
+            # so the segment append and its index row cannot interleave with
+            # another writer's (which would record the wrong offset)
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                exists = self._conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone()
+                if not exists:
+                    segment, offset = self._append(payload)
+                    self._conn.execute(
+                        "INSERT INTO blobs (hash, segment, offset, length, codec, size) VALUES (?, ?, ?, ?, ?, ?)",
+                        (digest, segment, offset, len(payload), codec, len(data)),
+                    )
+                self._conn.execute(
+                    "INSERT INTO records (key, url, created_at, hash) VALUES (?, ?, ?, ?)",
+                    (key, url, created_at if created_at is not None else time.time(), digest),
+                )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        return digest
+
+    def _read(self, row):
+        with open(self._segment_path(row["segment"]), "rb") as f:
+            f.seek(row["offset"])
+            return _decompress(row["codec"], f.read(row["length"]))
+
+    def _latest(self, column, value):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT b.segment, b.offset, b.length, b.codec FROM records r JOIN blobs b ON b.hash = r.hash"
+                f" WHERE r.{column} = ? ORDER BY r.id DESC LIMIT 1",
+                (value,),
+            ).fetchone()
+
+    def get(self, key):
+        """
+        Load the latest payload saved under a key.
+        Args:
+            key (str): Name it was saved under
+        Returns:
+            bytes: The payload, or None if the key is unknown
+        """
+        row = self._latest("key", key)
+        return self._read(row) if row else None
+
+    def get_by_url(self, url):
+        """
+        Load the latest payload saved for a source URL.
+        Args:
+            url (str): Source URL
+        Returns:
+            bytes: The payload, or None if nothing was saved for it
+        """
+        row = self._latest("url", url)
+        return self._read(row) if row else None
+
+    def contains(self, key):
+        """Return whether anything has been saved under a key."""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM records WHERE key = ? LIMIT 1", (key,)).fetchone() is not None
+
+    def keys(self, prefix=""):
+        """
+        List the distinct keys saved so far.
+        Args:
+            prefix (str): Only return keys starting with this prefix
+        Returns:
+            list: Keys in the order they were first saved
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM records WHERE substr(key, 1, ?) = ? GROUP BY key ORDER BY MIN(id)",
+                (len(prefix), prefix),
+            ).fetchall()
+        return [row["key"] for row in rows]
+
+    def stats(self):
+        """
+        Summarize the store.
+        Returns:
+            dict: records, blobs, raw_bytes (of distinct payloads), stored_bytes
+                (compressed) and segments
+        """
+        with self._lock:
+            records = self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+            blobs, raw_bytes, stored_bytes, segments = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(length), 0), COUNT(DISTINCT segment) FROM blobs"
+            ).fetchone()
+        return {"records": records, "blobs": blobs, "raw_bytes": raw_bytes,
+                "stored_bytes": stored_bytes, "segments": segments}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_record_store():
+    """
+    Get the process-wide record store.
+    Returns:
+        RecordStore: The shared store
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = RecordStore()
+        return _store
@@ -0,0 +1,186 @@
+from collections import Counter
+import importlib.util
+import logging
+import math
+import os
+import re
+
+# NumPy is optional; it is only needed (and only imported) for the "tfidf" method
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+
+def _env_number(name, default, cast):
+    value = os.getenv(name, default).strip().lower()
+    return None if value in ("", "off", "none") else cast(value)
+
+
+# Opt-in pre-filter applied before chunks are sent to the LLM (off unless one is set)
+DEFAULT_MIN_SCORE = _env_number("RELEVANCE_MIN_SCORE", "off", float)
+DEFAULT_TOP_K = _env_number("RELEVANCE_TOP_K", "off", int)
+DEFAULT_METHOD = os.getenv("RELEVANCE_METHOD", "bm25")
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with "
+    "what which who whom how all any each me my our your their them they we you i do does did".split()
+)
+
+
+def tokenize(text):
+    """
+    Split text into lower-case word tokens, dropping stopwords.
+    Args:
+        text (str): Text to tokenize
+    Returns:
+        list: Tokens
+    """
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def bm25_scores(chunks, query, k1=1.5, b=0.75):
+    """
+    Score chunks against a query with Okapi BM25.
+    Args:
+        chunks (list): Text chunks
+        query (str): Query text
+        k1 (float): Term-frequency saturation
+        b (float): Length normalization
+    Returns:
+        list: One score per chunk
+    """
+    documents = [Counter(tokenize(chunk)) for chunk in chunks]
+    query_terms = set(tokenize(query))
+    if not documents or not query_terms:
+        return [0.0] * len(documents)
+
+    lengths = [sum(document.values()) for document in documents]
+    average_length = (sum(lengths) / len(lengths)) or 1.0
+    total = len(documents)
+
+    idf = {}
+    for term in query_terms:
+        frequency = sum(1 for document in documents if term in document)
+        idf[term] = math.log((total - frequency + 0.5) / (frequency + 0.5) + 1)
+
+    scores = []
+    for document, length in zip(documents, lengths):
+        score = 0.0
+        for term in query_terms:
+            tf = document.get(term, 0)
+            if tf:
+                score += idf[term] * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average_length))
+        scores.append(score)
+    return scores
+
+
+def tfidf_scores(chunks, query):
+    """
+    Score chunks against a query by TF-IDF cosine similarity (vectorized with NumPy).
+    Args:
+        chunks (list): Text chunks
+        query (str): Query text
+    Returns:
+        list: One score per chunk
+    """
+    if not HAS_NUMPY:
+        raise ImportError("The 'tfidf' relevance method requires numpy")
+    import numpy as np
+
+    documents = [tokenize(chunk) for chunk in chunks]
+    query_terms = tokenize(query)
+    vocabulary = {term: i for i, term in enumerate(sorted(set(query_terms)))}
+    if not documents or not vocabulary:
+        return [0.0] * len(documents)
+
+    # Only query terms contribute to the dot product, so the matrix is chunks x query terms
+    counts = np.zeros((len(documents), len(vocabulary)))
+    norms = np.zeros(len(documents))
+    document_frequency = Counter(term for document in documents for term in set(document))
+    for row, document in enumerate(documents):
+        frequencies = Counter(document)
+        weights = {term: tf * math.log((1 + len(documents)) / (1 + document_frequency[term])) + tf
+                   for term, tf in frequencies.items()}
+        norms[row] = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+        for term, column in vocabulary.items():
+            counts[row, column] = weights.get(term, 0.0)
+
+    query_vector = np.zeros(len(vocabulary))
+    for term in query_terms:
+        query_vector[vocabulary[term]] += 1.0
+    query_vector /= np.linalg.norm(query_vector)
+
+    return ((counts @ query_vector) / norms).tolist()
+
+
+def filter_chunks(chunks, query, top_k=None, min_score=None, method="bm25", drop_unmatched=False):
+    """
+    Keep only the chunks most relevant to a query, in document order.
+
+    Chunks that share no word with the query are kept unless
+    ``drop_unmatched`` is set: the data asked for often does not repeat the
+    query's words (addresses for "email addresses", "$19.99" for "prices"),
+    so the ranking cannot judge them. ``top_k`` is a hard cap, filled with
+    the best-scoring chunks first.
+
+    Args:
+        chunks (list): Text chunks
+        query (str): Query text (e.g. the parse description)
+        top_k (int): Keep at most this many chunks
+        min_score (float): Drop matching chunks scoring below this fraction (0-1) of the best score
+        method (str): "bm25" or "tfidf"
+        drop_unmatched (bool): Also drop chunks that share no word with the query
+    Returns:
+        tuple: (selected chunks, report dict with total, kept and skipped counts)
+    """
+    chunks = list(chunks)
+    if method == "tfidf":
+        scores = tfidf_scores(chunks, query)
+    elif method == "bm25":
+        scores = bm25_scores(chunks, query)
+    else:
+        raise ValueError(f"Unknown relevance method: {method}")
+
+    best = max(scores, default=0.0)
+    if best <= 0:
+        # Nothing matches, so the ranking cannot tell the chunks apart
+        selected = list(range(len(chunks)))
+    else:
+        floor = best * min_score if min_score else 0.0
+        selected = [i for i, score in enumerate(scores)
+                    if (score >= floor if score > 0 else not drop_unmatched)]
+        if top_k is not None:
+            selected = sorted(sorted(selected, key=lambda i: scores[i], reverse=True)[:top_k])
+
+    report = {"total": len(chunks), "kept": len(selected), "skipped": len(chunks) - len(selected)}
+    logger.info(f"Relevance filter kept {report['kept']}/{report['total']} chunks "
+                f"({report['skipped']} LLM calls saved)")
+    return [chunks[i] for i in selected], report
+
+
+def prefilter_chunks(chunks, query, top_k=DEFAULT_TOP_K, min_score=DEFAULT_MIN_SCORE, method=DEFAULT_METHOD,
+                     stats=None, drop_unmatched=False):
+    """
+    Apply the configured relevance pre-filter before an LLM pass.
+    Args:
+        chunks (list): Text chunks
+        query (str): Query text (e.g. the parse description)
+        top_k (int): Keep at most this many chunks (default: RELEVANCE_TOP_K, off)
+        min_score (float): Minimum fraction of the best score (default: RELEVANCE_MIN_SCORE, off)
+        method (str): "bm25" or "tfidf" (default: RELEVANCE_METHOD)
+        stats (dict): Optional dict whose "relevance" key receives the filter report
+        drop_unmatched (bool): Also drop chunks sharing no word with the query (see filter_chunks)
+    Returns:
+        list: Chunks to send to the model, in document order (all of them if
+            both top_k and min_score are None)
+    """
+    chunks = list(chunks)
+    if top_k is None and min_score is None:
+        return chunks
+    selected, report = filter_chunks(chunks, query, top_k, min_score, method, drop_unmatched)
+    if stats is not None:
+        stats["relevance"] = report
+    return selected
@@ -0,0 +1,230 @@
+"""
+Resource-blocking browser profiles.
+
+We only keep the page's text, so images, fonts, stylesheets, media and
+ad/analytics requests are wasted time and bandwidth. A profile lists the
+kinds of resources to block; requests matching them are cancelled by
+Chrome before they are sent (CDP ``Network.setBlockedURLs``). The patterns
+are set before every navigation, so per-domain allowlists can re-enable a
+kind for sites that need it. Chrome applies the list to the page request
+too, so patterns matching the page URL itself (a tracker vendor's own
+site, a URL ending in ".css") are left out for that page.
+
+Blocked and loaded requests are read back from Chrome's performance log,
+giving per-page counts of requests avoided and bytes actually loaded.
+Blocked requests never transfer anything, so bytes avoided are estimated
+from typical sizes per resource type.
+"""
+import json
+import logging
+import os
+import re
+from urllib.parse import urlsplit
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# URL patterns per resource kind ("*" matches anything, including query strings)
+_EXTENSIONS = {
+    "image": ("png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp"),
+    "font": ("woff", "woff2", "ttf", "otf", "eot"),
+    "stylesheet": ("css",),
+    "media": ("mp4", "webm", "ogg", "mp3", "wav", "m4a", "mov", "m3u8"),
+}
+TRACKER_HOSTS = (
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "google-analytics.com",
+    "googletagmanager.com", "googletagservices.com", "adservice.google.com", "connect.facebook.net",
+    "amazon-adsystem.com", "scorecardresearch.com", "hotjar.com", "segment.io", "cdn.segment.com",
+    "criteo.com", "criteo.net", "taboola.com", "outbrain.com", "adnxs.com", "quantserve.com",
+    "newrelic.com", "nr-data.net", "optimizely.com", "mixpanel.com", "clarity.ms", "bat.bing.com",
+)
+
+KINDS = tuple(_EXTENSIONS) + ("trackers",)
+
+PROFILES = {
+    "full": frozenset(),
+    "text": frozenset(KINDS),
+}
+DEFAULT_PROFILE = os.getenv("BROWSER_PROFILE", "text")
+
+# Typical transfer sizes per CDP resource type, for the bytes-avoided estimate
+_TYPICAL_BYTES = {
+    "Image": 30_000, "Font": 40_000, "Stylesheet": 20_000, "Media": 500_000, "Script": 25_000,
+}
+_DEFAULT_TYPICAL_BYTES = 10_000
+
+
+def _on_host(host, domain):
+    return host == domain or host.endswith("." + domain)
+
+
+def _patterns(kind, page_host):
+    if kind == "trackers":
+        # Anchored on a dot so criteo.com does not match mycriteo.com; a tracker's own site is never blocked
+        return [pattern for domain in TRACKER_HOSTS if not _on_host(page_host, domain)
+                for pattern in (f"*://{domain}/*", f"*://*.{domain}/*")]
+    return [pattern for extension in _EXTENSIONS[kind] for pattern in (f"*.{extension}", f"*.{extension}?*")]
+
+
+def _matches(pattern, url):
+    """Match a URL the way Network.setBlockedURLs does ("*" matches anything)."""
+    return re.fullmatch(".*".join(re.escape(part) for part in pattern.split("*")), url) is not None
+
+
+def parse_allowlist(spec):
+    """
+    Parse an allowlist spec such as "example.com:stylesheet,image;shop.test:trackers".
+    Args:
+        spec (str): Semicolon-separated "host:kind,kind" entries
+    Returns:
+        dict: {host: set of kinds}
+    """
+    allowlist = {}
+    for entry in filter(None, (part.strip() for part in (spec or "").split(";"))):
+        host, _, kinds = entry.partition(":")
+        kinds = {kind.strip() for kind in kinds.split(",") if kind.strip()}
+        unknown = kinds - set(KINDS)
+        if unknown:
+            logger.warning(f"Ignoring unknown resource kinds for {host}: {', '.join(sorted(unknown))}")
+        allowlist[host.strip().lower()] = kinds & set(KINDS)
+    return allowlist
+
+
+DEFAULT_ALLOWLIST = parse_allowlist(os.getenv("BROWSER_PROFILE_ALLOWLIST", ""))
+
+
+def blocked_patterns(url, profile=DEFAULT_PROFILE, allowlist=None):
+    """
+    Get the URL patterns to block while loading a page.
+    Args:
+        url (str): Page about to be loaded
+        profile (str or iterable): Profile name (see PROFILES) or kinds to block
+        allowlist (dict): {host: kinds} re-enabled on that host and its subdomains
+            (default: BROWSER_PROFILE_ALLOWLIST)
+    Returns:
+        list: Patterns for Network.setBlockedURLs, never including one that
+            matches the page URL itself (the blocklist also applies to the
+            top-level navigation)
+    """
+    kinds = set(PROFILES[profile] if isinstance(profile, str) else profile)
+    host = (urlsplit(url).hostname or "").lower()
+    for allowed_host, allowed in (DEFAULT_ALLOWLIST if allowlist is None else allowlist).items():
+        if _on_host(host, allowed_host):
+            kinds -= allowed
+    return [pattern for kind in KINDS if kind in kinds for pattern in _patterns(kind, host)
+            if not _matches(pattern, url)]
+
+
+def apply_profile(driver, url, profile=DEFAULT_PROFILE, allowlist=None, drain=True):
+    """
+    Set up request blocking on a driver's current tab before it navigates to a page.
+
+    Also discards performance log entries from earlier pages (unless
+    ``drain`` is False), so collect_blocking_stats only reports on this one.
+
+    Args:
+        driver (WebDriver): Chrome driver about to load the page
+        url (str): Page about to be loaded
+        profile (str or iterable): Profile name or kinds to block
+        allowlist (dict): Per-host kinds to allow (default: BROWSER_PROFILE_ALLOWLIST)
+        drain (bool): Discard earlier performance log entries
+    Returns:
+        bool: Whether blocking could be applied (False for non-Chrome drivers)
+    """
+    patterns = blocked_patterns(url, profile, allowlist)
+    try:
+        if drain:
+            _drain_performance_log(driver)
+        # Blocking is set per tab, so remember the patterns per window handle
+        applied = getattr(driver, "_blocked_patterns", None)
+        if applied is None:
+            applied = driver._blocked_patterns = {}
+        handle = driver.current_window_handle
+        if applied.get(handle) != patterns:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+            applied[handle] = patterns
+        return True
+    except Exception as e:
+        logger.warning(f"Could not apply browser profile: {str(e)}")
+        return False
+
+
+def _drain_performance_log(driver):
+    try:
+        return driver.get_log("performance")
+    except Exception:
+        # Driver was started without performance logging
+        return []
+
+
+def collect_blocking_stats(driver):
+    """
+    Summarize the requests of the page just loaded from Chrome's performance log.
+    Args:
+        driver (WebDriver): Chrome driver that loaded the page
+    Returns:
+        dict: requests_blocked, blocked_by_type, estimated_bytes_avoided,
+            requests_loaded and bytes_loaded
+    """
+    stats = new_blocking_stats()
+    add_log_entries(stats, _drain_performance_log(driver))
+    return finish_blocking_stats(stats)
+
+
+def collect_blocking_stats_by_tab(driver, tab_stats):
+    """
+    Drain the performance log of a multi-tab driver into per-tab stats.
+    Args:
+        driver (WebDriver): Chrome driver with several tabs loading
+        tab_stats (dict): {window handle: stats dict from new_blocking_stats},
+            updated in place; entries of other tabs are dropped
+    """
+    by_tab = {}
+    for entry in _drain_performance_log(driver):
+        try:
+            handle = json.loads(entry["message"]).get("webview")
+        except (KeyError, ValueError):
+            continue
+        if handle in tab_stats:
+            by_tab.setdefault(handle, []).append(entry)
+    for handle, entries in by_tab.items():
+        add_log_entries(tab_stats[handle], entries)
+
+
+def new_blocking_stats():
+    """Return an empty blocking report."""
+    return {"requests_blocked": 0, "blocked_by_type": {}, "estimated_bytes_avoided": 0,
+            "requests_loaded": 0, "bytes_loaded": 0, "_types": {}}
+
+
+def add_log_entries(stats, entries):
+    """
+    Add performance log entries to a blocking report.
+    Args:
+        stats (dict): Report from new_blocking_stats, updated in place
+        entries (list): Entries from driver.get_log("performance")
+    """
+    types = stats["_types"]
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        method, params = message.get("method"), message.get("params", {})
+        if method == "Network.requestWillBeSent":
+            types[params.get("requestId")] = params.get("type", "Other")
+        elif method == "Network.loadingFailed" and params.get("blockedReason") == "inspector":
+            resource_type = params.get("type") or types.get(params.get("requestId"), "Other")
+            stats["requests_blocked"] += 1
+            stats["blocked_by_type"][resource_type] = stats["blocked_by_type"].get(resource_type, 0) + 1
+            stats["estimated_bytes_avoided"] += _TYPICAL_BYTES.get(resource_type, _DEFAULT_TYPICAL_BYTES)
+        elif method == "Network.loadingFinished":
+            stats["requests_loaded"] += 1
+            stats["bytes_loaded"] += int(params.get("encodedDataLength", 0))
+
+
+def finish_blocking_stats(stats):
+    """Drop the bookkeeping from a report before handing it out."""
+    stats.pop("_types", None)
+    return stats
@@ -1,152 +1,338 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
+from lxml import etree
+import lxml.html
 from dotenv import load_dotenv
-from googlesearch import search
+from search import iter_search
+from driver_pool import get_driver_pool
+from readiness import install_probes, wait_until_ready
+from resource_blocking import DEFAULT_PROFILE, apply_profile, collect_blocking_stats
+from tab_pool import get_tab_renderer
+from proxy_pool import get_proxy_pool
+from http_fetch import fetch_response, needs_javascript, get_domain_mode, remember_domain_mode
+from chunking import iter_chunks, CHARS_PER_TOKEN
 import os
+import asyncio
+import functools
 import time
+from urllib.parse import urljoin, urldefrag
 import logging
 
-# Try to import webdriver_manager for automatic driver management
-try:
-    from webdriver_manager.chrome import ChromeDriverManager
-    USE_WEBDRIVER_MANAGER = True
-except ImportError:
-    USE_WEBDRIVER_MANAGER = False
-    logging.warning("webdriver-manager not installed. Using system ChromeDriver.")
-
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Shared lxml parser (comments are dropped at parse time)
+_LXML_PARSER = lxml.html.HTMLParser(encoding="utf-8", remove_comments=True)
+
+# Browser renderer: "driver" (one pooled browser per page) or "tabs" (many tabs per browser)
+DEFAULT_RENDERER = os.getenv("BROWSER_RENDERER", "driver")
+
 # Load environment variables
 load_dotenv()
 
-def google_search(query, num_results=10):
+def google_search(query, num_results=10, use_cache=True):
     """
     Perform a Google search and return a list of URLs.
+    Results are cached (see search.iter_search); use search.iter_search
+    directly to start on the first URL before the rest arrive.
     Args:
         query (str): The search query
         num_results (int): Number of results to return
+        use_cache (bool): Whether to reuse cached results for the same query
     Returns:
         list: List of URLs from search results
     """
-    try:
-        results = []
-        for url in search(query, num_results=num_results):
-            results.append(url)
-            time.sleep(1)  # Add delay between collecting results
-        return results
-    except Exception as e:
-        logger.error(f"Error during Google search: {str(e)}")
-        return []
+    return list(iter_search(query, num_results, backend="google", use_cache=use_cache))
 
-#def scrape_website(url):
+def scrape_website(url, use_proxy=False, mode="auto", readiness="network_idle", selector=None, max_wait=10, stats=None,
+                   validators=None, profile=DEFAULT_PROFILE, allowlist=None, renderer=DEFAULT_RENDERER):
     """
     Scrape a website and return its HTML content.
+
+    In "auto" mode a plain keep-alive HTTP fetch is tried first and the page
+    is only rendered in Chrome when it looks like it needs JavaScript. The
+    decision is remembered per domain so later fetches skip the probe; it
+    is only made from a 200 HTML response, so a timeout or an error status
+    falls back to the browser for that one call without pinning the domain.
+
+    With ``validators`` from a previous fetch, the HTTP request is sent as a
+    conditional GET. If the server answers 304 Not Modified, None is
+    returned, stats["not_modified"] is set, and nothing is downloaded or
+    rendered. Domains known to need a browser skip this: a JavaScript app's
+    shell keeps its ETag while the content it renders changes. For the same
+    reason no validators are reported for pages that were rendered.
+
+    With ``use_proxy`` a proxy is taken from the shared proxy pool for this
+    request and its outcome and latency are reported back, so slow or
+    banned proxies are rotated out. The latency is that of the HTTP fetch
+    only; rendering and readiness waits say nothing about the proxy, so a
+    page fetched by the browser alone reports no latency.
+
     Args:
         url (str): The URL to scrape
+        use_proxy (bool): Whether to route the request through the proxy pool
+        mode (str): "auto", "http" (never use a browser) or "browser" (always)
+        readiness (str or callable): Page readiness strategy (see readiness.STRATEGIES)
+        selector (str): CSS selector for the "selector" readiness strategy
+        max_wait (float): Upper bound in seconds on the readiness wait
+        stats (dict): Optional dict filled with the fetch mode, readiness report,
+            blocking report, response validators, not_modified flag and proxy used
+        validators (dict): "etag" / "last_modified" from a previous fetch
+        profile (str): Browser profile; "text" blocks images, fonts, stylesheets,
+            media and trackers, "full" loads everything (see resource_blocking)
+        allowlist (dict): {host: kinds} the profile allows on that host
+            (default: BROWSER_PROFILE_ALLOWLIST)
+        renderer (str): "driver" renders in a pooled browser per page, "tabs"
+            in a shared browser with many tabs (see tab_pool)
     Returns:
         str: HTML content of the website
     """
     logger.info(f"Scraping website: {url}")
+    # Pick a proxy from the pool if requested
+    pool = get_proxy_pool() if use_proxy else None
+    proxy_server = pool.acquire(url) if pool is not None else None
+    if proxy_server and stats is not None:
+        stats["proxy"] = proxy_server
+    proxy_ok, proxy_status, proxy_latency = False, None, None
     try:
-        # Set up Chrome options
-        options = Options()
-        options.add_argument("--headless")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36")
-
-        # Initialize the Chrome driver
-        driver = webdriver.Chrome(options=options)
-        
-        # Set page load timeout
-        driver.set_page_load_timeout(30)
-        
-        # Navigate to the URL
-        driver.get(url)
-        
-        # Wait for the body element to be present
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
-        )
-        
-        # Wait for dynamic content to load
-        time.sleep(5)
-        
-        # Get the page source
-        html = driver.page_source
-        
-        # Close the driver
-        driver.quit()
-        
+
+        validators = validators or {}
+        # Only an explicit "http" mode overrides a domain remembered as needing a browser
+        known_browser = mode == "browser" or (mode != "http" and get_domain_mode(url) == "browser")
+
+        response = html = None
+        if not known_browser:
+            started = time.monotonic()
+            response = fetch_response(url, proxy_server=proxy_server,
+                                      etag=validators.get("etag"), last_modified=validators.get("last_modified"))
+            proxy_latency = time.monotonic() - started
+            # Any HTTP answer means the proxy itself worked, unless it signals a ban
+            proxy_ok, proxy_status = response is not None, response["status"] if response else None
+            if response and response["status"] == 304:
+                logger.info(f"Not modified since last fetch: {url}")
+                if stats is not None:
+                    stats["not_modified"] = True
+                return None
+            if response and stats is not None:
+                stats["validators"] = {"etag": response["etag"], "last_modified": response["last_modified"]}
+            html = response["html"] if response else None
+
+        if mode == "http":
+            if stats is not None:
+                stats["fetch_mode"] = "http"
+            return html
+
+        if not known_browser:
+            if html is None:
+                # Network error, error status or non-HTML: render this once, remember nothing
+                logger.info(f"HTTP fetch unusable for {url}; trying the browser for this request only")
+            else:
+                needs_js, reason = needs_javascript(html)
+                if not needs_js:
+                    remember_domain_mode(url, "http")
+                    if stats is not None:
+                        stats["fetch_mode"] = "http"
+                    return html
+                logger.info(f"Escalating {url} to browser: {reason}")
+                remember_domain_mode(url, "browser")
+
+        if stats is not None:
+            stats["fetch_mode"] = "browser"
+            # The shell's validators say nothing about the rendered content
+            stats.pop("validators", None)
+        proxy_ok, proxy_status = False, None
+        if renderer == "tabs":
+            html, render_stats = get_tab_renderer(proxy_server).render(
+                url, readiness=readiness, selector=selector, max_wait=max_wait, profile=profile, allowlist=allowlist
+            )
+            if stats is not None:
+                stats.update(render_stats)
+        else:
+            html = _render_with_browser(url, proxy_server, readiness, selector, max_wait, stats, profile, allowlist)
+        proxy_ok = True
         return html
     except Exception as e:
         logger.error(f"An error occurred while scraping: {str(e)}")
         return None
+    finally:
+        if pool is not None:
+            pool.report(proxy_server, proxy_ok, proxy_latency, proxy_status)
 
-def scrape_website(url, use_proxy=False):
+
+async def async_scrape_website(url, executor=None, **kwargs):
     """
-    Scrape a website and return its HTML content.
+    Async version of scrape_website.
+    The blocking HTTP/Selenium work runs in an executor so many pages can be
+    in flight on one event loop.
     Args:
         url (str): The URL to scrape
-        use_proxy (bool): Whether to use a proxy
+        executor (Executor): Executor to run the fetch in (default: loop default)
+        **kwargs: Keyword arguments for scrape_website
     Returns:
         str: HTML content of the website
     """
-    logger.info(f"Scraping website: {url}")
-    try:
-        # Set up Chrome options
-        options = Options()
-        options.add_argument("--headless")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36")
-        
-        # Add proxy if requested
-        if use_proxy and os.getenv("PROXY_SERVER"):
-            proxy_server = os.getenv("PROXY_SERVER")
-            options.add_argument(f'--proxy-server={proxy_server}')
-
-        # Initialize the Chrome driver
-        if USE_WEBDRIVER_MANAGER:
-            # Automatically download and use the correct ChromeDriver
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=options)
-        else:
-            # Use system ChromeDriver or one in current directory
-            driver = webdriver.Chrome(options=options)
-        
-        # Set page load timeout
-        driver.set_page_load_timeout(30)
-        
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(scrape_website, url, **kwargs))
+
+
+def _render_with_browser(url, proxy_server, readiness, selector, max_wait, stats, profile=DEFAULT_PROFILE,
+                         allowlist=None):
+    """
+    Render a page in a pooled headless Chrome and return its HTML.
+    """
+    # Lease a warm driver from the shared pool
+    with get_driver_pool(proxy_server).lease() as driver:
+        install_probes(driver)
+        blocking = apply_profile(driver, url, profile, allowlist)
+
         # Navigate to the URL
         driver.get(url)
-        
+
         # Wait for the body element to be present
         WebDriverWait(driver, 10).until(
             EC.presence_of_element_located((By.TAG_NAME, "body"))
         )
-        
+
         # Wait for dynamic content to load
-        time.sleep(5)
-        
+        report = wait_until_ready(driver, readiness, selector=selector, max_wait=max_wait)
+        logger.info(f"Page ready after {report['waited']}s ({report['strategy']})")
+        if stats is not None:
+            stats["readiness"] = report
+
         # Get the page source
         html = driver.page_source
-        
-        # Close the driver
-        driver.quit()
-        
+        if blocking:
+            report = collect_blocking_stats(driver)
+            logger.info(f"Blocked {report['requests_blocked']} requests "
+                        f"(~{report['estimated_bytes_avoided'] // 1024} KB avoided), "
+                        f"loaded {report['requests_loaded']} ({report['bytes_loaded'] // 1024} KB)")
+            if stats is not None:
+                stats["blocking"] = report
         return html
-    except Exception as e:
-        logger.error(f"An error occurred while scraping: {str(e)}")
+
+
+# Tags whose content never reaches the cleaned text
+EXCLUDED_TAGS = ("script", "style", "nav", "header", "footer", "iframe", "noscript", "template")
+
+
+def _parse_lxml(html_content):
+    """Parse HTML (str or bytes) into an lxml document, or None if there is nothing to parse."""
+    if isinstance(html_content, str):
+        # Encode so pages with an XML encoding declaration still parse
+        html_content = html_content.encode("utf-8")
+    try:
+        return lxml.html.document_fromstring(html_content, parser=_LXML_PARSER)
+    except etree.ParserError:
         return None
 
 
+def _iter_lxml_strings(root):
+    """Yield the text nodes of a tree, skipping excluded and comment subtrees in one walk."""
+    walker = etree.iterwalk(root, events=("start", "end"))
+    for event, element in walker:
+        if event == "start":
+            if not isinstance(element.tag, str) or element.tag in EXCLUDED_TAGS:
+                walker.skip_subtree()
+            elif element.text:
+                yield element.text
+        elif element is not root and element.tail:
+            yield element.tail
+
+
+def iter_text_lines(html_content, backend="lxml"):
+    """
+    Parse HTML once and yield the cleaned, non-empty lines of its body text.
+    Args:
+        html_content (str): HTML content
+        backend (str): "lxml" (fast) or a BeautifulSoup parser name such as "html.parser"
+    Yields:
+        str: Stripped, non-empty text lines
+    """
+    if not html_content:
+        return
+
+    if backend == "lxml":
+        root = _parse_lxml(html_content)
+        if root is None:
+            return
+        body = root.find("body")
+        strings = _iter_lxml_strings(body if body is not None else root)
+    else:
+        soup = BeautifulSoup(html_content, backend)
+        for element in soup(list(EXCLUDED_TAGS)):
+            element.decompose()
+        strings = (soup.body or soup).strings
+
+    for text in strings:
+        for line in text.splitlines():
+            line = line.strip()
+            if line:
+                yield line
+
+
+def html_to_text(html_content, backend="lxml"):
+    """
+    Convert a full HTML page to cleaned text in a single parse.
+    Equivalent to clean_body_content(extract_body_content(html)), except
+    that a page without a <body> tag gives its text rather than "".
+    Args:
+        html_content (str): HTML content
+        backend (str): "lxml" (fast) or a BeautifulSoup parser name such as "html.parser"
+    Returns:
+        str: Cleaned content, one text line per line
+    """
+    return "\n".join(iter_text_lines(html_content, backend))
+
+
+def _iter_lxml_links(root, base_url):
+    """Yield the absolute http(s) targets of the <a href> links in a tree, without fragments."""
+    base = root.find(".//base[@href]")
+    if base is not None:
+        base_url = urljoin(base_url, base.get("href").strip())
+    for anchor in root.iter("a"):
+        href = anchor.get("href")
+        if not href or "nofollow" in (anchor.get("rel") or "").lower():
+            continue
+        url, _ = urldefrag(urljoin(base_url, href.strip()))
+        if url.startswith(("http://", "https://")):
+            yield url
+
+
+def extract_links(html_content, base_url):
+    """
+    Extract the outbound links of a page.
+    Args:
+        html_content (str): HTML content
+        base_url (str): URL the page was fetched from, to resolve relative links
+    Returns:
+        list: Absolute http(s) URLs in document order (rel="nofollow" links are skipped)
+    """
+    root = _parse_lxml(html_content) if html_content else None
+    return list(_iter_lxml_links(root, base_url)) if root is not None else []
+
+
+def html_to_text_and_links(html_content, base_url):
+    """
+    Clean a page and extract its links from a single parse.
+    Args:
+        html_content (str): HTML content
+        base_url (str): URL the page was fetched from
+    Returns:
+        tuple: (cleaned text as from html_to_text, list of links as from extract_links)
+    """
+    root = _parse_lxml(html_content) if html_content else None
+    if root is None:
+        return "", []
+    # Collect links first: text extraction skips nav/header/footer, links should not
+    links = list(_iter_lxml_links(root, base_url))
+    body = root.find("body")
+    lines = (line.strip() for text in _iter_lxml_strings(body if body is not None else root)
+             for line in text.splitlines())
+    return "\n".join(line for line in lines if line), links
+
+
 def extract_body_content(html_content):
     """
     Extract the body content from HTML.
@@ -173,30 +359,16 @@ def clean_body_content(body_content):
     Returns:
         str: Cleaned content
     """
-    if not body_content:
-        return ""
-    
-    soup = BeautifulSoup(body_content, "html.parser")
-    
-    # Remove unwanted elements
-    for element in soup(["script", "style", "nav", "header", "footer", "iframe", "noscript"]):
-        element.decompose()
-    
-    # Get text with line breaks
-    cleaned_content = soup.get_text(separator="\n")
-    
-    # Remove empty lines
-    cleaned_content = "\n".join(line.strip() for line in cleaned_content.splitlines() if line.strip())
-    
-    return cleaned_content
+    return html_to_text(body_content)
 
 def split_dom_content(dom_content, max_length=6000):
     """
     Split the DOM content into chunks of specified maximum length.
+    Whole lines are kept together; see chunking.iter_chunks for token-aware chunking.
     Args:
         dom_content (str): DOM content to split
-        max_length (int): Maximum length of each chunk
+        max_length (int): Maximum length of each chunk in characters
     Returns:
         list: List of content chunks
     """
-    return [dom_content[i:i+max_length] for i in range(0, len(dom_content), max_length)]
+    return list(iter_chunks(dom_content, max_tokens=max(1, max_length // CHARS_PER_TOKEN)))
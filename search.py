@@ -0,0 +1,173 @@
+"""
+Web search with pluggable backends and a persistent result cache.
+
+Backends are registered by name, like LLM providers. Results are yielded
+one URL at a time as the backend produces them, so callers can start
+scraping the first result while later ones are still being fetched.
+Completed result lists are cached in SQLite with a TTL, so repeating a
+query costs nothing.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import quote_plus
+
+from llm_cache import LLMCache
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = os.getenv("SEARCH_BACKEND", "google")
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", "data/cache/search_cache.sqlite")
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", str(24 * 3600)))
+# Minimum seconds between two queries sent to Google, instead of a sleep per result
+GOOGLE_MIN_INTERVAL = float(os.getenv("GOOGLE_MIN_INTERVAL", "1.0"))
+
+_backends = {}
+
+
+def register_backend(name, backend):
+    """
+    Register (or replace) a search backend.
+    Args:
+        name (str): Backend name
+        backend (callable): Function (query, num_results) -> iterable of URLs
+    """
+    _backends[name] = backend
+
+
+def get_backend(name):
+    """
+    Get a registered search backend.
+    Args:
+        name (str): Backend name ("google", "stub", ...)
+    Returns:
+        callable: The backend
+    """
+    backend = _backends.get(name)
+    if backend is None:
+        raise KeyError(f"Unknown search backend: {name}")
+    return backend
+
+
+class GoogleBackend:
+    """Google search through the googlesearch package, rate limited per query."""
+
+    def __init__(self, min_interval=GOOGLE_MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._last_query = 0.0
+
+    def __call__(self, query, num_results):
+        from googlesearch import search
+
+        with self._lock:
+            wait = self._last_query + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._last_query = time.monotonic()
+        yield from search(query, num_results=num_results)
+
+
+class StubBackend:
+    """
+    Offline backend for tests and demos. Returns canned results for known
+    queries and deterministic example.com URLs for anything else.
+    """
+
+    def __init__(self, results=None, delay=0.0):
+        """
+        Args:
+            results (dict): Optional {query: [urls]}
+            delay (float): Seconds to wait before each URL, to simulate a slow backend
+        """
+        self.results = results or {}
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self, query, num_results):
+        self.calls += 1
+        urls = self.results.get(query)
+        if urls is None:
+            urls = [f"https://example.com/{quote_plus(query)}/{i}" for i in range(num_results)]
+        for url in urls[:num_results]:
+            if self.delay:
+                time.sleep(self.delay)
+            yield url
+
+
+register_backend("google", GoogleBackend())
+register_backend("stub", StubBackend())
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_search_cache():
+    """
+    Get the process-wide search result cache.
+    Returns:
+        LLMCache: Cache of query -> JSON list of URLs
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(path=SEARCH_CACHE_PATH, ttl=SEARCH_CACHE_TTL)
+        return _cache
+
+
+def iter_search(query, num_results=10, backend=DEFAULT_BACKEND, use_cache=True):
+    """
+    Search the web, yielding each result URL as soon as it is available.
+
+    A cached result list for the same backend, query and count is replayed
+    instantly. Otherwise URLs are yielded as the backend returns them, and
+    the full list is cached once the search completes.
+
+    Args:
+        query (str): The search query
+        num_results (int): Number of results to return
+        backend (str): Registered backend name
+        use_cache (bool): Whether to read and write the search cache
+    Yields:
+        str: Result URLs, without duplicates
+    """
+    key = LLMCache.make_key("search", backend, query, str(num_results))
+    if use_cache:
+        cached = get_search_cache().get(key)
+        if cached is not None:
+            logger.info(f"Search cache hit for {query!r}")
+            yield from json.loads(cached)
+            return
+
+    results = []
+    try:
+        for url in get_backend(backend)(query, num_results):
+            if url in results:
+                continue
+            results.append(url)
+            yield url
+            if len(results) >= num_results:
+                break
+    except Exception as e:
+        logger.error(f"Error during {backend} search: {str(e)}")
+        return
+
+    if use_cache and results:
+        get_search_cache().set(key, json.dumps(results))
+
+
+def search(query, num_results=10, backend=DEFAULT_BACKEND, use_cache=True):
+    """
+    Search the web and return the result URLs.
+    Args:
+        query (str): The search query
+        num_results (int): Number of results to return
+        backend (str): Registered backend name
+        use_cache (bool): Whether to read and write the search cache
+    Returns:
+        list: Result URLs
+    """
+    return list(iter_search(query, num_results, backend, use_cache))
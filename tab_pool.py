@@ -0,0 +1,413 @@
+"""
+Multi-tab rendering: a few Chrome processes, each loading many pages at once.
+
+One Chrome process per concurrent page (the DriverPool model) costs a
+full browser's memory for every page in flight. Here each browser runs
+in its own scheduler thread that keeps several tabs loading in parallel:
+navigation does not block (page load strategy "none"), and the thread
+round-robins over its tabs, checking each one's readiness and handing
+back its HTML as soon as it is ready.
+
+Browsers pull URLs from one shared queue, so a browser with free tabs
+picks up the next URL first. The number of tabs per browser is capped by
+a memory budget, using the browser's measured memory when psutil is
+installed and a per-tab estimate otherwise.
+
+Tabs of one browser share its profile. When a page finishes, its
+origin's cookies and storage are cleared before the tab is reused, and
+everything is cleared whenever no other page is loading. Pages loading
+at the same time can still see each other's third-party cookies; use
+the DriverPool renderer when pages must be fully isolated.
+"""
+from concurrent.futures import Future, TimeoutError
+from urllib.parse import urlsplit
+import atexit
+import importlib.util
+import logging
+import os
+import queue
+import threading
+import time
+
+from driver_pool import build_chrome_options, clear_browser_state, create_driver, DEFAULT_MAX_PAGES
+from readiness import ReadinessTracker, install_probes
+from resource_blocking import (DEFAULT_PROFILE, apply_profile, collect_blocking_stats_by_tab,
+                               finish_blocking_stats, new_blocking_stats)
+
+# psutil is optional; without it tab memory is estimated
+HAS_PSUTIL = importlib.util.find_spec("psutil") is not None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_BROWSERS = int(os.getenv("TAB_BROWSERS", "2"))
+DEFAULT_MEMORY_BUDGET_MB = float(os.getenv("TAB_MEMORY_BUDGET_MB", "2048"))
+DEFAULT_TAB_MEMORY_MB = float(os.getenv("TAB_MEMORY_ESTIMATE_MB", "120"))
+DEFAULT_MAX_TABS = int(os.getenv("TAB_MAX_PER_BROWSER", "16"))
+
+# Extra time on top of max_wait for the document itself to load
+_LOAD_GRACE = 20
+# Extra time render() waits on top of that, for queueing and hand-back
+_RENDER_MARGIN = 30
+_MEASURE_INTERVAL = 2.0
+
+
+def _origin(url):
+    """Return scheme://host[:port] of an http(s) URL, or None for other URLs."""
+    parts = urlsplit(url or "")
+    return f"{parts.scheme}://{parts.netloc}" if parts.scheme in ("http", "https") else None
+
+
+class _TabJob:
+    """One page to render, with its options and the future for its result."""
+
+    def __init__(self, url, readiness, selector, max_wait, profile, allowlist):
+        self.url = url
+        self.readiness = readiness
+        self.selector = selector
+        self.max_wait = max_wait
+        self.profile = profile
+        self.allowlist = allowlist
+        self.future = Future()
+
+
+class _TabBrowser(threading.Thread):
+    """A Chrome process and the thread that schedules pages onto its tabs."""
+
+    def __init__(self, jobs, proxy_server, memory_budget_mb, tab_memory_mb, max_tabs, max_pages, poll_interval):
+        super().__init__(daemon=True, name="tab-browser")
+        self.jobs = jobs
+        self.proxy_server = proxy_server
+        self.memory_budget_mb = memory_budget_mb
+        self.tab_memory_mb = tab_memory_mb
+        self.max_tabs = max_tabs
+        self.max_pages = max_pages
+        self.poll_interval = poll_interval
+        self.closed = False
+        self.tab_limit = max(1, min(max_tabs, int(memory_budget_mb // tab_memory_mb)))
+        self._driver = None
+        self._pages = 0
+        self._active = {}
+        self._idle = []
+        self._stats = {}
+        self._measured_at = 0.0
+
+    def run(self):
+        # After close(), finish the pages already loading before exiting
+        while not self.closed or self._active:
+            try:
+                if self._driver is None:
+                    self._start_browser()
+                if not self.closed and self._pages < self.max_pages:
+                    self._fill_tabs()
+                if self._active:
+                    self._sweep()
+                    time.sleep(self.poll_interval)
+                elif self._pages >= self.max_pages:
+                    # Recycle the process to release leaked memory
+                    self._quit()
+            except Exception as e:
+                logger.error(f"Tab browser failed, restarting: {str(e)}")
+                started = self._driver is not None
+                for job, _, _ in self._active.values():
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                self._quit()
+                if not started:
+                    # The browser cannot start; fail a waiting page rather than spin
+                    self._fail_next(e)
+                    time.sleep(1)
+        self._quit()
+
+    def _fail_next(self, error):
+        try:
+            job = self.jobs.get(timeout=0.5)
+        except queue.Empty:
+            return
+        if job is None:
+            self.closed = True
+        elif job.future.set_running_or_notify_cancel():
+            job.future.set_exception(error)
+
+    def _start_browser(self):
+        options = build_chrome_options(self.proxy_server)
+        # Navigation returns immediately, so one thread can drive many loading tabs
+        options.page_load_strategy = "none"
+        self._driver = create_driver(options)
+        self._idle = [self._driver.current_window_handle]
+        self._pages = 0
+
+    def _fill_tabs(self):
+        """Start new pages in free tabs, up to the memory-based tab limit."""
+        while len(self._active) < self.tab_limit and self._pages < self.max_pages:
+            try:
+                # Block only when there is nothing to poll
+                job = self.jobs.get(timeout=0.5) if not self._active else self.jobs.get_nowait()
+            except queue.Empty:
+                return
+            if job is None:
+                self.closed = True
+                return
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            self._start(job)
+
+    def _start(self, job):
+        driver = self._driver
+        handle = None
+        try:
+            if self._idle:
+                handle = self._idle.pop()
+                driver.switch_to.window(handle)
+            else:
+                driver.switch_to.new_window("tab")
+                handle = driver.current_window_handle
+        except Exception as e:
+            job.future.set_exception(e)
+            self._tab_failed(handle, e)
+            return
+        try:
+            tracker = ReadinessTracker(job.readiness, job.selector)
+        except ValueError as e:
+            self._idle.append(handle)
+            job.future.set_exception(e)
+            return
+        try:
+            install_probes(driver)
+            if apply_profile(driver, job.url, job.profile, job.allowlist, drain=False):
+                self._stats[handle] = new_blocking_stats()
+            driver.get(job.url)
+        except Exception as e:
+            # A bad page fails only its own job; the other tabs keep loading
+            logger.warning(f"Could not start {job.url} in a tab: {str(e)}")
+            job.future.set_exception(e)
+            self._stats.pop(handle, None)
+            self._tab_failed(handle, e)
+            return
+        self._active[handle] = (job, tracker, time.monotonic() + job.max_wait + _LOAD_GRACE)
+        self._pages += 1
+
+    def _sweep(self):
+        """Check every loading tab once, finishing those that are ready or out of time."""
+        driver = self._driver
+        collect_blocking_stats_by_tab(driver, self._stats)
+        now = time.monotonic()
+        for handle, (job, tracker, deadline) in list(self._active.items()):
+            try:
+                driver.switch_to.window(handle)
+                ready = tracker.check(driver)
+                if not ready and now < deadline:
+                    continue
+                waited = round(time.monotonic() - tracker.started, 3)
+                if not ready:
+                    logger.info(f"Readiness '{tracker.name}' timed out after {waited}s for {job.url}")
+                html = driver.page_source
+            except Exception as e:
+                logger.warning(f"Tab failed while loading {job.url}: {str(e)}")
+                del self._active[handle]
+                self._stats.pop(handle, None)
+                if not job.future.done():
+                    job.future.set_exception(e)
+                self._tab_failed(handle, e)
+                continue
+            stats = {"readiness": {"strategy": tracker.name, "waited": waited, "timed_out": not ready}}
+            if handle in self._stats:
+                stats["blocking"] = finish_blocking_stats(self._stats.pop(handle))
+            job.future.set_result((html, stats))
+
+            del self._active[handle]
+            try:
+                self._clear_state(job.url)
+                driver.get("about:blank")
+                self._idle.append(handle)
+            except Exception as e:
+                self._tab_failed(handle, e)
+        self._adjust_tab_limit()
+
+        # Close tabs the limit no longer allows, keeping one
+        while self._idle and len(self._idle) + len(self._active) > max(1, self.tab_limit):
+            handle = self._idle.pop()
+            try:
+                driver.switch_to.window(handle)
+                driver.close()
+            except Exception as e:
+                self._tab_failed(handle, e)
+
+    def _clear_state(self, url):
+        """
+        Clear the cookies and storage a finished page left in the current tab's
+        profile. Origins other pages are still loading from are left alone.
+        Args:
+            url (str): URL the page was requested with
+        """
+        driver = self._driver
+        if not self._active:
+            clear_browser_state(driver)
+            return
+        loading = {_origin(job.url) for job, _, _ in self._active.values()}
+        origins = {_origin(url), _origin(driver.current_url)} - loading - {None}
+        if not origins:
+            clear_browser_state(driver, None)
+        for origin in origins:
+            clear_browser_state(driver, origin)
+
+    def _tab_failed(self, handle, error):
+        """
+        Drop a tab after an error in it. Re-raises the error (so run()
+        restarts the browser) only if the browser session itself is gone.
+        """
+        driver = self._driver
+        try:
+            handles = driver.window_handles
+        except Exception:
+            raise error
+        if handle not in handles:
+            return
+        try:
+            driver.switch_to.window(handle)
+            if len(handles) > 1:
+                driver.close()
+            else:
+                # Closing the last tab would end the session; reuse it instead
+                driver.get("about:blank")
+                self._idle.append(handle)
+        except Exception as e:
+            logger.warning(f"Could not close a failed tab: {str(e)}")
+
+    def _adjust_tab_limit(self):
+        """Re-derive the tab cap from the browser's measured memory per tab."""
+        if not HAS_PSUTIL or not self._active or time.monotonic() - self._measured_at < _MEASURE_INTERVAL:
+            return
+        self._measured_at = time.monotonic()
+        import psutil
+        try:
+            root = psutil.Process(self._driver.service.process.pid)
+            rss = sum(process.memory_info().rss for process in [root] + root.children(recursive=True))
+        except (psutil.Error, AttributeError):
+            return
+        tabs = len(self._active) + len(self._idle)
+        per_tab_mb = max(1.0, rss / (1024 * 1024) / tabs)
+        self.tab_limit = max(1, min(self.max_tabs, int(self.memory_budget_mb // per_tab_mb)))
+
+    def _quit(self):
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except Exception as e:
+                logger.warning(f"Error quitting tab browser: {str(e)}")
+        self._driver = None
+        self._active, self._idle, self._stats = {}, [], {}
+
+
+class TabRenderer:
+    """
+    Renders pages in a few browser processes with many tabs each.
+    """
+
+    def __init__(self, browsers=DEFAULT_BROWSERS, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB,
+                 tab_memory_mb=DEFAULT_TAB_MEMORY_MB, max_tabs=DEFAULT_MAX_TABS, max_pages=DEFAULT_MAX_PAGES,
+                 proxy_server=None, poll_interval=0.1):
+        """
+        Args:
+            browsers (int): Number of Chrome processes
+            memory_budget_mb (float): Memory allowed per browser process, which caps its tabs
+            tab_memory_mb (float): Estimated memory per tab, used until it can be measured
+            max_tabs (int): Hard cap on tabs per browser
+            max_pages (int): Pages rendered by a browser before it is restarted
+            proxy_server (str): Optional proxy server the browsers launch with
+            poll_interval (float): Seconds between readiness sweeps over the tabs
+        """
+        if browsers < 1:
+            raise ValueError("TabRenderer needs at least one browser")
+        self._jobs = queue.Queue()
+        self._browsers = [
+            _TabBrowser(self._jobs, proxy_server, memory_budget_mb, tab_memory_mb, max_tabs, max_pages,
+                        poll_interval)
+            for _ in range(browsers)
+        ]
+        for browser in self._browsers:
+            browser.start()
+
+    @property
+    def capacity(self):
+        """Number of pages that can currently load at once across all browsers."""
+        return sum(browser.tab_limit for browser in self._browsers)
+
+    def submit(self, url, readiness="network_idle", selector=None, max_wait=10, profile=DEFAULT_PROFILE,
+               allowlist=None):
+        """
+        Queue a page for rendering.
+        Args:
+            url (str): The URL to render
+            readiness (str or callable): Page readiness strategy (see readiness.STRATEGIES)
+            selector (str): CSS selector for the "selector" readiness strategy
+            max_wait (float): Upper bound in seconds on the readiness wait
+            profile (str): Browser profile (see resource_blocking)
+            allowlist (dict): {host: kinds} the profile allows on that host
+        Returns:
+            Future: Resolves to (html, stats) with readiness and blocking reports
+        """
+        job = _TabJob(url, readiness, selector, max_wait, profile, allowlist)
+        self._jobs.put(job)
+        return job.future
+
+    def render(self, url, timeout=None, **options):
+        """
+        Render a page and wait for it.
+        Args:
+            url (str): The URL to render
+            timeout (float): Seconds to wait for the result (default: max_wait
+                plus the load grace and a margin for queueing)
+            **options: Keyword arguments for submit
+        Returns:
+            tuple: (html, stats)
+        Raises:
+            concurrent.futures.TimeoutError: If the page is not rendered in time
+                (a page still queued is cancelled)
+        """
+        if timeout is None:
+            timeout = options.get("max_wait", 10) + _LOAD_GRACE + _RENDER_MARGIN
+        future = self.submit(url, **options)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def close(self):
+        """Stop the browsers once they finish their current pages."""
+        for _ in self._browsers:
+            self._jobs.put(None)
+        for browser in self._browsers:
+            browser.join(timeout=30)
+
+
+_renderers = {}
+_renderers_lock = threading.Lock()
+
+
+def get_tab_renderer(proxy_server=None):
+    """
+    Get the shared multi-tab renderer for a launch configuration.
+    Args:
+        proxy_server (str): Optional proxy server the browsers launch with
+    Returns:
+        TabRenderer: The shared renderer
+    """
+    with _renderers_lock:
+        renderer = _renderers.get(proxy_server)
+        if renderer is None:
+            renderer = _renderers[proxy_server] = TabRenderer(proxy_server=proxy_server)
+        return renderer
+
+
+def close_all_renderers():
+    """Close every shared TabRenderer."""
+    with _renderers_lock:
+        renderers = list(_renderers.values())
+        _renderers.clear()
+    for renderer in renderers:
+        renderer.close()
+
+
+atexit.register(close_all_renderers)
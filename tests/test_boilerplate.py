@@ -0,0 +1,82 @@
+from boilerplate import SiteBoilerplate, extract_main_content, remove_site_boilerplate
+
+ARTICLE = ("Cyber security is how individuals and organisations reduce the risk of cyber attack, and it "
+           "protects the devices we all use and the personal information we store from theft or damage.")
+
+
+def page(body):
+    return f"<html><head><title>t</title></head><body>{body}</body></html>"
+
+
+def test_layout_classes_on_wrapper_keep_content():
+    html = page(f'<div id="page" class="site no-sidebar"><article><h1>Title</h1><p>{ARTICLE}</p>'
+                f'<p>{ARTICLE}</p></article></div>')
+    text, report = extract_main_content(html)
+    assert ARTICLE in text
+    assert report["main_chars"] == len(text)
+
+
+def test_negated_and_partial_names_are_not_noise():
+    html = page(f'<div class="post-body has-comments-enabled"><p>{ARTICLE}</p></div>'
+                f'<div class="shared-layout"><p>{ARTICLE} Second.</p></div>')
+    text, _ = extract_main_content(html)
+    assert ARTICLE in text
+    assert f"{ARTICLE} Second." in text
+
+
+def test_noise_words_are_dropped():
+    html = page(f'<div class="cookie-banner"><p>We use cookies to make this website work properly.</p></div>'
+                f'<ul class="share_buttons"><li><a href="#">Share on social media</a></li></ul>'
+                f'<main><p>{ARTICLE}</p><p>{ARTICLE}</p></main>'
+                f'<div id="related-posts"><p>Related: another long article title you may want to read</p></div>')
+    text, _ = extract_main_content(html)
+    assert ARTICLE in text
+    assert "cookies" not in text
+    assert "Share" not in text
+    assert "Related" not in text
+
+
+def test_noise_wrapper_holding_most_text_is_kept():
+    html = page(f'<div class="comments"><p>{ARTICLE}</p><p>{ARTICLE}</p><p>{ARTICLE}</p></div>'
+                '<p>Footer text.</p>')
+    text, _ = extract_main_content(html)
+    assert ARTICLE in text
+
+
+def test_falls_back_to_all_text_when_main_content_is_tiny():
+    # Two sidebars, each under half of the page, and next to no content of its own
+    html = page(f'<div class="sidebar"><p>{ARTICLE * 3}</p></div><p>Short.</p>'
+                f'<div class="widget"><p>{ARTICLE * 3}</p></div>')
+    text, report = extract_main_content(html)
+    assert "Short." in text
+    assert ARTICLE in text
+    assert report["main_chars"] == len(text)
+
+
+def test_empty_html():
+    assert extract_main_content("") == ("", {"text_chars": 0, "main_chars": 0})
+
+
+def test_same_url_cleaned_repeatedly_is_one_page():
+    site = SiteBoilerplate(min_pages=3)
+    text = "Unique heading\nBack to top"
+    for _ in range(5):
+        assert site.clean("https://example.com/a", text) == text
+    assert site.clean("https://example.com/a#section", text) == text
+
+
+def test_lines_repeated_across_pages_are_stripped():
+    site = SiteBoilerplate(min_pages=3)
+    for i in range(3):
+        site.observe(f"https://example.com/{i}", f"Page {i}\nBack to top")
+    assert site.strip("https://example.com/3", "Page 3\nBack to top") == "Page 3"
+    # Other hosts are counted separately
+    assert site.strip("https://other.org/", "Page 3\nBack to top") == "Page 3\nBack to top"
+
+
+def test_remove_site_boilerplate_share():
+    pages = {f"https://example.com/{i}": f"Page {i}\nBack to top" + ("\nSometimes" if i < 2 else "")
+             for i in range(6)}
+    cleaned = remove_site_boilerplate(pages, min_pages=3, min_share=0.5)
+    assert cleaned["https://example.com/0"] == "Page 0\nSometimes"
+    assert cleaned["https://example.com/5"] == "Page 5"
@@ -0,0 +1,88 @@
+import random
+import tracemalloc
+
+import pytest
+
+from chunking import CHARS_PER_TOKEN, chunk_signature, iter_chunks, iter_chunks_reusing
+
+WORDS = "cyber security protects devices services information attack risk the of and".split()
+
+
+def make_text(length, seed=1):
+    """Lines of 1-40 words, cut to ``length`` characters."""
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < length:
+        line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 40)))
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)[:length]
+
+
+@pytest.mark.parametrize("length", [3000, 5835, 20767, 100000])
+@pytest.mark.parametrize("overlap_tokens", [0, 50])
+def test_balanced_chunks_are_even_and_never_more(length, overlap_tokens):
+    text = make_text(length)
+    balanced = list(iter_chunks(text, max_tokens=500, overlap_tokens=overlap_tokens))
+    greedy = list(iter_chunks(text, max_tokens=500, overlap_tokens=overlap_tokens, balance=False))
+
+    assert len(balanced) <= len(greedy)
+    assert all(len(chunk) <= 500 * CHARS_PER_TOKEN for chunk in balanced)
+    sizes = [len(chunk) for chunk in balanced]
+    assert min(sizes) / max(sizes) >= 0.6
+
+
+def test_balanced_tail_is_not_a_remainder():
+    text = make_text(5835)
+    greedy = [len(chunk) for chunk in iter_chunks(text, max_tokens=500, balance=False)]
+    balanced = [len(chunk) for chunk in iter_chunks(text, max_tokens=500)]
+    assert balanced[-1] >= 0.6 * sum(balanced) / len(balanced)
+    assert balanced[-1] > greedy[-1]
+
+
+def test_chunks_keep_every_line_in_order():
+    text = make_text(20767)
+    chunks = list(iter_chunks(text, max_tokens=500))
+    assert "\n".join(chunks).split("\n") == [line.strip() for line in text.split("\n") if line.strip()]
+
+
+def test_small_text_is_one_chunk():
+    assert list(iter_chunks("one line\ntwo lines", max_tokens=500)) == ["one line\ntwo lines"]
+    assert list(iter_chunks("", max_tokens=500)) == []
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("overlap_tokens", [0, 50])
+def test_balancing_never_adds_chunks(seed, overlap_tokens):
+    text = make_text(random.Random(seed).randint(1000, 40000), seed=seed)
+    balanced = list(iter_chunks(text, max_tokens=500, overlap_tokens=overlap_tokens))
+    greedy = list(iter_chunks(text, max_tokens=500, overlap_tokens=overlap_tokens, balance=False))
+    assert len(balanced) <= len(greedy)
+
+
+@pytest.mark.parametrize("balance", [True, False])
+def test_chunks_are_streamed(balance):
+    text = make_text(2_000_000)
+    tracemalloc.start()
+    try:
+        for _ in iter_chunks(text, max_tokens=500, balance=balance):
+            pass
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    # A few chunks' worth, never a copy of the text's lines
+    assert peak < len(text) / 10
+
+
+def test_reusing_keeps_unchanged_chunks():
+    text = make_text(30000, seed=3)
+    previous = [chunk_signature(chunk) for chunk in iter_chunks(text, max_tokens=500)]
+    lines = text.split("\n")
+    lines.insert(len(lines) // 2, "A brand new line of text.")
+    edited = "\n".join(lines)
+
+    plan = list(iter_chunks_reusing(edited, previous, max_tokens=500))
+    assert sum(1 for _, match in plan if match is None) == 1
+    assert len(plan) == len(previous)
+    assert "\n".join(chunk for chunk, _ in plan).split("\n") == [line.strip() for line in lines if line.strip()]
@@ -0,0 +1,31 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import crawler
+
+
+class _SlowSession:
+    """Fake session serving robots.txt slowly, counting requests."""
+
+    def __init__(self):
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def get(self, url, timeout=None):
+        with self._lock:
+            self.requests.append(url)
+        time.sleep(0.1)
+        return type("Response", (), {"status_code": 200, "text": "User-agent: *\nDisallow: /private"})()
+
+
+def test_robots_txt_fetched_once_per_host(monkeypatch):
+    session = _SlowSession()
+    monkeypatch.setattr(crawler, "get_session", lambda: session)
+    robots = crawler._RobotsCache()
+    urls = [f"https://example.com/page/{i}" for i in range(8)] + ["https://example.com/private/x",
+                                                                  "https://other.test/"]
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        allowed = list(executor.map(robots.allowed, urls))
+    assert allowed == [True] * 8 + [False, True]
+    assert sorted(session.requests) == ["https://example.com/robots.txt", "https://other.test/robots.txt"]
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+from scrape import clean_body_content, extract_body_content, html_to_text
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from bench_html_to_text import legacy_clean, text_to_html  # noqa: E402
+
+PAGES = [
+    "<html><head><title>T</title><style>p{}</style></head><body><p>Hello</p><p>World</p></body></html>",
+    "<html><body><p>one <b>two</b> three</p><p>a &amp; b&nbsp;c</p></body></html>",
+    "<html><body><!-- hidden --><script>var x = 1;</script><p>x</p><noscript>Enable JS</noscript></body></html>",
+    "<html><body><header>Site</header><nav><a href='/'>Home</a></nav><main><h1>Title</h1>"
+    "<ul><li>First</li><li>Second</li></ul></main><footer>Footer</footer></body></html>",
+    "<html><body><p>Shown</p><template><p>Inert template text</p></template></body></html>",
+    "<html><body><table><tr><td>Cell 1</td><td>Cell 2</td></tr></table><iframe src='/x'></iframe></body></html>",
+    "<html><body><pre>  indented\n\n  code  </pre><p>Ünïcödé — text</p></body></html>",
+    "<html><frameset></frameset></html>",
+    text_to_html("First saved line\nSecond saved line\n  padded line  ", 5000),
+]
+
+
+@pytest.mark.parametrize("page", PAGES)
+def test_matches_legacy_pipeline(page):
+    assert html_to_text(page) == legacy_clean(page)
+    assert clean_body_content(extract_body_content(page)) == legacy_clean(page)
+
+
+def test_page_without_body_keeps_its_text():
+    # The old pipeline returned "" here; this difference is intended
+    page = "<p>Hello</p><p>World</p>"
+    assert legacy_clean(page) == ""
+    assert html_to_text(page) == "Hello\nWorld"
+
+
+def test_bs4_backend_matches():
+    for page in PAGES:
+        assert html_to_text(page, backend="html.parser") == html_to_text(page)
@@ -0,0 +1,56 @@
+import pytest
+
+import chunking
+import pipeline
+from fetch_store import FetchStore
+
+# One line per chunk with a 20-token (80 character) budget
+SECURITY = "Security advisory: patch the security flaw in the security gateway now."
+EMAILS = "Write to alice@example.com or bob@example.org for help with this."
+PRICES = "Plans start at $19.99 a month and $199.00 billed yearly for teams."
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Fake LLM pass recording which chunks it was sent."""
+    sent = []
+
+    def fake_iter_parse(chunks, description, max_retries=3, concurrency=4):
+        sent.extend(chunks)
+        for index, chunk in enumerate(chunks):
+            yield index, f"<{chunk[:5]}>"
+
+    monkeypatch.setattr(chunking, "chunk_budget", lambda model="llama3": 20)
+    monkeypatch.setattr(pipeline, "iter_parse_with_ollama", fake_iter_parse)
+    return sent
+
+
+def test_unchanged_chunks_are_reused(llm):
+    store = FetchStore(":memory:")
+    content = "\n".join((SECURITY, EMAILS))
+    pipeline.extract_incremental("https://example.com/", content, "emails", store=store)
+    del llm[:]
+    _, report = pipeline.extract_incremental("https://example.com/", content + "\n" + PRICES, "emails",
+                                             store=store)
+    assert llm == [PRICES]
+    assert report == {"total": 3, "reused": 2, "extracted": 1, "skipped": 0}
+
+
+def test_filtered_chunks_are_judged_again(llm):
+    store = FetchStore(":memory:")
+    weak = "A footnote that mentions security once among very many unrelated words."
+    content = "\n".join((SECURITY, weak, EMAILS))
+    parsed, report = pipeline.extract_incremental("https://example.com/", content, "security", store=store,
+                                                  min_score=0.9)
+    # Ranked against the whole page: the weak match is skipped, the unmatched chunk is not
+    assert llm == [SECURITY, EMAILS]
+    assert report["skipped"] == 1
+    assert [chunk["result"] for chunk in store.get_chunks("https://example.com/", "security")] == \
+        ["<Secur>", "<Write>"]
+
+    # Without the filter the skipped chunk is extracted on the next refresh
+    del llm[:]
+    _, report = pipeline.extract_incremental("https://example.com/", content, "security", store=store,
+                                             min_score=None)
+    assert llm == [weak]
+    assert report == {"total": 3, "reused": 2, "extracted": 1, "skipped": 0}
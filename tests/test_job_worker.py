@@ -0,0 +1,47 @@
+import time
+
+import pytest
+
+import pipeline
+from job_queue import JobQueue
+
+HTML = "<html><body><p>one</p><p>two</p><p>three</p></body></html>"
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    """Queue with one job and a fake network, one chunk per line."""
+    queue = JobQueue(":memory:", lease_seconds=0.3, max_attempts=1)
+    queue.add(["https://example.com/"], parse_description="numbers")
+    monkeypatch.setattr(pipeline, "scrape_website", lambda url, **kwargs: HTML)
+    monkeypatch.setattr(pipeline, "iter_chunks", lambda content: content.split("\n"))
+    return queue
+
+
+def test_long_extraction_keeps_its_lease(queue, monkeypatch):
+    stolen = []
+
+    def slow_iter_parse(chunks, description):
+        for index, chunk in enumerate(chunks):
+            time.sleep(0.2)
+            yield index, chunk.upper()
+            # Past the 0.3s lease by the second chunk: only a renewed lease keeps it
+            stolen.extend(queue.claim("other-worker"))
+
+    monkeypatch.setattr(pipeline, "iter_parse_with_ollama", slow_iter_parse)
+    assert pipeline.run_job_worker(queue, worker_id="worker") == {"finished": 1, "failed": 0}
+    assert stolen == []
+    [job] = queue.results()
+    assert job["state"] == "extracted" and job["parsed"] == "ONE\nTWO\nTHREE"
+
+
+def test_failed_chunk_fails_the_job(queue, monkeypatch):
+    def failing_iter_parse(chunks, description):
+        yield 0, "ONE"
+        yield 1, "Error processing content: model unavailable"
+
+    monkeypatch.setattr(pipeline, "iter_parse_with_ollama", failing_iter_parse)
+    assert pipeline.run_job_worker(queue, worker_id="worker") == {"finished": 0, "failed": 1}
+    [job] = queue.results()
+    assert job["state"] == "failed" and job["parsed"] is None
+    assert "model unavailable" in job["error"]
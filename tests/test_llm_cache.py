@@ -0,0 +1,33 @@
+import llm_cache
+from llm_cache import LLMCache
+
+
+def test_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(llm_cache, "_EVICT_INTERVAL", 1)
+    cache = LLMCache(path=":memory:", ttl=None, max_entries=3)
+    for key in ("a", "b", "c"):
+        cache.set(key, key.upper())
+    cache.get("a")
+    cache.set("d", "D")
+    assert cache.stats()["entries"] == 3
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+
+
+def test_size_is_checked_every_interval(monkeypatch):
+    monkeypatch.setattr(llm_cache, "_EVICT_INTERVAL", 10)
+    cache = LLMCache(path=":memory:", ttl=None, max_entries=5)
+    # The first write checks the size, then every tenth one
+    for index in range(10):
+        cache.set(str(index), "x")
+    assert cache.stats()["entries"] == 10
+    cache.set("10", "x")
+    assert cache.stats()["entries"] == 5
+
+
+def test_replacing_a_key_keeps_one_entry():
+    cache = LLMCache(path=":memory:", ttl=None)
+    cache.set("a", "1")
+    cache.set("a", "2")
+    assert cache.get("a") == "2"
+    assert cache.stats()["entries"] == 1
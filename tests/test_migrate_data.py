@@ -0,0 +1,38 @@
+import os
+
+from migrate_data import migrate
+from record_store import RecordStore
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_rerun_does_not_duplicate_records(tmp_path):
+    data = tmp_path / "data"
+    _write(str(data / "raw_data" / "page_1.html"), "<p>one</p>")
+    _write(str(data / "parsed_data" / "page_1.txt"), "one")
+    store_path = str(tmp_path / "store")
+
+    first = migrate(str(data), store_path)
+    assert first["files"] == 2 and first["already_migrated"] == 0
+    second = migrate(str(data), store_path)
+    assert second["files"] == 2 and second["already_migrated"] == 2
+    assert RecordStore(store_path).stats()["records"] == 2
+
+
+def test_changed_file_is_stored_again(tmp_path):
+    data = tmp_path / "data"
+    page = str(data / "raw_data" / "page_1.html")
+    _write(page, "<p>one</p>")
+    store_path = str(tmp_path / "store")
+    migrate(str(data), store_path)
+
+    _write(page, "<p>two</p>")
+    report = migrate(str(data), store_path)
+    assert report["already_migrated"] == 0
+    store = RecordStore(store_path)
+    assert store.stats()["records"] == 2
+    assert store.get(store.keys()[0]) == b"<p>two</p>"
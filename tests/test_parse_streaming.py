@@ -0,0 +1,44 @@
+import threading
+import time
+
+import pytest
+
+import parse
+
+
+@pytest.fixture
+def slow_llm(monkeypatch):
+    """Fake LLM call taking 0.2s per chunk, counting how many calls ran."""
+    calls = []
+    lock = threading.Lock()
+
+    def fake_parse_chunk(chunk, description, max_retries=3, use_cache=True, on_token=None, on_reset=None):
+        with lock:
+            calls.append(chunk)
+        time.sleep(0.2)
+        if on_token is not None:
+            on_token(f"<{chunk}>")
+        return f"<{chunk}>"
+
+    monkeypatch.setattr(parse, "_parse_chunk", fake_parse_chunk)
+    return calls
+
+
+@pytest.mark.parametrize("generator", [parse.iter_parse_with_ollama, parse.stream_parse_with_ollama])
+def test_closing_early_does_not_wait_for_queued_chunks(slow_llm, generator):
+    chunks = [f"chunk {i}" for i in range(20)]
+    started = time.perf_counter()
+    events = generator(chunks, "anything", concurrency=2)
+    next(events)
+    events.close()
+    assert time.perf_counter() - started < 1.0
+    time.sleep(0.3)
+    # Queued chunks were cancelled, not sent to the model
+    assert len(slow_llm) < len(chunks)
+
+
+def test_all_results_arrive(slow_llm):
+    chunks = ["a", "b", "a", "c"]
+    results = dict(parse.iter_parse_with_ollama(chunks, "anything", concurrency=4))
+    assert results == {0: "<a>", 1: "<b>", 2: "<a>", 3: "<c>"}
+    assert sorted(slow_llm) == ["a", "b", "c"]
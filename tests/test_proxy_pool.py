@@ -0,0 +1,188 @@
+import os
+import sys
+
+import pytest
+
+import proxy_pool
+from proxy_pool import ProxyPool
+
+
+class Clock:
+    """Stand-in for time.monotonic that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(proxy_pool.time, "monotonic", clock)
+    return clock
+
+
+def state(pool, proxy):
+    return next(entry for entry in pool.stats() if entry["proxy"] == proxy)
+
+
+def fail(pool, proxy, times=1, status=None):
+    for _ in range(times):
+        pool.report(proxy, False, 0.1, status)
+
+
+def succeed(pool, proxy, latency=0.1, times=1):
+    for _ in range(times):
+        pool.report(proxy, True, latency, 200)
+
+
+def test_consecutive_failures_eject(clock):
+    pool = ProxyPool(["a:1", "b:1"], cooldown=10)
+    fail(pool, "a:1", 2)
+    assert state(pool, "a:1")["ejections"] == 0
+    fail(pool, "a:1")
+    assert state(pool, "a:1")["ejections"] == 1
+    assert state(pool, "a:1")["cooling_for"] == 10
+    assert all(pool.acquire() == "b:1" for _ in range(20))
+
+
+def test_407_ejects_at_once(clock):
+    pool = ProxyPool(["a:1", "b:1"], cooldown=10)
+    pool.report("a:1", True, 0.1, 407)
+    assert state(pool, "a:1")["ejections"] == 1
+
+
+@pytest.mark.parametrize("status", [403, 429])
+def test_blocked_statuses_count_as_failures(clock, status):
+    pool = ProxyPool(["a:1", "b:1"], cooldown=10)
+    pool.report("a:1", True, 0.1, status)
+    assert state(pool, "a:1")["ejections"] == 0
+    assert state(pool, "a:1")["failures"] == 1
+    # One site blocking a request now and then is not a ban...
+    succeed(pool, "a:1")
+    pool.report("a:1", True, 0.1, status)
+    assert state(pool, "a:1")["ejections"] == 0
+    # ...but blocks that keep coming are
+    pool.report("a:1", True, 0.1, status)
+    pool.report("a:1", True, 0.1, status)
+    assert state(pool, "a:1")["ejections"] == 1
+
+
+def test_error_rate_ejects(clock):
+    pool = ProxyPool(["a:1", "b:1"], cooldown=10, max_error_rate=0.3)
+    for _ in range(3):
+        succeed(pool, "a:1")
+        fail(pool, "a:1", 2)
+    assert state(pool, "a:1")["ejections"] == 1
+
+
+def test_cooldown_doubles_and_is_capped(clock):
+    pool = ProxyPool(["a:1", "b:1"], cooldown=10)
+    cooldowns = []
+    for _ in range(7):
+        fail(pool, "a:1", 3)
+        cooldowns.append(state(pool, "a:1")["cooling_for"])
+        clock.now += cooldowns[-1]
+    assert cooldowns == [10, 20, 40, 80, 160, 160, 160]
+
+
+def test_failures_while_cooling_do_not_extend_cooldown(clock):
+    pool = ProxyPool(["a:1", "b:1"], cooldown=10)
+    fail(pool, "a:1", 3)
+    clock.now += 5
+    fail(pool, "a:1", 3)
+    assert state(pool, "a:1")["ejections"] == 1
+    assert state(pool, "a:1")["cooling_for"] == 5
+
+
+def test_probation_after_cooldown(clock):
+    pool = ProxyPool(["a:1", "b:1"], cooldown=10)
+    succeed(pool, "a:1", latency=2, times=4)
+    fail(pool, "a:1", 3)
+    assert state(pool, "a:1")["ejections"] == 1
+    clock.now += 10
+
+    # Back in rotation with a clean record: old errors do not count against it
+    after = state(pool, "a:1")
+    assert after["cooling_for"] == 0
+    assert after["error_rate"] == 0
+    assert after["latency"] is None
+    assert "a:1" in {pool.acquire() for _ in range(50)}
+    fail(pool, "a:1", 2)
+    assert state(pool, "a:1")["ejections"] == 1
+
+
+def test_all_cooling_uses_the_one_back_soonest(clock):
+    pool = ProxyPool(["a:1", "b:1"], cooldown=10)
+    fail(pool, "a:1", 3)
+    clock.now += 5
+    fail(pool, "b:1", 3)
+    assert pool.acquire() == "a:1"
+
+
+def test_too_slow_needs_a_faster_peer(clock):
+    pool = ProxyPool(["a:1"], cooldown=10, max_latency=1)
+    succeed(pool, "a:1", latency=5, times=20)
+    # Nothing faster to switch to: latency is probably our own queueing
+    assert state(pool, "a:1")["ejections"] == 0
+
+
+def test_too_slow_against_fast_peer(clock):
+    pool = ProxyPool(["slow:1", "fast:1"], cooldown=10, max_latency=1)
+    succeed(pool, "fast:1", latency=0.1, times=5)
+    succeed(pool, "slow:1", latency=5, times=4)
+    assert state(pool, "slow:1")["ejections"] == 0
+    succeed(pool, "slow:1", latency=5)
+    assert state(pool, "slow:1")["ejections"] == 1
+
+
+def test_too_slow_only_past_max_latency(clock):
+    pool = ProxyPool(["slow:1", "fast:1"], cooldown=10, max_latency=1)
+    succeed(pool, "fast:1", latency=0.1, times=5)
+    succeed(pool, "slow:1", latency=0.9, times=10)
+    assert state(pool, "slow:1")["ejections"] == 0
+
+
+def test_too_slow_ignores_cooling_peers(clock):
+    pool = ProxyPool(["slow:1", "fast:1"], cooldown=10, max_latency=1)
+    succeed(pool, "fast:1", latency=0.1, times=5)
+    clock.now += 1
+    pool._states["fast:1"].cooldown_until = clock.now + 10
+    succeed(pool, "slow:1", latency=5, times=10)
+    assert state(pool, "slow:1")["ejections"] == 0
+
+
+def test_sticky_hosts_move_after_ejection(clock):
+    pool = ProxyPool(["a:1", "b:1"], cooldown=10, sticky_hosts=True)
+    first = pool.acquire("https://example.com/1")
+    assert all(pool.acquire(f"https://example.com/{i}") == first for i in range(10))
+    fail(pool, first, 3)
+    other = pool.acquire("https://example.com/again")
+    assert other != first
+
+
+def test_stand_in_proxies():
+    """End to end through local proxies: the slow and the 403 proxy get little traffic."""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+    from bench_proxy_pool import OriginHandler, make_proxy_handler, run, start_server
+
+    servers = [start_server(OriginHandler)]
+    servers += [start_server(make_proxy_handler(0.01)) for _ in range(2)]
+    servers.append(start_server(make_proxy_handler(0.5)))
+    servers.append(start_server(make_proxy_handler(0, status=403)))
+    try:
+        origin = servers[0][1]
+        healthy, slow, banned = [url for _, url in servers[1:3]], servers[3][1], servers[4][1]
+        pool = ProxyPool(healthy + [slow, banned], cooldown=60, max_latency=0.1)
+        ok, _ = run(pool, origin, 60, 4)
+        stats = {entry["proxy"]: entry for entry in pool.stats()}
+        # Either ejected or scored so low that they are hardly ever picked
+        assert stats[banned]["requests"] <= 6
+        assert stats[slow]["requests"] <= 6
+        assert all(stats[proxy]["ejections"] == 0 for proxy in healthy)
+        assert ok >= 60 - stats[banned]["requests"]
+    finally:
+        for server, _ in servers:
+            server.shutdown()
@@ -0,0 +1,51 @@
+from relevance import filter_chunks, prefilter_chunks
+
+EMAIL_CHUNKS = [
+    "Contact our team: alice@example.com or bob@example.org",
+    "Sign up to our email newsletter for weekly updates about email security",
+    "Press enquiries: press@example.net",
+]
+PRICE_CHUNKS = [
+    "Basic plan $19.99 per month, Pro plan $49.99 per month",
+    "Our product helps teams ship faster. Product reviews and product news.",
+    "Enterprise $199.00, billed yearly",
+]
+
+
+def test_prefilter_is_off_by_default():
+    stats = {}
+    assert prefilter_chunks(EMAIL_CHUNKS, "Extract all email addresses", stats=stats) == EMAIL_CHUNKS
+    assert "relevance" not in stats
+
+
+def test_min_score_keeps_chunks_without_query_words():
+    kept, report = filter_chunks(EMAIL_CHUNKS, "Extract all email addresses", min_score=0.1)
+    assert kept == EMAIL_CHUNKS
+    assert report["skipped"] == 0
+    kept, _ = filter_chunks(PRICE_CHUNKS, "product prices", min_score=0.1)
+    assert kept == PRICE_CHUNKS
+
+
+def test_min_score_drops_weak_matches():
+    chunks = ["security " * 20 + "overview", "security mentioned once among many other unrelated words here", "no"]
+    kept, report = filter_chunks(chunks, "security", min_score=0.9)
+    assert kept == [chunks[0], chunks[2]]
+    assert report == {"total": 3, "kept": 2, "skipped": 1}
+
+
+def test_drop_unmatched_must_be_asked_for():
+    kept, report = filter_chunks(EMAIL_CHUNKS, "Extract all email addresses", min_score=0.1, drop_unmatched=True)
+    assert kept == [EMAIL_CHUNKS[1]]
+    assert report["skipped"] == 2
+
+
+def test_top_k_caps_in_document_order():
+    chunks = ["cats", "dogs and cats", "dogs", "dogs dogs"]
+    kept, _ = filter_chunks(chunks, "dogs", top_k=2)
+    assert kept == ["dogs", "dogs dogs"]
+
+
+def test_no_match_keeps_everything():
+    kept, report = filter_chunks(PRICE_CHUNKS, "weather forecast", min_score=0.5, drop_unmatched=True)
+    assert kept == PRICE_CHUNKS
+    assert report["skipped"] == 0
@@ -0,0 +1,102 @@
+import time
+
+import pytest
+
+import http_fetch
+import scrape
+
+SPA_SHELL = "<html><body><div id='root'></div><script src='/app.js'></script></body></html>"
+ARTICLE = "<html><body><p>" + "Server-rendered content. " * 40 + "</p></body></html>"
+
+
+@pytest.fixture
+def web(monkeypatch):
+    """Fake network and browser recording what scrape_website asked for."""
+    calls = {"fetch": [], "render": 0}
+    pages = {}
+
+    def fake_fetch_response(url, proxy_server=None, etag=None, last_modified=None, **kwargs):
+        calls["fetch"].append((url, etag))
+        status, html, page_etag = pages[url]
+        if etag and etag == page_etag:
+            return {"status": 304, "html": None, "etag": etag, "last_modified": None}
+        return {"status": status, "html": html if status == 200 else None, "etag": page_etag,
+                "last_modified": None}
+
+    def fake_render(url, *args, **kwargs):
+        calls["render"] += 1
+        time.sleep(0.2)
+        return f"<html><body><p>Rendered {calls['render']}</p></body></html>"
+
+    monkeypatch.setattr(scrape, "fetch_response", fake_fetch_response)
+    monkeypatch.setattr(scrape, "_render_with_browser", fake_render)
+    monkeypatch.setattr(http_fetch, "_domain_modes", {})
+    return pages, calls
+
+
+def test_http_page_not_modified(web):
+    pages, calls = web
+    pages["https://static.test/"] = (200, ARTICLE, '"v1"')
+    stats = {}
+    assert scrape.scrape_website("https://static.test/", stats=stats) == ARTICLE
+    assert stats["validators"]["etag"] == '"v1"'
+
+    validators = stats["validators"]
+    stats = {}
+    assert scrape.scrape_website("https://static.test/", stats=stats, validators=validators) is None
+    assert stats["not_modified"]
+    assert calls["render"] == 0
+
+
+def test_browser_domain_ignores_shell_validators(web):
+    pages, calls = web
+    pages["https://spa.test/"] = (200, SPA_SHELL, '"shell"')
+    stats = {}
+    first = scrape.scrape_website("https://spa.test/", stats=stats)
+    assert first.startswith("<html><body><p>Rendered")
+    # The shell's ETag is not reported, so it is never stored for a conditional GET
+    assert "validators" not in stats
+
+    # Even with the shell's validators, a known browser domain is rendered again
+    stats = {}
+    second = scrape.scrape_website("https://spa.test/", stats=stats, validators={"etag": '"shell"'})
+    assert second is not None and second != first
+    assert not stats.get("not_modified")
+    assert len(calls["fetch"]) == 1
+
+
+def test_http_mode_never_renders(web):
+    pages, calls = web
+    pages["https://spa.test/"] = (200, SPA_SHELL, None)
+    assert scrape.scrape_website("https://spa.test/", mode="http") == SPA_SHELL
+    pages["https://down.test/"] = (503, None, None)
+    assert scrape.scrape_website("https://down.test/", mode="http") is None
+    assert calls["render"] == 0
+
+
+class _FakePool:
+    """Proxy pool handing out one proxy and recording the reports."""
+
+    def __init__(self):
+        self.reports = []
+
+    def acquire(self, url):
+        return "http://proxy.test:8080"
+
+    def report(self, proxy, ok, latency=None, status=None):
+        self.reports.append((ok, latency, status))
+
+
+def test_proxy_latency_excludes_rendering(web, monkeypatch):
+    pages, calls = web
+    pool = _FakePool()
+    monkeypatch.setattr(scrape, "get_proxy_pool", lambda: pool)
+    pages["https://spa.test/"] = (200, SPA_SHELL, None)
+    # Escalated: only the HTTP fetch through the proxy is timed, not the render
+    assert scrape.scrape_website("https://spa.test/", use_proxy=True)
+    ok, latency, status = pool.reports[-1]
+    assert ok and latency is not None and latency < 0.1
+
+    # Known browser domain: nothing but the render, so no latency
+    assert scrape.scrape_website("https://spa.test/", use_proxy=True)
+    assert pool.reports[-1] == (True, None, None)
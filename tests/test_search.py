@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+import search
+from bulk_scrape import search_and_scrape
+from llm_cache import LLMCache
+from search import StubBackend, iter_search
+
+
+@pytest.fixture
+def stub(monkeypatch, tmp_path):
+    """A fresh stub backend and an empty search cache."""
+    backend = StubBackend()
+    monkeypatch.setitem(search._backends, "test-stub", backend)
+    monkeypatch.setattr(search, "_cache", LLMCache(path=str(tmp_path / "search.sqlite"), ttl=60))
+    return backend
+
+
+def test_second_search_is_served_from_cache(stub):
+    first = list(iter_search("cyber security", 5, backend="test-stub"))
+    second = list(iter_search("cyber security", 5, backend="test-stub"))
+    assert len(first) == 5
+    assert second == first
+    assert stub.calls == 1
+
+
+def test_cache_is_keyed_by_query_and_count(stub):
+    list(iter_search("cyber security", 5, backend="test-stub"))
+    list(iter_search("cyber security", 3, backend="test-stub"))
+    list(iter_search("phishing", 5, backend="test-stub"))
+    assert stub.calls == 3
+
+
+def test_use_cache_false_always_searches(stub):
+    list(iter_search("cyber security", 5, backend="test-stub", use_cache=False))
+    list(iter_search("cyber security", 5, backend="test-stub", use_cache=False))
+    assert stub.calls == 2
+
+
+def test_cached_results_expire_after_ttl(stub, monkeypatch, tmp_path):
+    monkeypatch.setattr(search, "_cache", LLMCache(path=str(tmp_path / "short.sqlite"), ttl=0.2))
+    list(iter_search("cyber security", 5, backend="test-stub"))
+    list(iter_search("cyber security", 5, backend="test-stub"))
+    assert stub.calls == 1
+    time.sleep(0.3)
+    list(iter_search("cyber security", 5, backend="test-stub"))
+    assert stub.calls == 2
+
+
+def test_canned_results_are_deduplicated(stub):
+    stub.results = {"q": ["https://a.test/1", "https://a.test/1", "https://a.test/2"]}
+    assert list(iter_search("q", 5, backend="test-stub")) == ["https://a.test/1", "https://a.test/2"]
+
+
+def test_scraping_starts_before_search_finishes(stub):
+    stub.delay = 0.2
+    started = time.monotonic()
+    fetched = []
+
+    def fetch(url):
+        fetched.append(time.monotonic() - started)
+        return f"<html><body>{url}</body></html>"
+
+    results = list(search_and_scrape("streaming", 5, backend="test-stub", fetch=fetch, min_delay=0))
+
+    assert sorted(result["url"] for result in results) == sorted(
+        f"https://example.com/streaming/{i}" for i in range(5))
+    assert all(result["status"] == "ok" for result in results)
+    # The first page is fetched as soon as the first URL arrives, not after all five
+    assert fetched[0] < 0.2 * 5 * 0.6
@@ -2,49 +2,42 @@ import os
 import logging
 import json
 from datetime import datetime
+from itertools import chain
 import csv
-import pandas as pd
+
+from exporters import CSVWriter
+from record_store import get_record_store, normalize_key
 
 def save_csv(data, filename, folder="data"):
     """
-    Save data as CSV.
+    Save data as CSV, streaming the rows so large results are never held twice.
     
     Args:
-        data (list): List of dictionaries to save
+        data (iterable): Dictionaries or rows (lists), possibly a generator, to save
         filename (str): Name of the file
         folder (str): Folder to save the file in (default: "data")
         
     Returns:
         str: Path to the saved file
     """
-    # Create folder if it doesn't exist
-    os.makedirs(folder, exist_ok=True)
-    
     # Full path to the file
     file_path = os.path.join(folder, filename)
     
     try:
-        # Convert to DataFrame and save
-        df = pd.DataFrame(data)
-        df.to_csv(file_path, index=False)
+        rows = iter(data)
+        first = next(rows, None)
+        if first is not None and not isinstance(first, dict):
+            # Plain rows (lists/tuples) are written as-is, without a header
+            os.makedirs(folder, exist_ok=True)
+            with open(file_path, 'w', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerows(chain([first], rows))
+            return file_path
+        with CSVWriter(file_path) as writer:
+            writer.write_many(chain([first], rows) if first is not None else rows)
         return file_path
     except Exception as e:
         logging.error(f"Error saving CSV: {str(e)}")
-        
-        # Fallback to manual CSV writing if pandas fails
-        try:
-            with open(file_path, 'w', newline='', encoding='utf-8') as f:
-                if data and isinstance(data[0], dict):
-                    writer = csv.DictWriter(f, fieldnames=data[0].keys())
-                    writer.writeheader()
-                    writer.writerows(data)
-                else:
-                    writer = csv.writer(f)
-                    writer.writerows(data)
-            return file_path
-        except Exception as e2:
-            logging.error(f"Fallback CSV saving also failed: {str(e2)}")
-            return None
+        return None
 
 
 def setup_logging(log_level=logging.INFO):
@@ -53,6 +46,10 @@ def setup_logging(log_level=logging.INFO):
     Args:
         log_level (int): Logging level (default: logging.INFO)
     """
+    # Streamlit reruns the script on every interaction; configure only once per process
+    if logging.getLogger().handlers:
+        return logging.getLogger(__name__)
+
     # Create logs directory if it doesn't exist
     os.makedirs("logs", exist_ok=True)
     
@@ -72,35 +69,34 @@ def setup_logging(log_level=logging.INFO):
     # Return logger for the module
     return logging.getLogger(__name__)
 
-def save_data(data, filename, folder="data"):
+def save_data(data, filename, folder="data", url=None):
     """
-    Save data to a file.
+    Save data to the record store.
     Args:
         data (str): Data to save
         filename (str): Name of the file
         folder (str): Folder to save the file in (default: "data")
+        url (str): Optional source URL, for lookup with RecordStore.get_by_url
+    Returns:
+        str: Store key of the saved data ("<folder>/<filename>")
     """
-    # Create folder if it doesn't exist
-    os.makedirs(folder, exist_ok=True)
-    
-    # Full path to the file
-    file_path = os.path.join(folder, filename)
-    
-    # Save the data
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write(data)
-    
-    return file_path
+    key = normalize_key(filename, folder)
+    get_record_store().put(data, key, url=url)
+    return key
 
 def load_data(filename, folder="data"):
     """
-    Load data from a file.
+    Load data from the record store, or from a file saved before the store existed.
     Args:
         filename (str): Name of the file
         folder (str): Folder where the file is located (default: "data")
     Returns:
         str: The content of the file
     """
+    data = get_record_store().get(normalize_key(filename, folder))
+    if data is not None:
+        return data.decode("utf-8")
+
     # Full path to the file
     file_path = os.path.join(folder, filename)
     
@@ -112,45 +108,30 @@ def load_data(filename, folder="data"):
     with open(file_path, "r", encoding="utf-8") as f:
         return f.read()
 
-def save_json(data, filename, folder="data"):
+def save_json(data, filename, folder="data", url=None):
     """
-    Save data as JSON.
+    Save data as JSON in the record store.
     Args:
         data (dict): Data to save
         filename (str): Name of the file
         folder (str): Folder to save the file in (default: "data")
+        url (str): Optional source URL
+    Returns:
+        str: Store key of the saved data
     """
-    # Create folder if it doesn't exist
-    os.makedirs(folder, exist_ok=True)
-    
-    # Full path to the file
-    file_path = os.path.join(folder, filename)
-    
-    # Save the data
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
-    
-    return file_path
+    return save_data(json.dumps(data, indent=4), filename, folder=folder, url=url)
 
 def load_json(filename, folder="data"):
     """
-    Load JSON data from a file.
+    Load JSON data from the record store (or a legacy file).
     Args:
         filename (str): Name of the file
         folder (str): Folder where the file is located (default: "data")
     Returns:
         dict: The content of the file as a dictionary
     """
-    # Full path to the file
-    file_path = os.path.join(folder, filename)
-    
-    # Check if file exists
-    if not os.path.exists(file_path):
-        return None
-    
-    # Load the data
-    with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    data = load_data(filename, folder)
+    return json.loads(data) if data is not None else None
 
 def format_timestamp():
     """